@@ -1,8 +1,12 @@
-from typing import Any
+import asyncio
+import contextlib
+import datetime
+import json
+import random
+from typing import Annotated, Any
 
-import docker
 import fastapi
-import requests
+import pydantic
 from docker import errors as docker_errors
 from starknet_py.net.client_errors import ClientError
 from starknet_py.net.client_models import (
@@ -27,7 +31,21 @@ from starknet_py.net.client_models import (
     TransactionStatusResponse,
 )
 
-from app import benchmarks, error, logging, models, rpc, stats
+from app import (
+    benchmarks,
+    error,
+    head,
+    jobs,
+    logging,
+    models,
+    registry,
+    rpc,
+    runs,
+    stats,
+    store,
+    stream,
+)
+from app.benchmarks import compare
 
 MADARA: str = "madara_runner"
 MADARA_DB: str = "madara_runner_db"
@@ -41,6 +59,13 @@ ERROR_CODES: dict[int, dict[str, Any]] = {
         "description": "The node could not be found",
         "model": error.ErrorMessage,
     },
+    fastapi.status.HTTP_409_CONFLICT: {
+        "description": (
+            "The state of the chain does not allow for the generation of "
+            "benchmark inputs"
+        ),
+        "model": error.ErrorMessage,
+    },
     fastapi.status.HTTP_417_EXPECTATION_FAILED: {
         "description": "Node exists but is not running",
         "model": error.ErrorMessage,
@@ -60,6 +85,10 @@ ERROR_CODES: dict[int, dict[str, Any]] = {
         "description": "Node exists but did not respond",
         "model": error.ErrorMessage,
     },
+    fastapi.status.HTTP_504_GATEWAY_TIMEOUT: {
+        "description": "Node or docker did not respond in time",
+        "model": error.ErrorMessage,
+    },
 }
 
 
@@ -68,9 +97,22 @@ TAG_TRACE: str = "trace"
 TAG_WRITE: str = "write"
 TAG_BENCH: str = "bench"
 TAG_DEBUG: str = "debug"
+TAG_JOBS: str = "jobs"
+TAG_RESULTS: str = "results"
 
 logger = logging.get_logger()
-app = fastapi.FastAPI()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_: fastapi.FastAPI):
+    yield
+    await jobs.jobs_cancel()
+    await head.trackers_stop()
+    await rpc.sessions_close()
+    stats.docker_close()
+
+
+app = fastapi.FastAPI(lifespan=lifespan)
 
 
 @app.exception_handler(docker_errors.NotFound)
@@ -87,9 +129,9 @@ async def excepton_handler_docker_api_error(
     raise error.ErrorNodeSilent(request.path_params["node"])
 
 
-@app.exception_handler(requests.exceptions.JSONDecodeError)
-async def exception_handler_requests_json_decode_error(
-    request: fastapi.Request, err: requests.exceptions.JSONDecodeError
+@app.exception_handler(json.JSONDecodeError)
+async def exception_handler_json_decode_error(
+    request: fastapi.Request, err: json.JSONDecodeError
 ):
     api_call = (
         str(request.url).removeprefix(str(request.base_url)).partition("?")[0]
@@ -97,6 +139,16 @@ async def exception_handler_requests_json_decode_error(
     raise error.ErrorJsonDecode(request.path_params["node"], api_call, err)
 
 
+@app.exception_handler(TimeoutError)
+async def exception_handler_timeout_error(
+    request: fastapi.Request, _: TimeoutError
+):
+    api_call = (
+        str(request.url).removeprefix(str(request.base_url)).partition("?")[0]
+    )
+    raise error.ErrorNodeTimeout(request.path_params["node"], api_call)
+
+
 @app.exception_handler(ClientError)
 async def exception_handler_starknet_py_client_error(
     _: fastapi.Request, err: ClientError
@@ -122,11 +174,11 @@ async def node_get_cpu(
     entire system.
     """
 
-    container = stats.container_get(node)
+    container = await stats.container_get(node)
     if system:
-        return stats.stats_cpu_system(node, container)
+        return await stats.stats_cpu_system(node, container)
     else:
-        return stats.stats_cpu_normalized(node, container)
+        return await stats.stats_cpu_normalized(node, container)
 
 
 @app.get("/bench/memory/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
@@ -138,23 +190,50 @@ async def node_get_memory(
     Fetches the amount of ram used by the node. Result will be in _bytes_.
     """
 
-    container = stats.container_get(node)
-    return stats.stats_memory(node, container)
+    container = await stats.container_get(node)
+    return await stats.stats_memory(node, container)
+
+
+@app.get("/bench/resources/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def node_get_resources(
+    node: models.NodeName,
+) -> models.ResponseModelStats[models.ResourceSnapshot]:
+    """## Get all node resource usage metrics at once.
+
+    Returns cpu usage (both normalized and as a percent of system usage),
+    memory usage along with its page cache and rss split, disk bytes and
+    operations read and written, and network bytes received and sent, all from
+    a single Docker stats snapshot. This is much cheaper than querying each
+    metric separately when polling a node.
+
+    Disk and network counters are totals since the container started. Disk
+    operation rates are computed since the previous call to this endpoint.
+    """
+
+    container = await stats.container_get(node)
+    return await stats.stats_resources(node, container)
 
 
 @app.get("/bench/storage/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
 async def node_get_storage(
     node: models.NodeName,
-) -> models.ResponseModelStats[int]:
+    source: models.query.Storage = models.StorageSource.WALK,
+) -> models.ResponseModelStorage:
     """## Returns node storage usage
 
     Fetches the amount of space the node database is currently taking up. This
-    is currently set up to be the size of `/data` where the node db should be
-    set up. Result will be in _bytes_.
+    is the size of the data directory the node was registered with, where the
+    node db should be set up. Result will be in _bytes_.
+
+    Walking the database is expensive, so with the default `walk` source the
+    size is cached and refreshed in the background once it is older than a
+    minute: check `age` to know how old a measurement is. The `filesystem`
+    source is always fresh and cheap, but includes anything else stored on the
+    same filesystem. Either can be polled often.
     """
 
-    container = stats.container_get(node)
-    return stats.stats_storage(node, container)
+    container = await stats.container_get(node)
+    return await stats.stats_storage(node, container, source)
 
 
 @app.get("/bench/rpc/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
@@ -162,17 +241,266 @@ async def benchmark_rpc(
     rpc_call: rpc.RpcCall,
     samples: models.query.TestSamples = 10,
     interval: models.query.TestInterval = 100,
+    histogram: models.query.TestHistogram = False,
+    mode: models.query.TestMode = models.BenchmarkMode.BURST,
+    rate: models.query.TestRate = 10,
+    concurrency: models.query.TestConcurrency = 1,
+    corpus: models.query.CorpusId | None = None,
+    save: models.query.TestSave = True,
+    isolate: models.query.TestIsolate = False,
+    nodes: models.query.TestNodes = None,
 ) -> models.ResponseModelBench:
-    # containers = [(node, stats.container_get(node)) for node in models.NodeName]
-    # urls = [rpc.rpc_url(node, container) for (node, container) in containers]
+    """## Benchmark a JSON RPC method
+
+    Inputs are generated from the latest state of the chain and the same inputs
+    are sent to every node. In 'burst' mode, samples are generated `interval`
+    milliseconds apart and then all sent at once. In 'open_loop' mode, samples
+    are sent at a constant `rate` and latency is measured from the time each
+    sample was _meant_ to be sent, so that stalls in the node are not hidden.
+    In 'closed_loop' mode, at most `concurrency` samples are in flight at once.
+
+    If a `corpus` is provided, its inputs are replayed instead of generating
+    new ones, which makes results reproducible across runs.
+
+    The cpu, memory, disk and network usage of each node container is sampled
+    every second for the duration of the benchmark, so that latency spikes can
+    be matched against resource usage. Nodes registered without a container,
+    such as the mock node, are not sampled.
+
+    Every run reports the overhead and jitter of the harness itself, measured
+    with no-op samples and by monitoring the event loop during the benchmark.
+    Node latencies within this overhead are harness noise. With `isolate`,
+    garbage collection is frozen and the harness is pinned to cpus outside of
+    the node containers cpuset for the duration of the benchmark, which makes
+    sub-millisecond measurements more trustworthy.
+
+    Unless `save` is false, results and individual samples are saved to the
+    result store and the id of the saved run is returned.
+    """
+
+    nodes = nodes or list(models.NodeName)
+
+    async with jobs.nodes_lock(nodes):
+        return await runs.bench_rpc(
+            nodes,
+            rpc_call,
+            samples,
+            interval,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            corpus,
+            save,
+            isolate,
+        )
+
+
+@app.get(
+    "/bench/rpc/stream/{node}",
+    responses={
+        **ERROR_CODES,
+        fastapi.status.HTTP_200_OK: {"content": {"text/event-stream": {}}},
+    },
+    response_class=fastapi.responses.StreamingResponse,
+    tags=[TAG_BENCH],
+)
+async def benchmark_rpc_stream(
+    rpc_call: rpc.RpcCall,
+    samples: models.query.TestSamples = 10,
+    interval: models.query.TestInterval = 100,
+    histogram: models.query.TestHistogram = False,
+    mode: models.query.TestMode = models.BenchmarkMode.BURST,
+    rate: models.query.TestRate = 10,
+    concurrency: models.query.TestConcurrency = 1,
+    corpus: models.query.CorpusId | None = None,
+    save: models.query.TestSave = True,
+    isolate: models.query.TestIsolate = False,
+    nodes: models.query.TestNodes = None,
+) -> fastapi.responses.StreamingResponse:
+    """## Stream the samples of a JSON RPC method benchmark as they complete
+
+    Same as `/bench/rpc`, but results are streamed as server-sent events while
+    the benchmark runs:
+
+    - `sample`: latency and phase timings of a single sample
+    - `summary`: rolling latency percentiles of a node, sent every second
+    - `result`: the same results as `/bench/rpc`, once the benchmark completes
+    - `error`: why the benchmark failed, if it did
+
+    If the client reads events too slowly, samples are dropped from the stream
+    instead of being buffered. Summaries still account for dropped samples and
+    report how many were dropped. Closing the connection aborts the benchmark,
+    in which case results are not saved.
+    """
+
+    nodes = nodes or list(models.NodeName)
+
+    async def run(progress: runs.Progress):
+        async with jobs.nodes_lock(nodes):
+            return await runs.bench_rpc(
+                nodes,
+                rpc_call,
+                samples,
+                interval,
+                histogram,
+                mode,
+                rate,
+                concurrency,
+                corpus,
+                save,
+                isolate,
+                progress,
+            )
+
+    return fastapi.responses.StreamingResponse(
+        stream.SampleStream().events(run),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/bench/rpc/sweep/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def benchmark_rpc_sweep(
+    node: models.NodeName,
+    rpc_call: rpc.RpcCall,
+    samples: models.query.TestSamples = 100,
+    concurrency_max: models.query.TestConcurrencyMax = 64,
+    histogram: models.query.TestHistogram = False,
+) -> models.ResponseModelSweep:
+    """## Find the concurrency level at which a node saturates
+
+    Benchmarks a JSON RPC method at concurrency 1, 2, 4, ... up to
+    `concurrency_max`, sending `samples` samples at each step. Throughput and
+    tail latency are reported for every step, along with the knee past which
+    adding concurrency no longer increases throughput.
+    """
+
+    url = await runs.node_url(node)
+
+    async with jobs.nodes_lock([node]):
+        return await benchmarks.sweep(
+            [url], rpc_call, samples, concurrency_max, histogram
+        )
+
+
+@app.get("/bench/rpc/batch/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def benchmark_rpc_batch(
+    node: models.NodeName,
+    rpc_call: rpc.RpcCall,
+    samples: models.query.TestSamples = 256,
+    batch_max: models.query.TestBatchMax = 64,
+    concurrency: models.query.TestConcurrency = 1,
+    histogram: models.query.TestHistogram = False,
+) -> models.ResponseModelBatch:
+    """## Compare JSON RPC batch sizes
+
+    Sends the same `samples` calls packed into JSON RPC batch requests of size
+    1, 2, 4, ... up to `batch_max`. Latency is reported both per batch request
+    and amortized per call, along with call throughput and the batch size past
+    which batching stops helping.
+
+    Only rpc calls whose inputs map directly to JSON RPC parameters can be
+    batched: calls which take a transaction or request body are rejected.
+    """
+
+    url = await runs.node_url(node)
+
+    async with jobs.nodes_lock([node]):
+        return await benchmarks.batch(
+            [url], rpc_call, samples, batch_max, concurrency, histogram
+        )
+
+
+# Declared here rather than in `models.body` as it depends on `rpc.RpcCall`
+MixWeights = Annotated[
+    dict[rpc.RpcCall, Annotated[float, pydantic.Field(gt=0)]],
+    fastapi.Body(
+        min_length=1,
+        description="Relative weight of each rpc call in the workload",
+        examples=[
+            {
+                "starknet_getStorageAt": 30,
+                "starknet_call": 30,
+                "starknet_getBlockWithTxs": 20,
+                "starknet_estimateFee": 15,
+                "starknet_traceTransaction": 5,
+            }
+        ],
+    ),
+]
+
+
+@app.post("/bench/rpc/mix/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def benchmark_rpc_mix(
+    node: models.NodeName,
+    weights: MixWeights,
+    samples: models.query.TestSamples = 100,
+    histogram: models.query.TestHistogram = False,
+    mode: models.query.TestMode = models.BenchmarkMode.BURST,
+    rate: models.query.TestRate = 10,
+    concurrency: models.query.TestConcurrency = 1,
+    seed: models.query.TestSeed = None,
+    save: models.query.TestSave = True,
+    isolate: models.query.TestIsolate = False,
+) -> models.ResponseModelMix:
+    """## Benchmark a weighted mix of JSON RPC methods
+
+    The method of each sample is drawn at random according to `weights`, and
+    samples of all methods are interleaved so that they contend for the same
+    node resources, as they would in production. Latency is reported for each
+    method individually as well as over the whole workload, which exposes
+    interference that single method benchmarks hide.
+
+    As with `/bench/rpc`, harness overhead is reported with every run and
+    `isolate` shields the benchmark from harness jitter.
+
+    Unless `save` is false, results and individual samples are saved to the
+    result store and the id of the saved run is returned.
+    """
+
+    async with jobs.nodes_lock([node]):
+        return await runs.bench_mix(
+            node,
+            weights,
+            samples,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            seed,
+            save,
+            isolate,
+        )
+
+
+@app.post("/bench/corpus/{node}", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def corpus_generate(
+    node: models.NodeName,
+    rpc_call: rpc.RpcCall,
+    samples: models.query.TestSamples = 100,
+    seed: models.query.TestSeed = None,
+) -> models.ResponseModelCorpus:
+    """## Generate a corpus of inputs for later replay
+
+    Inputs are generated once from the current state of the node and saved to
+    disk. The returned corpus id can then be passed to `/bench/rpc` to replay
+    the exact same inputs in subsequent benchmarks.
+    """
+
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    url = await runs.node_url(node)
+
+    return await benchmarks.corpus_generate([url], rpc_call, samples, seed)
+
 
-    containers = [
-        (node, stats.container_get(node))
-        for node in [models.NodeName.MADARA, models.NodeName.MADARA]
-    ]
-    urls = [rpc.rpc_url(node, container) for (node, container) in containers]
+@app.get("/bench/corpus", responses={**ERROR_CODES}, tags=[TAG_BENCH])
+async def corpus_list() -> list[models.ResponseModelCorpus]:
+    """## List all input corpora available for replay"""
 
-    return await benchmarks.benchmark(urls, rpc_call, samples, interval)
+    return benchmarks.corpus.corpus_list()
 
 
 # =========================================================================== #
@@ -188,8 +516,7 @@ async def benchmark_rpc(
 async def starknet_blockHashAndNumber(
     node: models.NodeName,
 ) -> models.ResponseModelJSON[BlockHashAndNumber]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_blockHashAndNumber(url)
 
 
@@ -201,8 +528,7 @@ async def starknet_blockHashAndNumber(
 async def starknet_blockNumber(
     node: models.NodeName,
 ) -> models.ResponseModelJSON[int]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_blockNumber(url)
 
 
@@ -218,8 +544,7 @@ async def starknet_call(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[list[int]]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_call(
         url,
         call,
@@ -237,8 +562,7 @@ async def starknet_call(
 async def starknet_chainId(
     node: models.NodeName,
 ) -> models.ResponseModelJSON[str]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_chainId(url)
 
 
@@ -254,8 +578,7 @@ async def starknet_estimateFee(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[EstimatedFee | list[EstimatedFee]]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_estimateFee(
         url,
         body,
@@ -277,8 +600,7 @@ async def starknet_estimateMessageFee(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[EstimatedFee]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_estimateMessageFee(
         url,
         body,
@@ -299,8 +621,7 @@ async def starknet_getBlockTransactionCount(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[int]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getBlockTransactionCount(
         url, block_hash, block_number, block_tag
     )
@@ -319,8 +640,7 @@ async def starknet_getBlockWithReceipts(
 ) -> models.ResponseModelJSON[
     PendingStarknetBlockWithReceipts | StarknetBlockWithReceipts
 ]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getBlockWithReceipts(
         url,
         block_hash,
@@ -342,8 +662,7 @@ async def starknet_getBlockWithTxHashes(
 ) -> models.ResponseModelJSON[
     PendingStarknetBlockWithTxHashes | StarknetBlockWithTxHashes
 ]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getBlockWithTxHashes(
         url,
         block_hash,
@@ -363,8 +682,7 @@ async def starknet_getBlockWithTxs(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[PendingStarknetBlock | StarknetBlock]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getBlockWithTxs(
         url,
         block_hash,
@@ -385,8 +703,7 @@ async def starknet_getClass(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[SierraContractClass | DeprecatedContractClass]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starnet_getClass(
         url,
         class_hash,
@@ -408,8 +725,7 @@ async def starknet_getClassAt(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[SierraContractClass | DeprecatedContractClass]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getClassAt(
         url,
         contract_address,
@@ -431,8 +747,7 @@ async def starknet_getClassHashAt(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[int]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getClassHashAt(
         url,
         contract_address,
@@ -451,8 +766,7 @@ async def starknet_getEvents(
     node: models.NodeName,
     body: models.body.GetEvents,
 ) -> models.ResponseModelJSON[EventsChunk]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rcp_starknet_getEvents(url, body)
 
 
@@ -468,8 +782,7 @@ async def starknet_getNonce(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[int]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getNonce(
         url,
         contract_address,
@@ -490,8 +803,7 @@ async def starknet_getStateUpdate(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[PendingBlockStateUpdate | BlockStateUpdate]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getStateUpdate(
         url,
         block_hash,
@@ -513,8 +825,7 @@ async def starknet_getStorageAt(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[int]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getStorageAt(
         url,
         contract_address,
@@ -537,8 +848,7 @@ async def starknet_getTransactionByBlockIdAndIndex(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[Transaction]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getTransactionByBlockIdAndIndex(
         url,
         index,
@@ -557,8 +867,7 @@ async def starknet_getTransactionByHash(
     node: models.NodeName,
     transaction_hash: models.query.TxHash,
 ) -> models.ResponseModelJSON[Transaction]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getTransactionByHash(url, transaction_hash)
 
 
@@ -571,8 +880,7 @@ async def starknet_getTransactionReceipt(
     node: models.NodeName,
     tx_hash: models.query.TxHash,
 ) -> models.ResponseModelJSON[TransactionReceipt]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getTransactionReceipt(url, tx_hash)
 
 
@@ -585,8 +893,7 @@ async def starknet_getTransactionStatus(
     node: models.NodeName,
     transaction_hash: models.query.TxHash,
 ) -> models.ResponseModelJSON[TransactionStatusResponse]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_getTransactionStatus(url, transaction_hash)
 
 
@@ -598,8 +905,7 @@ async def starknet_getTransactionStatus(
 async def starknet_specVersion(
     node: models.NodeName,
 ) -> models.ResponseModelJSON[str]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_specVersion(url)
 
 
@@ -611,8 +917,7 @@ async def starknet_specVersion(
 async def starknet_syncing(
     node: models.NodeName,
 ) -> models.ResponseModelJSON[bool | SyncStatus]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_syncing(url)
 
 
@@ -633,8 +938,7 @@ async def starknet_simulateTransactions(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[list[SimulatedTransaction]]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_simulateTransactions(
         url, body, block_hash, block_number, block_tag
     )
@@ -651,8 +955,7 @@ async def starknet_traceBlockTransactions(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[list[BlockTransactionTrace]]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_traceBlockTransactions(
         url, block_hash, block_number, block_tag
     )
@@ -667,21 +970,307 @@ async def starknet_traceTransaction(
     node: models.NodeName,
     tx_hash: models.query.TxHash,
 ) -> models.ResponseModelJSON[Any]:
-    container = stats.container_get(node)
-    url = rpc.rpc_url(node, container)
+    url = await runs.node_url(node)
     return await rpc.rpc_starknet_traceTransaction(url, tx_hash)
 
 
+# =========================================================================== #
+#                                   RAW API                                   #
+# =========================================================================== #
+
+
+@app.post(
+    "/info/rpc/raw/{node}",
+    responses={**ERROR_CODES},
+    tags=[TAG_DEBUG],
+)
+async def json_rpc(
+    node: models.NodeName,
+    rpc_call: rpc.RpcCall,
+    params: models.body.Params = None,
+) -> models.ResponseModelJSON[Any]:
+    """## Sends a raw JSON RPC call to a node
+
+    Parameters are forwarded to the node as-is and the raw JSON response is
+    returned without being deserialized. This works for any rpc call. JSON RPC
+    error replies from the node are reported as errors.
+    """
+
+    url = await runs.node_url(node)
+    return await rpc.json_rpc(url, rpc_call, params)
+
+
+# =========================================================================== #
+#                                    JOBS                                     #
+# =========================================================================== #
+
+
+@app.post("/jobs/bench/rpc/{node}", responses={**ERROR_CODES}, tags=[TAG_JOBS])
+async def job_benchmark_rpc(
+    rpc_call: rpc.RpcCall,
+    samples: models.query.TestSamples = 10,
+    interval: models.query.TestInterval = 100,
+    histogram: models.query.TestHistogram = False,
+    mode: models.query.TestMode = models.BenchmarkMode.BURST,
+    rate: models.query.TestRate = 10,
+    concurrency: models.query.TestConcurrency = 1,
+    corpus: models.query.CorpusId | None = None,
+    save: models.query.TestSave = True,
+    isolate: models.query.TestIsolate = False,
+    nodes: models.query.TestNodes = None,
+) -> models.ResponseModelJob:
+    """## Submit a JSON RPC method benchmark as a background job
+
+    Same as `/bench/rpc`, but returns immediately with the id of the job
+    instead of waiting for the benchmark to complete. Poll `/jobs/{job_id}` for
+    its progress, and fetch its results from `/jobs/{job_id}/result` once it is
+    done. Jobs targeting the same node run one after the other.
+    """
+
+    nodes = nodes or list(models.NodeName)
+    total = None if corpus is not None else samples * len(nodes)
+
+    def run(progress: runs.Progress):
+        return runs.bench_rpc(
+            nodes,
+            rpc_call,
+            samples,
+            interval,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            corpus,
+            save,
+            isolate,
+            progress,
+        )
+
+    job = jobs.job_submit(models.RunKind.BENCH, nodes, total, run)
+    return job.info()
+
+
+@app.post(
+    "/jobs/bench/rpc/mix/{node}", responses={**ERROR_CODES}, tags=[TAG_JOBS]
+)
+async def job_benchmark_rpc_mix(
+    node: models.NodeName,
+    weights: MixWeights,
+    samples: models.query.TestSamples = 100,
+    histogram: models.query.TestHistogram = False,
+    mode: models.query.TestMode = models.BenchmarkMode.BURST,
+    rate: models.query.TestRate = 10,
+    concurrency: models.query.TestConcurrency = 1,
+    seed: models.query.TestSeed = None,
+    save: models.query.TestSave = True,
+    isolate: models.query.TestIsolate = False,
+) -> models.ResponseModelJob:
+    """## Submit a mixed workload benchmark as a background job
+
+    Same as `/bench/rpc/mix`, but returns immediately with the id of the job
+    instead of waiting for the benchmark to complete.
+    """
+
+    def run(progress: runs.Progress):
+        return runs.bench_mix(
+            node,
+            weights,
+            samples,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            seed,
+            save,
+            isolate,
+            progress,
+        )
+
+    job = jobs.job_submit(models.RunKind.MIX, [node], samples, run)
+    return job.info()
+
+
+@app.get("/jobs", responses={**ERROR_CODES}, tags=[TAG_JOBS])
+async def job_list() -> list[models.ResponseModelJob]:
+    """## List benchmark jobs, most recent first"""
+
+    return jobs.job_list()
+
+
+@app.get("/jobs/{job_id}", responses={**ERROR_CODES}, tags=[TAG_JOBS])
+async def job_get(job_id: models.query.JobId) -> models.ResponseModelJob:
+    """## Get the status and progress of a benchmark job"""
+
+    return jobs.job_get(job_id).info()
+
+
+@app.delete("/jobs/{job_id}", responses={**ERROR_CODES}, tags=[TAG_JOBS])
+async def job_cancel(job_id: models.query.JobId) -> models.ResponseModelJob:
+    """## Cancel a benchmark job
+
+    Cancelling a job which has already finished has no effect. Results of a
+    cancelled job are not saved.
+    """
+
+    job = jobs.job_get(job_id)
+    job.cancel()
+    await asyncio.wait([job.task])
+
+    return job.info()
+
+
+@app.get("/jobs/{job_id}/result", responses={**ERROR_CODES}, tags=[TAG_JOBS])
+async def job_result(
+    job_id: models.query.JobId,
+) -> models.ResponseModelBench | models.ResponseModelMix:
+    """## Get the results of a completed benchmark job"""
+
+    return jobs.job_result(job_id)
+
+
+# =========================================================================== #
+#                                   RESULTS                                   #
+# =========================================================================== #
+
+
+@app.get("/results/runs", responses={**ERROR_CODES}, tags=[TAG_RESULTS])
+async def results_runs(
+    rpc_call: rpc.RpcCall | None = None,
+    node: models.NodeName | None = None,
+    image: str | None = None,
+    since: datetime.datetime | None = None,
+    limit: Annotated[int, fastapi.Query(ge=1, le=1000)] = 100,
+) -> list[models.ResponseModelRunInfo]:
+    """## List saved benchmark runs
+
+    Runs are listed most recent first, and can be filtered by the method they
+    benchmarked, the node, the id of the node docker image, or the time they
+    were saved at. Only run parameters are returned, see `/results/runs/{id}`
+    for their results.
+    """
+
+    return await asyncio.to_thread(
+        store.run_list, rpc_call, node, image, since, limit
+    )
+
+
+@app.get(
+    "/results/runs/{run_id}", responses={**ERROR_CODES}, tags=[TAG_RESULTS]
+)
+async def results_run(run_id: models.query.RunId) -> models.ResponseModelRun:
+    """## Get the results of a saved benchmark run
+
+    Returns the summary of the results of each node and method in the run.
+    Individual samples are not loaded.
+    """
+
+    return await asyncio.to_thread(store.run_get, run_id)
+
+
+@app.put(
+    "/results/baselines/{name}", responses={**ERROR_CODES}, tags=[TAG_RESULTS]
+)
+async def results_baseline_set(
+    name: models.query.BaselineName, run_id: models.query.RunIdQuery
+) -> models.ResponseModelBaseline:
+    """## Tag a saved run as a baseline
+
+    New runs can then be compared against the baseline by name. Setting a
+    baseline which already exists replaces its run.
+    """
+
+    return await asyncio.to_thread(store.baseline_set, name, run_id)
+
+
+@app.get(
+    "/results/baselines/{name}", responses={**ERROR_CODES}, tags=[TAG_RESULTS]
+)
+async def results_baseline_get(
+    name: models.query.BaselineName,
+) -> models.ResponseModelBaseline:
+    """## Get the run a baseline points to"""
+
+    return await asyncio.to_thread(store.baseline_get, name)
+
+
+@app.get(
+    "/results/compare/{run_id}", responses={**ERROR_CODES}, tags=[TAG_RESULTS]
+)
+async def results_compare(
+    run_id: models.query.RunId,
+    against: models.query.RunIdQuery | None = None,
+    baseline: Annotated[
+        str, fastapi.Query(description="Name of the baseline to compare to")
+    ] = "default",
+) -> models.ResponseModelComparison:
+    """## Detect regressions between two saved runs
+
+    Compares the samples of run `run_id` with those of run `against` or, if it
+    is not set, with those of the run tagged as `baseline`. Each method found
+    on the same node in both runs is compared with a Mann-Whitney U test and
+    bootstrap confidence intervals on its median and p99 latency deltas, and
+    gets a 'pass', 'regress' or 'improve' verdict. The overall verdict can be
+    used to gate the promotion of a new node image.
+    """
+
+    if against is None:
+        against = (await asyncio.to_thread(store.baseline_get, baseline)).run
+
+    base = await asyncio.to_thread(store.run_samples, against)
+    new = await asyncio.to_thread(store.run_samples, run_id)
+
+    return await asyncio.to_thread(compare.compare, against, base, run_id, new)
+
+
 # =========================================================================== #
 #                                    DEBUG                                    #
 # =========================================================================== #
 
 
+@app.get("/info/nodes", responses={**ERROR_CODES}, tags=[TAG_DEBUG])
+async def nodes_get() -> dict[str, registry.NodeConfig]:
+    """List the nodes registered for benchmarking, by name
+
+    Nodes are registered in `nodes.toml`, or the file pointed to by
+    `BENCH_REGISTRY_PATH`, and are loaded on startup.
+    """
+
+    return registry.NODES
+
+
 @app.get("/info/docker/running", responses={**ERROR_CODES}, tags=[TAG_DEBUG])
-async def docker_get_running():
-    """List all running container instances"""
-    client = docker.client.from_env()
-    client.containers.list()
+async def docker_get_running() -> list[str]:
+    """List the names of all running container instances"""
+
+    def running() -> list[str]:
+        client = stats.docker_client()
+        return [container.name for container in client.containers.list()]
+
+    return await stats.docker_run(None, running)
+
+
+@app.get("/info/head/{node}", responses={**ERROR_CODES}, tags=[TAG_DEBUG])
+async def head_get(node: models.NodeName) -> models.ResponseModelStats[int]:
+    """Latest block number of a node, as seen by its background head tracker.
+
+    This does not query the node and can lag behind by up to
+    `BENCH_HEAD_POLL_INTERVAL` seconds.
+    """
+
+    url = await runs.node_url(node)
+    tracker = head.tracker_get(url)
+    block_number = await tracker.wait()
+
+    return models.ResponseModelStats(
+        node=node, when=tracker.when, value=block_number
+    )
+
+
+@app.get("/info/cache", responses={**ERROR_CODES}, tags=[TAG_DEBUG])
+async def cache_get_stats() -> models.ResponseModelCache:
+    """Usage statistics of the cache shared by all input generators"""
+
+    return benchmarks.cache.CACHE.stats()
 
 
 @app.get(
@@ -690,5 +1279,5 @@ async def docker_get_running():
 async def docker_get_ports(node: models.NodeName):
     """List all the ports exposed by a node's container"""
 
-    container = stats.container_get(node)
+    container = await stats.container_get(node)
     return container.ports
@@ -31,89 +31,609 @@ for very future-proof tests which keep testing nodes as the chain grows.
 """
 
 import asyncio
+import functools
+import inspect
+import itertools
+import random
+from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
-from typing import Any, Callable, Coroutine
+from typing import Any
 
 from app import models, rpc
 
-from . import generators
+from . import corpus, generators, strategies
+from .histogram import Histogram
+from .recorder import Recorder, RecorderMix
 
 
 @dataclass
 class BenchmarkTools:
-    input_generator: Callable[[list[str], float], generators.InputGenerator]
+    input_generator: Callable[
+        [list[str], float, random.Random], generators.InputGenerator
+    ]
     runner: Callable[..., Coroutine[Any, Any, Any]]
 
 
 # Mapping from rpc method name to its associated runner and input generator
 MAPPINGS: dict[rpc.RpcCall, BenchmarkTools] = {
+    # Read API
+    rpc.RpcCall.STARKNET_BLOCK_HASH_AND_NUMBER: BenchmarkTools(
+        generators.gen_no_input, rpc.rpc_starknet_blockHashAndNumber
+    ),
+    rpc.RpcCall.STARKNET_BLOCK_NUMBER: BenchmarkTools(
+        generators.gen_no_input, rpc.rpc_starknet_blockNumber
+    ),
+    rpc.RpcCall.STARKNET_CALL: BenchmarkTools(
+        generators.gen_starknet_call, rpc.rpc_starknet_call
+    ),
+    rpc.RpcCall.STARKNET_CHAIN_ID: BenchmarkTools(
+        generators.gen_no_input, rpc.rpc_starknet_chainId
+    ),
+    rpc.RpcCall.STARKNET_ESTIMATE_FEE: BenchmarkTools(
+        generators.gen_starknet_estimateFee, rpc.rpc_starknet_estimateFee
+    ),
+    rpc.RpcCall.STARKNET_ESTIMATE_MESSAGE_FEE: BenchmarkTools(
+        generators.gen_starknet_estimateMessageFee,
+        rpc.rpc_starknet_estimateMessageFee,
+    ),
+    rpc.RpcCall.STARKNET_GET_BLOCK_TRANSACTION_COUNT: BenchmarkTools(
+        generators.gen_starknet_getBlockTransactionCount,
+        rpc.rpc_starknet_getBlockTransactionCount,
+    ),
+    rpc.RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS: BenchmarkTools(
+        generators.gen_starknet_getBlockWithReceipts,
+        rpc.rpc_starknet_getBlockWithReceipts,
+    ),
+    rpc.RpcCall.STARKNET_GET_BLOCK_WITH_TX_HASHES: BenchmarkTools(
+        generators.gen_starknet_getBlockWithTxHashes,
+        rpc.rpc_starknet_getBlockWithTxHashes,
+    ),
     rpc.RpcCall.STARKNET_GET_BLOCK_WITH_TXS: BenchmarkTools(
         generators.gen_starknet_getBlockWithTxs,
         rpc.rpc_starknet_getBlockWithTxs,
     ),
+    rpc.RpcCall.STARKNET_GET_CLASS: BenchmarkTools(
+        generators.gen_starknet_getClass, rpc.rpc_starnet_getClass
+    ),
+    rpc.RpcCall.STARKNET_GET_CLASS_AT: BenchmarkTools(
+        generators.gen_starknet_getClassAt, rpc.rpc_starknet_getClassAt
+    ),
+    rpc.RpcCall.STARKNET_GET_CLASS_HASH_AT: BenchmarkTools(
+        generators.gen_starknet_getClassHashAt, rpc.rpc_starknet_getClassHashAt
+    ),
+    rpc.RpcCall.STARKNET_GET_EVENTS: BenchmarkTools(
+        generators.gen_starknet_getEvents, rpc.rcp_starknet_getEvents
+    ),
+    rpc.RpcCall.STARKNET_GET_NONCE: BenchmarkTools(
+        generators.gen_starknet_getNonce, rpc.rpc_starknet_getNonce
+    ),
+    rpc.RpcCall.STARKNET_GET_STATE_UPDATE: BenchmarkTools(
+        generators.gen_starknet_getStateUpdate, rpc.rpc_starknet_getStateUpdate
+    ),
     rpc.RpcCall.STARKNET_GET_STORAGE_AT: BenchmarkTools(
         generators.gen_starknet_getStorageAt, rpc.rpc_starknet_getStorageAt
     ),
-    rpc.RpcCall.STARKNET_ESTIMATE_FEE: BenchmarkTools(
-        generators.gen_starknet_estimateFee, rpc.rpc_starknet_estimateFee
+    rpc.RpcCall.STARKNET_GET_TRANSACTION_BY_BLOCK_ID_AND_INDEX: BenchmarkTools(
+        generators.gen_starknet_getTransactionByBlockIdAndIndex,
+        rpc.rpc_starknet_getTransactionByBlockIdAndIndex,
+    ),
+    rpc.RpcCall.STARKNET_GET_TRANSACTION_BY_HASH: BenchmarkTools(
+        generators.gen_starknet_getTransactionByHash,
+        rpc.rpc_starknet_getTransactionByHash,
+    ),
+    rpc.RpcCall.STARKNET_GET_TRANSACTION_RECEIPT: BenchmarkTools(
+        generators.gen_starknet_getTransactionReceipt,
+        rpc.rpc_starknet_getTransactionReceipt,
+    ),
+    rpc.RpcCall.STARKNET_GET_TRANSACTION_STATUS: BenchmarkTools(
+        generators.gen_starknet_getTransactionStatus,
+        rpc.rpc_starknet_getTransactionStatus,
+    ),
+    rpc.RpcCall.STARKNET_SPEC_VERSION: BenchmarkTools(
+        generators.gen_no_input, rpc.rpc_starknet_specVersion
+    ),
+    rpc.RpcCall.STARKNET_SYNCING: BenchmarkTools(
+        generators.gen_no_input, rpc.rpc_starknet_syncing
+    ),
+    # Trace API
+    rpc.RpcCall.STARKNET_SIMULATE_TRANSACTIONS: BenchmarkTools(
+        generators.gen_starknet_simulateTransactions,
+        rpc.rpc_starknet_simulateTransactions,
     ),
     rpc.RpcCall.STARKNET_TRACE_BLOCK_TRANSACTIONS: BenchmarkTools(
         generators.gen_starknet_traceBlockTransactions,
         rpc.rpc_starknet_traceBlockTransactions,
     ),
-    rpc.RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS: BenchmarkTools(
-        generators.gen_starknet_getBlockWithReceipts,
-        rpc.rpc_starknet_getBlockWithReceipts,
+    rpc.RpcCall.STARKNET_TRACE_TRANSACTION: BenchmarkTools(
+        generators.gen_starknet_traceTransaction,
+        rpc.rpc_starknet_traceTransaction,
     ),
 }
 
 
 TO_MILLIS: float = 0.001
 
+# Minimum relative throughput gain for a doubling of concurrency to be
+# considered worthwhile during a sweep. Below this, the node is saturated.
+SWEEP_KNEE_GAIN: float = 0.1
+
+
+async def generate(
+    urls: list[str],
+    rpc_call: rpc.RpcCall,
+    samples: int,
+    sleep: float,
+    seed: int | None = None,
+) -> list[dict[str, Any]]:
+    """Generates benchmark inputs
+
+    Args:
+        urls: list of node urls which inputs must be valid for
+        rpc_call: rpc call to generate inputs for
+        samples: number of inputs to generate
+        sleep: wait interval between inputs, in seconds
+        seed: seed used for random input generation
+
+    Returns:
+        Generated inputs, as keyword arguments to the rpc call runner
+    """
+    rng = random.Random(seed)
+    generator = MAPPINGS[rpc_call].input_generator(urls, sleep, rng)
+
+    # python loops are slow so we use list comprehension instead
+    return [await anext(generator) for _ in range(samples)]
+
+
+async def corpus_generate(
+    urls: list[str], rpc_call: rpc.RpcCall, samples: int, seed: int
+) -> models.ResponseModelCorpus:
+    """Generates benchmark inputs and saves them to disk for later replay
+
+    Args:
+        urls: list of node urls which inputs must be valid for
+        rpc_call: rpc call to generate inputs for
+        samples: number of inputs to generate
+        seed: seed used for random input generation
+
+    Returns:
+        The header of the newly created corpus
+    """
+    inputs = await generate(urls, rpc_call, samples, 0, seed)
+    return await asyncio.to_thread(corpus.corpus_save, rpc_call, seed, inputs)
+
+
+async def corpus_replay(
+    corpus_id: str, rpc_call: rpc.RpcCall
+) -> list[dict[str, Any]]:
+    """Loads benchmark inputs from a corpus saved to disk
+
+    Args:
+        corpus_id: id of the corpus to load
+        rpc_call: rpc call the inputs will be used to benchmark
+
+    Returns:
+        Corpus inputs, as keyword arguments to the rpc call runner
+    """
+    header = await asyncio.to_thread(corpus.corpus_header, corpus_id)
+    corpus.corpus_check(header, rpc_call)
+
+    runner = MAPPINGS[rpc_call].runner
+    _, inputs = await asyncio.to_thread(corpus.corpus_load, corpus_id, runner)
+
+    return inputs
+
+
+async def run(
+    url: str,
+    rpc_call: rpc.RpcCall,
+    inputs: list[dict[str, Any]],
+    mode: models.BenchmarkMode,
+    rate: float,
+    concurrency: int,
+    barrier: asyncio.Barrier | None = None,
+    sink: strategies.Record | None = None,
+) -> Recorder:
+    """Benchmarks a single node
+
+    Args:
+        url: node url
+        rpc_call: rpc call to benchmark
+        inputs: inputs to send to the node, one per sample
+        mode: strategy used to send samples to the node
+        rate: samples sent per second, in open loop mode
+        concurrency: maximum samples in flight, in closed loop mode
+        barrier: if set, waited on right before sending the first sample. This
+            is used to synchronize the start of benchmarks over several nodes
+        sink: if set, called with every sample as it is recorded
+
+    Returns:
+        Recorded benchmark results
+    """
+    runner = MAPPINGS[rpc_call].runner
+    jobs = [functools.partial(runner, url, **input) for input in inputs]
+    recorder = Recorder(sink)
+
+    await run_jobs(jobs, recorder, mode, rate, concurrency, barrier)
+    return recorder
+
+
+async def run_jobs(
+    jobs: list[strategies.Job],
+    recorder: Recorder | RecorderMix,
+    mode: models.BenchmarkMode,
+    rate: float,
+    concurrency: int,
+    barrier: asyncio.Barrier | None = None,
+):
+    """Sends prepared samples to a node, using the given strategy
+
+    Args:
+        jobs: samples to send, already bound to their node and inputs
+        recorder: where to record the results of each sample
+        mode: strategy used to send samples to the node
+        rate: samples sent per second, in open loop mode
+        concurrency: maximum samples in flight, in closed loop mode
+        barrier: if set, waited on right before sending the first sample
+    """
+    if barrier is not None:
+        await barrier.wait()
+
+    recorder.start()
+    match mode:
+        case models.BenchmarkMode.BURST:
+            await strategies.run_burst(jobs, recorder.record)
+        case models.BenchmarkMode.OPEN_LOOP:
+            await strategies.run_open_loop(jobs, recorder.record, rate)
+        case models.BenchmarkMode.CLOSED_LOOP:
+            await strategies.run_closed_loop(jobs, recorder.record, concurrency)
+    recorder.stop()
+
 
 async def benchmark(
     urls: list[str],
     rpc_call: rpc.RpcCall,
     samples: int,
     interval: int,
+    full: bool = False,
+    mode: models.BenchmarkMode = models.BenchmarkMode.BURST,
+    rate: float = 10,
+    concurrency: int = 1,
+    corpus_id: str | None = None,
+    sinks: list[strategies.Record] | None = None,
 ) -> models.ResponseModelBench:
     """Runs the actual rpc benchmark
 
+    All nodes are benchmarked at the same time, starting from a common barrier,
+    so that they are measured against the same chain head and under the same
+    conditions. Each node still has its own pacing and statistics.
+
     Args:
         urls: list of node urls to query
         rpc_call: rpc call to benchmark
         samples: number of test samples
-        interval: wait interval between test
+        interval: wait interval between test, ignored in open loop mode
+        full: whether to include latency histograms in the results
+        mode: strategy used to send samples to the node
+        rate: samples sent per second, in open loop mode
+        concurrency: maximum samples in flight, in closed loop mode
+        corpus_id: if set, inputs are replayed from this corpus instead of
+            being generated, and `samples` and `interval` are ignored
+        sinks: if set, called with every sample sent to the node at the same
+            position in `urls`
 
     Returns:
         List of benchmarking results
     """
-    tool = MAPPINGS[rpc_call]
+    if corpus_id is not None:
+        inputs = await corpus_replay(corpus_id, rpc_call)
+    else:
+        # In open loop mode samples are paced by the strategy instead
+        sleep = interval * TO_MILLIS
+        if mode == models.BenchmarkMode.OPEN_LOOP:
+            sleep = 0
+        inputs = await generate(urls, rpc_call, samples, sleep)
 
-    sleep = interval * TO_MILLIS
-    generator = tool.input_generator(urls, sleep)
+    if sinks is None:
+        sinks = [None] * len(urls)
+
+    barrier = asyncio.Barrier(len(urls))
+    recorders = await asyncio.gather(
+        *[
+            run(url, rpc_call, inputs, mode, rate, concurrency, barrier, sink)
+            for url, sink in zip(urls, sinks)
+        ]
+    )
+    nodes = [recorder.summary(rpc_call, full) for recorder in recorders]
+
+    return models.ResponseModelBench(nodes=nodes, inputs=inputs)
 
-    # python loops are slow so we use list comprehension instead
-    inputs = [await anext(generator) for _ in range(samples)]
 
-    futures_layered = [
-        [tool.runner(url, **input) for input in inputs] for url in urls
+async def mix(
+    urls: list[str],
+    weights: dict[rpc.RpcCall, float],
+    samples: int,
+    full: bool = False,
+    mode: models.BenchmarkMode = models.BenchmarkMode.BURST,
+    rate: float = 10,
+    concurrency: int = 1,
+    seed: int | None = None,
+    sinks: list[strategies.Record] | None = None,
+) -> models.ResponseModelMix:
+    """Benchmarks nodes under a weighted mix of rpc calls
+
+    The rpc call of each sample is drawn at random according to `weights`, and
+    samples of all rpc calls are interleaved in the order they were drawn. This
+    mirrors production traffic, where different calls contend for the same
+    node resources, and exposes interference which single method benchmarks
+    hide.
+
+    Args:
+        urls: list of node urls to query
+        weights: relative weight of each rpc call in the mix
+        samples: total number of test samples, over all rpc calls
+        full: whether to include latency histograms in the results
+        mode: strategy used to send samples to the node
+        rate: samples sent per second, in open loop mode
+        concurrency: maximum samples in flight, in closed loop mode
+        seed: seed used to draw rpc calls and generate inputs
+        sinks: if set, called with every sample sent to the node at the same
+            position in `urls`
+
+    Returns:
+        Benchmarking results for each node, per rpc call and overall
+    """
+    rng = random.Random(seed)
+    rpc_calls = list(weights.keys())
+    draws = rng.choices(rpc_calls, list(weights.values()), k=samples)
+
+    # Inputs are generated per rpc call, then consumed in draw order
+    inputs_by_call = {
+        rpc_call: iter(
+            await generate(
+                urls, rpc_call, draws.count(rpc_call), 0, rng.randrange(2**32)
+            )
+        )
+        for rpc_call in rpc_calls
+    }
+    inputs = [(draw, next(inputs_by_call[draw])) for draw in draws]
+
+    async def run_mix(
+        url: str, barrier: asyncio.Barrier, sink: strategies.Record | None
+    ) -> RecorderMix:
+        jobs = [
+            functools.partial(MAPPINGS[rpc_call].runner, url, **input)
+            for rpc_call, input in inputs
+        ]
+        recorder = RecorderMix(sink)
+
+        await run_jobs(jobs, recorder, mode, rate, concurrency, barrier)
+        return recorder
+
+    if sinks is None:
+        sinks = [None] * len(urls)
+
+    barrier = asyncio.Barrier(len(urls))
+    recorders = await asyncio.gather(
+        *[run_mix(url, barrier, sink) for url, sink in zip(urls, sinks)]
+    )
+
+    return models.ResponseModelMix(
+        nodes=[recorder.summary(full) for recorder in recorders],
+        inputs=[
+            {"method": rpc_call, "params": input} for rpc_call, input in inputs
+        ],
+    )
+
+
+async def sweep(
+    urls: list[str],
+    rpc_call: rpc.RpcCall,
+    samples: int,
+    concurrency_max: int,
+    full: bool = False,
+) -> models.ResponseModelSweep:
+    """Benchmarks nodes at increasing levels of concurrency
+
+    Concurrency starts at 1 and is doubled at each step until `concurrency_max`
+    is reached. The same inputs are used at every step and all nodes are
+    benchmarked at the same time within a step.
+
+    Args:
+        urls: list of node urls to query
+        rpc_call: rpc call to benchmark
+        samples: number of test samples at each step
+        concurrency_max: highest concurrency level to test
+        full: whether to include latency histograms in the results
+
+    Returns:
+        Throughput and latency of each node at every concurrency level
+    """
+    inputs = await generate(urls, rpc_call, samples, 0)
+
+    levels = [1]
+    while levels[-1] * 2 <= concurrency_max:
+        levels.append(levels[-1] * 2)
+
+    steps: list[list[models.SweepStep]] = [[] for _ in urls]
+    for concurrency in levels:
+        barrier = asyncio.Barrier(len(urls))
+        recorders = await asyncio.gather(
+            *[
+                run(
+                    url,
+                    rpc_call,
+                    inputs,
+                    models.BenchmarkMode.CLOSED_LOOP,
+                    0,
+                    concurrency,
+                    barrier,
+                )
+                for url in urls
+            ]
+        )
+
+        for node_steps, recorder in zip(steps, recorders):
+            step = models.SweepStep(
+                concurrency=concurrency,
+                results=recorder.summary(rpc_call, full),
+            )
+            node_steps.append(step)
+
+    nodes = [
+        models.NodeResponseSweep(
+            node=node_steps[0].results.node,
+            method=rpc_call,
+            knee=sweep_knee(node_steps),
+            steps=node_steps,
+        )
+        for node_steps in steps
     ]
-    results = [await asyncio.gather(*futures) for futures in futures_layered]
 
-    node = [resp[0].node for resp in results]
-    when = [min([resp.when for resp in resps]) for resps in results]
-    elapsed = [[resp.elapsed for resp in resps] for resps in results]
-    elapsed_avg = [sum(all) // len(all) for all in elapsed]
+    return models.ResponseModelSweep(nodes=nodes, inputs=inputs)
+
+
+def sweep_knee(steps: list[models.SweepStep]) -> int | None:
+    """Finds the concurrency level at which a node saturates
+
+    Args:
+        steps: sweep results, in order of increasing concurrency
+
+    Returns:
+        The first concurrency level past which throughput stops increasing
+        significantly, or None if the node never saturated
+    """
+    return throughput_knee(
+        [(step.concurrency, step.results.throughput) for step in steps]
+    )
+
+
+def throughput_knee(levels: list[tuple[int, float]]) -> int | None:
+    """Finds the level past which throughput stops increasing significantly
+
+    Args:
+        levels: level and measured throughput, in order of increasing level
+
+    Returns:
+        The first level for which the next one brings less than
+        `SWEEP_KNEE_GAIN` relative throughput gain, or None if there is none
+    """
+    for (level, prev), (_, curr) in itertools.pairwise(levels):
+        if curr - prev < prev * SWEEP_KNEE_GAIN:
+            return level
+
+    return None
+
+
+async def batch(
+    urls: list[str],
+    rpc_call: rpc.RpcCall,
+    samples: int,
+    batch_max: int,
+    concurrency: int = 1,
+    full: bool = False,
+) -> models.ResponseModelBatch:
+    """Benchmarks nodes with JSON RPC batch requests of increasing size
+
+    Batch size starts at 1 and is doubled at each step until `batch_max` is
+    reached. The same calls are sent at every step, only packed differently,
+    so that the cost of a call can be compared between batch sizes.
+
+    Args:
+        urls: list of node urls to query
+        rpc_call: rpc call to benchmark
+        samples: number of individual calls sent at each step
+        batch_max: largest batch size to test
+        concurrency: maximum batch requests in flight
+        full: whether to include latency histograms in the results
+
+    Returns:
+        Per request and amortized per call results of each node at every
+        batch size
+    """
+    runner = MAPPINGS[rpc_call].runner
+    signature = inspect.signature(runner)
+
+    generator = MAPPINGS[rpc_call].input_generator(urls, 0, random.Random())
+
+    # Inputs are converted as they are generated so that unsupported rpc
+    # calls are rejected before generating any further inputs
+    inputs = []
+    for _ in range(samples):
+        bound = signature.bind_partial(**await anext(generator))
+        bound.apply_defaults()
+        inputs.append(rpc.json_rpc_params(rpc_call, bound.arguments))
+
+    sizes = [1]
+    while sizes[-1] * 2 <= min(batch_max, samples):
+        sizes.append(sizes[-1] * 2)
+
+    steps: list[list[models.BatchStep]] = [[] for _ in urls]
+    for size in sizes:
+        calls = [(rpc_call, params) for params in inputs]
+        batches = [calls[i : i + size] for i in range(0, len(calls), size)]
+
+        barrier = asyncio.Barrier(len(urls))
+        results = await asyncio.gather(
+            *[run_batches(url, batches, concurrency, barrier) for url in urls]
+        )
+
+        for node_steps, (recorder, amortized) in zip(steps, results):
+            step = models.BatchStep(
+                size=size,
+                throughput=recorder.throughput() * samples / len(batches),
+                elapsed_amortized_avg=amortized.mean(),
+                elapsed_amortized_p50=amortized.percentile(50),
+                elapsed_amortized_p99=amortized.percentile(99),
+                results=recorder.summary(rpc.rpc_batch_method(rpc_call), full),
+            )
+            node_steps.append(step)
 
     nodes = [
-        models.NodeResponseBench(
-            node=node,
+        models.NodeResponseBatch(
+            node=node_steps[0].results.node,
             method=rpc_call,
-            when=when,
-            elapsed_avg=elapsed_avg,
+            best=throughput_knee(
+                [(step.size, step.throughput) for step in node_steps]
+            ),
+            steps=node_steps,
         )
-        for (node, when, elapsed_avg) in zip(node, when, elapsed_avg)
+        for node_steps in steps
     ]
 
-    return models.ResponseModelBench(nodes=nodes, inputs=inputs)
+    return models.ResponseModelBatch(nodes=nodes, inputs=inputs)
+
+
+async def run_batches(
+    url: str,
+    batches: list[list[tuple[rpc.RpcCall, dict[str, Any]]]],
+    concurrency: int,
+    barrier: asyncio.Barrier,
+) -> tuple[Recorder, Histogram]:
+    """Sends batch requests to a single node, at most `concurrency` at once
+
+    Returns:
+        Recorded results per batch request, and the latency of each batch
+        amortized over the calls it holds. The last batch can hold fewer calls
+        than the others
+    """
+    amortized = Histogram()
+
+    def job(batch: list[tuple[rpc.RpcCall, dict[str, Any]]]) -> strategies.Job:
+        async def run() -> models.ResponseModelJSON:
+            response = await rpc.json_rpc_batch(url, batch)
+            amortized.record(response.elapsed // len(batch))
+            return response
+
+        return run
+
+    recorder = Recorder()
+
+    await run_jobs(
+        [job(batch) for batch in batches],
+        recorder,
+        models.BenchmarkMode.CLOSED_LOOP,
+        0,
+        concurrency,
+        barrier,
+    )
+    return recorder, amortized
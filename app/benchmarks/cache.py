@@ -0,0 +1,217 @@
+"""
+# Generator cache
+
+Input generators repeatedly fetch the same historical blocks, state updates
+and classes from the node. Since this data is immutable once a block has been
+accepted, it is cached here so that generating inputs does not keep loading
+the very node being benchmarked.
+
+The cache is bounded by the _estimated memory size_ of its entries rather than
+by their number, as a single class can weigh several megabytes while a state
+update may only take a few kilobytes. Least recently used entries are evicted
+first. Concurrent requests for the same missing entry are coalesced into a
+single rpc call.
+
+Only data referenced by block number or class hash should be cached here:
+anything referenced by tag (`latest`, `pending`) is mutable. Entries are keyed
+by node url first, as nodes do not necessarily serve the same chain.
+"""
+
+import asyncio
+import dataclasses
+import enum
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from starknet_py.net.client_models import (
+    BlockStateUpdate,
+    DeprecatedContractClass,
+    SierraContractClass,
+    StarknetBlock,
+    StarknetBlockWithReceipts,
+)
+from starknet_py.net.full_node_client import FullNodeClient
+
+from app import models
+
+# Maximum estimated memory size of the cache, in bytes (256 MiB by default)
+CACHE_SIZE: int = int(os.environ.get("BENCH_CACHE_SIZE", "268435456"))
+
+T = TypeVar("T")
+
+
+class LruCache:
+    """Async least recently used cache, bounded by memory size
+
+    Args:
+        capacity: maximum estimated size of all entries, in bytes
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._pending: dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Retrieves an entry, fetching it on a cache miss
+
+        Args:
+            key: cache key
+            fetch: called to retrieve the entry if it is not cached
+
+        Returns:
+            The cached or freshly fetched entry
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The fetch was cancelled along with the caller which started
+                # it, not this one, which fetches the entry itself instead
+                task = asyncio.current_task()
+                if pending.cancelled() and task and not task.cancelling():
+                    return await self.get(key, fetch)
+                raise
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Avoids 'exception never retrieved' warnings if no one waited
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._insert(key, value)
+            return value
+        finally:
+            del self._pending[key]
+
+    def _insert(self, key: Hashable, value: Any):
+        size = sizeof(value)
+        if size > self.capacity:
+            return
+
+        self._entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.capacity:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> models.ResponseModelCache:
+        return models.ResponseModelCache(
+            capacity=self.capacity,
+            size=self.size,
+            entries=len(self._entries),
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
+def sizeof(obj: Any) -> int:
+    """Estimates the memory footprint of an object and everything it holds
+
+    Shared references are only counted once.
+    """
+    seen: set[int] = set()
+    stack = [obj]
+    size = 0
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, (str, bytes, int, float, bool, enum.Enum)):
+            continue
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif dataclasses.is_dataclass(obj):
+            fields = dataclasses.fields(obj)
+            stack.extend(getattr(obj, field.name) for field in fields)
+
+    return size
+
+
+CACHE = LruCache(CACHE_SIZE)
+
+
+async def get_block(client: FullNodeClient, block_number: int) -> StarknetBlock:
+    async def fetch():
+        return await client.get_block(block_number=block_number)
+
+    return await CACHE.get((client.url, "block", block_number), fetch)
+
+
+async def get_block_with_receipts(
+    client: FullNodeClient, block_number: int
+) -> StarknetBlockWithReceipts:
+    async def fetch():
+        return await client.get_block_with_receipts(block_number=block_number)
+
+    return await CACHE.get(
+        (client.url, "block_with_receipts", block_number), fetch
+    )
+
+
+async def get_state_update(
+    client: FullNodeClient, block_number: int
+) -> BlockStateUpdate:
+    async def fetch():
+        return await client.get_state_update(block_number=block_number)
+
+    return await CACHE.get((client.url, "state_update", block_number), fetch)
+
+
+async def get_class(
+    client: FullNodeClient, class_hash: int
+) -> SierraContractClass | DeprecatedContractClass:
+    async def fetch():
+        return await client.get_class_by_hash(class_hash)
+
+    return await CACHE.get((client.url, "class", class_hash), fetch)
+
+
+async def get_class_hash_at(
+    client: FullNodeClient, contract_address: int, block_number: int
+) -> int:
+    async def fetch():
+        return await client.get_class_hash_at(
+            contract_address, block_number=block_number
+        )
+
+    key = (client.url, "class_hash_at", contract_address, block_number)
+    return await CACHE.get(key, fetch)
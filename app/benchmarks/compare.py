@@ -0,0 +1,253 @@
+"""
+# Run comparison
+
+Latency distributions are skewed and heavy tailed, so comparing averages
+between two runs says little about whether a node actually got slower. Runs
+are instead compared node by node and method by method, on their raw samples:
+
+- a Mann-Whitney U test checks whether latencies in one run tend to be higher
+  than in the other, without assuming any particular distribution
+- bootstrap confidence intervals are computed on the median and p99 deltas,
+  by resampling both runs with replacement
+
+A method regresses on a node if its latency is significantly higher in the new
+run and the increase is larger than `COMPARE_MIN_EFFECT`, so that
+statistically significant but negligible changes do not fail a comparison.
+Improvements are detected the same way.
+"""
+
+import math
+import os
+import random
+
+from app import models
+
+# Confidence level of the significance test and confidence intervals
+COMPARE_CONFIDENCE: float = 0.95
+# Smallest relative latency change which is considered a regression
+COMPARE_MIN_EFFECT: float = float(
+    os.environ.get("BENCH_COMPARE_MIN_EFFECT", "0.05")
+)
+# Number of bootstrap resamples used for confidence intervals
+COMPARE_RESAMPLES: int = int(os.environ.get("BENCH_COMPARE_RESAMPLES", "1000"))
+# Runs are subsampled to at most this many samples before bootstrapping, which
+# is otherwise quadratic in practice
+COMPARE_BOOTSTRAP_MAX: int = 2000
+
+
+def compare(
+    base_id: str,
+    base: dict[tuple[str, str], list[int]],
+    new_id: str,
+    new: dict[tuple[str, str], list[int]],
+    seed: int = 0,
+) -> models.ResponseModelComparison:
+    """Compares the samples of two runs, for every node and method they have
+    in common
+
+    Args:
+        base_id: id of the base run
+        base: latencies of the base run, by node and method
+        new_id: id of the new run
+        new: latencies of the new run, by node and method
+        seed: seed used for bootstrap resampling
+
+    Returns:
+        A verdict for each node and method, and overall
+    """
+    rng = random.Random(seed)
+    methods = [
+        compare_method(node, method, base[node, method], new[node, method], rng)
+        for node, method in sorted(base.keys() & new.keys())
+    ]
+
+    verdicts = {method.verdict for method in methods}
+    if models.Verdict.REGRESS in verdicts:
+        verdict = models.Verdict.REGRESS
+    elif models.Verdict.IMPROVE in verdicts:
+        verdict = models.Verdict.IMPROVE
+    else:
+        verdict = models.Verdict.PASS
+
+    return models.ResponseModelComparison(
+        base=base_id,
+        new=new_id,
+        confidence=COMPARE_CONFIDENCE,
+        verdict=verdict,
+        methods=methods,
+    )
+
+
+def compare_method(
+    node: str,
+    method: str,
+    base: list[int],
+    new: list[int],
+    rng: random.Random,
+) -> models.MethodComparison:
+    """Compares the samples of a single method on a single node between two
+    runs
+
+    Args:
+        node: node the samples were sent to
+        method: method being compared
+        base: latencies of the base run
+        new: latencies of the new run
+        rng: random number generator used for bootstrap resampling
+    """
+    base = sorted(base)
+    new = sorted(new)
+
+    p_value = mann_whitney_u(base, new)
+    median_ci, p99_ci = bootstrap(base, new, rng)
+
+    median_base, median_new = quantile(base, 0.5), quantile(new, 0.5)
+    p99_base, p99_new = quantile(base, 0.99), quantile(new, 0.99)
+
+    alpha = 1.0 - COMPARE_CONFIDENCE
+    significant = p_value < alpha
+
+    def effect(ci: models.ConfidenceInterval, reference: int) -> int:
+        """Sign of the change, if it is significant and large enough"""
+        threshold = reference * COMPARE_MIN_EFFECT
+        if ci.low > 0 and ci.low >= threshold:
+            return 1
+        if ci.high < 0 and -ci.high >= threshold:
+            return -1
+        return 0
+
+    # Tail latency can shift without the bulk of the distribution moving, in
+    # which case the rank test is not significant
+    effects = [effect(p99_ci, p99_base)]
+    if significant:
+        effects.append(effect(median_ci, median_base))
+
+    if 1 in effects:
+        verdict = models.Verdict.REGRESS
+    elif -1 in effects:
+        verdict = models.Verdict.IMPROVE
+    else:
+        verdict = models.Verdict.PASS
+
+    return models.MethodComparison(
+        node=node,
+        method=method,
+        samples_base=len(base),
+        samples_new=len(new),
+        p_value=p_value,
+        median_base=median_base,
+        median_new=median_new,
+        median_delta=median_new - median_base,
+        median_ci=median_ci,
+        p99_base=p99_base,
+        p99_new=p99_new,
+        p99_delta=p99_new - p99_base,
+        p99_ci=p99_ci,
+        verdict=verdict,
+    )
+
+
+def mann_whitney_u(a: list[int], b: list[int]) -> float:
+    """Two-sided Mann-Whitney U test
+
+    Uses the normal approximation with tie and continuity correction, which is
+    accurate for the sample sizes used in benchmarks (more than 20 samples).
+
+    Args:
+        a: first set of samples
+        b: second set of samples
+
+    Returns:
+        The p-value of the test
+    """
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    if n1 == 0 or n2 == 0:
+        return 1.0
+
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+
+    # Ranks start at 1, tied values share the average of their ranks
+    rank_sum_a = 0.0
+    ties = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j < n and combined[j][0] == combined[i][0]:
+            j += 1
+
+        rank = (i + 1 + j) / 2.0
+        rank_sum_a += rank * sum(1 for _, group in combined[i:j] if group == 0)
+
+        count = j - i
+        ties += count**3 - count
+        i = j
+
+    u = rank_sum_a - n1 * (n1 + 1) / 2.0
+    mu = n1 * n2 / 2.0
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+
+    z = (abs(u - mu) - 0.5) / sigma
+    return min(math.erfc(max(z, 0.0) / math.sqrt(2.0)), 1.0)
+
+
+def bootstrap(
+    base: list[int], new: list[int], rng: random.Random
+) -> tuple[models.ConfidenceInterval, models.ConfidenceInterval]:
+    """Bootstrap confidence intervals on the median and p99 deltas
+
+    Args:
+        base: samples of the base run
+        new: samples of the new run
+        rng: random number generator used for resampling
+
+    Returns:
+        Confidence intervals on the median and p99 deltas, `new - base`
+    """
+    if len(base) > COMPARE_BOOTSTRAP_MAX:
+        base = rng.sample(base, COMPARE_BOOTSTRAP_MAX)
+    if len(new) > COMPARE_BOOTSTRAP_MAX:
+        new = rng.sample(new, COMPARE_BOOTSTRAP_MAX)
+
+    median_deltas: list[float] = []
+    p99_deltas: list[float] = []
+    for _ in range(COMPARE_RESAMPLES):
+        base_resample = sorted(rng.choices(base, k=len(base)))
+        new_resample = sorted(rng.choices(new, k=len(new)))
+
+        median_deltas.append(
+            quantile(new_resample, 0.5) - quantile(base_resample, 0.5)
+        )
+        p99_deltas.append(
+            quantile(new_resample, 0.99) - quantile(base_resample, 0.99)
+        )
+
+    tail = (1.0 - COMPARE_CONFIDENCE) / 2.0
+    median_deltas.sort()
+    p99_deltas.sort()
+
+    return (
+        models.ConfidenceInterval(
+            low=quantile(median_deltas, tail),
+            high=quantile(median_deltas, 1.0 - tail),
+        ),
+        models.ConfidenceInterval(
+            low=quantile(p99_deltas, tail),
+            high=quantile(p99_deltas, 1.0 - tail),
+        ),
+    )
+
+
+def quantile(values: list[int] | list[float], q: float) -> int:
+    """Linearly interpolated quantile of already sorted values"""
+    if not values:
+        return 0
+
+    position = q * (len(values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    fraction = position - lower
+
+    return round(values[lower] + (values[upper] - values[lower]) * fraction)
@@ -0,0 +1,160 @@
+"""
+# Input corpora
+
+Generating inputs from the live chain is slow and non-deterministic: two runs
+will never query the same blocks. A corpus is a set of inputs for a single rpc
+call which is generated once, from a seed, and saved to disk so that it can be
+replayed as many times as needed, against any node build.
+
+## Format
+
+Corpora are stored as gzipped JSON lines in `CORPUS_DIR`. The first line is a
+header describing the corpus, and each subsequent line holds the inputs for a
+single sample. This allows corpora to be listed without reading them in full
+and inputs to be streamed back one at a time.
+
+Inputs are deserialized back into the types expected by the rpc call runner,
+based on its type hints.
+"""
+
+import datetime
+import gzip
+import inspect
+import os
+import pathlib
+import typing
+import uuid
+from typing import Any, Callable
+
+import pydantic
+
+from app import error, models, rpc
+
+CORPUS_DIR: pathlib.Path = pathlib.Path(
+    os.environ.get("BENCH_CORPUS_DIR", "corpora")
+)
+CORPUS_EXT: str = ".jsonl.gz"
+
+_INPUT_ADAPTER = pydantic.TypeAdapter(dict[str, Any])
+
+
+def corpus_path(corpus_id: str) -> pathlib.Path:
+    return CORPUS_DIR / f"{corpus_id}{CORPUS_EXT}"
+
+
+def corpus_save(
+    rpc_call: rpc.RpcCall, seed: int, inputs: list[dict[str, Any]]
+) -> models.ResponseModelCorpus:
+    """Saves generated inputs to disk as a new corpus
+
+    Args:
+        rpc_call: rpc call the inputs were generated for
+        seed: seed used to generate the inputs
+        inputs: inputs to save
+
+    Returns:
+        The header of the newly created corpus
+    """
+    header = models.ResponseModelCorpus(
+        id=uuid.uuid4().hex,
+        method=rpc_call,
+        seed=seed,
+        samples=len(inputs),
+        when=datetime.datetime.now(),
+    )
+
+    CORPUS_DIR.mkdir(parents=True, exist_ok=True)
+    with gzip.open(corpus_path(header.id), "wb") as file:
+        file.write(header.model_dump_json().encode() + b"\n")
+        for input in inputs:
+            file.write(_INPUT_ADAPTER.dump_json(input) + b"\n")
+
+    return header
+
+
+def corpus_header(corpus_id: str) -> models.ResponseModelCorpus:
+    """Reads the header of a corpus, without loading its inputs
+
+    Raises:
+        ErrorCorpusNotFound: if no such corpus exists
+    """
+    path = corpus_path(corpus_id)
+    if not path.is_file():
+        raise error.ErrorCorpusNotFound(corpus_id)
+
+    with gzip.open(path, "rb") as file:
+        return models.ResponseModelCorpus.model_validate_json(file.readline())
+
+
+def corpus_list() -> list[models.ResponseModelCorpus]:
+    """Lists all corpora saved to disk, most recent first"""
+    if not CORPUS_DIR.is_dir():
+        return []
+
+    headers = [
+        corpus_header(path.name.removesuffix(CORPUS_EXT))
+        for path in CORPUS_DIR.glob(f"*{CORPUS_EXT}")
+    ]
+    return sorted(headers, key=lambda header: header.when, reverse=True)
+
+
+def corpus_load(
+    corpus_id: str, runner: Callable[..., Any]
+) -> tuple[models.ResponseModelCorpus, list[dict[str, Any]]]:
+    """Loads a corpus from disk
+
+    Args:
+        corpus_id: id of the corpus to load
+        runner: rpc call runner the inputs will be passed to, used to
+            deserialize them back into the expected types
+
+    Returns:
+        The corpus header and its inputs
+
+    Raises:
+        ErrorCorpusNotFound: if no such corpus exists
+    """
+    path = corpus_path(corpus_id)
+    if not path.is_file():
+        raise error.ErrorCorpusNotFound(corpus_id)
+
+    model = _input_model(runner)
+
+    with gzip.open(path, "rb") as file:
+        header = models.ResponseModelCorpus.model_validate_json(file.readline())
+        inputs = [_input_from_json(model, line) for line in file]
+
+    return (header, inputs)
+
+
+def _input_model(runner: Callable[..., Any]) -> type[pydantic.BaseModel]:
+    """Builds a pydantic model matching the keyword arguments of a runner.
+
+    Type hints are resolved without their `Annotated` metadata, since query
+    constraints such as hex patterns do not apply to generated inputs.
+    """
+    hints = typing.get_type_hints(runner)
+    params = list(inspect.signature(runner).parameters.values())
+
+    # The first parameter is always the node url
+    fields: dict[str, Any] = {
+        param.name: (
+            hints[param.name],
+            ... if param.default is inspect.Parameter.empty else param.default,
+        )
+        for param in params[1:]
+    }
+
+    return pydantic.create_model(f"Input_{runner.__name__}", **fields)
+
+
+def _input_from_json(
+    model: type[pydantic.BaseModel], line: bytes
+) -> dict[str, Any]:
+    input = model.model_validate_json(line)
+    return {field: getattr(input, field) for field in input.model_fields_set}
+
+
+def corpus_check(header: models.ResponseModelCorpus, rpc_call: rpc.RpcCall):
+    if header.method != rpc_call:
+        raise error.ErrorCorpusMismatch(header.id, header.method, rpc_call)
@@ -1,8 +1,10 @@
 import asyncio
 import random
-from typing import Any, AsyncGenerator, cast
+from typing import Any, AsyncGenerator, Awaitable, Callable, TypeVar, cast
 
+from starknet_py.hash.selector import get_selector_from_name
 from starknet_py.net.client_models import (
+    Call,
     DeclareTransactionV1,
     DeclareTransactionV2,
     DeclareTransactionV3,
@@ -11,10 +13,13 @@ from starknet_py.net.client_models import (
     DeprecatedContractClass,
     InvokeTransactionV1,
     InvokeTransactionV3,
+    L1HandlerTransaction,
     SierraContractClass,
+    Transaction,
 )
 from starknet_py.net.full_node_client import FullNodeClient
 from starknet_py.net.models.transaction import (
+    AccountTransaction,
     DeclareV1,
     DeclareV2,
     DeclareV3,
@@ -24,30 +29,434 @@ from starknet_py.net.models.transaction import (
     InvokeV3,
 )
 
-from app import rpc
+from app import error, head, models, rpc
+
+from . import cache
 
 InputGenerator = AsyncGenerator[dict[str, Any], Any]
 
+T = TypeVar("T")
 
-async def latest_common_block_number(urls: list[str]) -> int:
-    block_numbers: list[int] = [
-        (await rpc.rpc_starknet_blockNumber(url)).output for url in urls
-    ]
+# Number of most recent blocks inputs are sampled from
+BLOCK_RANGE: int = 100
+# Maximum number of blocks to walk back through when looking for a block
+# with suitable inputs
+BLOCK_SEARCH_DEPTH: int = 1000
 
-    return min(block_numbers)
+# ETH fee token, deployed at the same address on mainnet and sepolia
+FEE_TOKEN_ADDRESS: int = (
+    0x049D36570D4E46F48E99674BD3FCC84644DDD6B96F7C741B1562B82F9E004DC7
+)
+SELECTOR_BALANCE_OF: int = get_selector_from_name("balanceOf")
 
+# Events returned per page by `starknet_getEvents`, large enough that a single
+# block's worth of filtered events fits in a single page
+EVENTS_CHUNK_SIZE: int = 100
 
-async def gen_starknet_getBlockWithTxs(
+# Contract used by the sequencer to store block hashes, this is not an actual
+# deployed contract and has no class
+BLOCK_HASH_CONTRACT: int = 0x1
+
+# Transactions which can be converted back into an account transaction, to
+# be estimated or simulated
+ACCOUNT_TRANSACTIONS = (
+    InvokeTransactionV1,
+    InvokeTransactionV3,
+    DeclareTransactionV1,
+    DeclareTransactionV2,
+    DeclareTransactionV3,
+    DeployAccountTransactionV1,
+    DeployAccountTransactionV3,
+)
+
+
+# =========================================================================== #
+#                                   HELPERS                                   #
+# =========================================================================== #
+
+
+async def random_block_number(urls: list[str], rng: random.Random) -> int:
+    """Picks a random block among the last `BLOCK_RANGE` common blocks"""
+    block_number = await head.latest_common_block_number(urls)
+    return rng.randrange(max(block_number - BLOCK_RANGE, 0), block_number)
+
+
+async def search_blocks(
+    urls: list[str],
+    rng: random.Random,
+    candidates: Callable[[int], Awaitable[list[T]]],
+) -> tuple[T, int]:
+    """Picks a random input from a recent block
+
+    Starts from a random recent block and walks back until a block is found
+    which has at least one suitable candidate input.
+
+    Args:
+        urls: list of node urls which inputs must be valid for
+        rng: random number generator
+        candidates: lists the suitable inputs in a given block
+
+    Returns:
+        A random candidate and the number of the block it was found in
+
+    Raises:
+        ErrorInputGeneration: if no candidate could be found
+    """
+    block_start = await random_block_number(urls, rng)
+    block_min = max(block_start - BLOCK_SEARCH_DEPTH, 0)
+
+    block_number = block_start
+    while block_number >= block_min:
+        found = await candidates(block_number)
+        if len(found) > 0:
+            return (rng.choice(found), block_number)
+        block_number -= 1
+
+    raise error.ErrorInputGeneration(
+        f"no suitable input found between blocks {block_min} and {block_start}"
+    )
+
+
+async def random_transaction(
+    client: FullNodeClient,
     urls: list[str],
-    interval: float,
+    rng: random.Random,
+    kinds: tuple[type[Transaction], ...] = (Transaction,),
+) -> tuple[Transaction, int]:
+    """Picks a random transaction of the given kinds from a recent block"""
+
+    async def candidates(block_number: int) -> list[Transaction]:
+        block = await cache.get_block(client, block_number)
+        return [tx for tx in block.transactions if isinstance(tx, kinds)]
+
+    return await search_blocks(urls, rng, candidates)
+
+
+async def random_contract(
+    client: FullNodeClient, urls: list[str], rng: random.Random
+) -> tuple[int, int]:
+    """Picks a random contract whose storage was modified in a recent block"""
+
+    async def candidates(block_number: int) -> list[int]:
+        state_update = await cache.get_state_update(client, block_number)
+        return [
+            storage_diff.address
+            for storage_diff in state_update.state_diff.storage_diffs
+            if storage_diff.address != BLOCK_HASH_CONTRACT
+        ]
+
+    return await search_blocks(urls, rng, candidates)
+
+
+def replay_block_number(block_number: int) -> int:
+    """Block to replay a transaction from `block_number` against
+
+    Transactions must be replayed on top of the state they were executed
+    against, that is the state at the end of the previous block: by the end of
+    their own block, their nonce has already been used.
+    """
+    return max(block_number - 1, 0)
+
+
+async def to_account_transaction(
+    client: FullNodeClient, tx: Transaction
+) -> AccountTransaction:
+    """Converts a transaction retrieved from the node back into an account
+    transaction which can be estimated or simulated
+
+    Args:
+        client: used to retrieve the class of declare transactions
+        tx: one of `ACCOUNT_TRANSACTIONS`
+    """
+    if isinstance(tx, InvokeTransactionV1):
+        return InvokeV1(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            max_fee=tx.max_fee,
+            sender_address=tx.sender_address,
+            calldata=tx.calldata,
+        )
+    elif isinstance(tx, InvokeTransactionV3):
+        return InvokeV3(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            resource_bounds=tx.resource_bounds,
+            calldata=tx.calldata,
+            sender_address=tx.sender_address,
+            account_deployment_data=tx.account_deployment_data,
+        )
+    elif isinstance(tx, DeclareTransactionV1):
+        contract_class = await cache.get_class(client, tx.class_hash)
+        return DeclareV1(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            max_fee=tx.max_fee,
+            contract_class=cast(DeprecatedContractClass, contract_class),
+            sender_address=tx.sender_address,
+        )
+    elif isinstance(tx, DeclareTransactionV2):
+        contract_class = await cache.get_class(client, tx.class_hash)
+        return DeclareV2(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            max_fee=tx.max_fee,
+            contract_class=cast(SierraContractClass, contract_class),
+            compiled_class_hash=tx.compiled_class_hash,
+            sender_address=tx.sender_address,
+        )
+    elif isinstance(tx, DeclareTransactionV3):
+        contract_class = await cache.get_class(client, tx.class_hash)
+        return DeclareV3(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            resource_bounds=tx.resource_bounds,
+            sender_address=tx.sender_address,
+            compiled_class_hash=tx.compiled_class_hash,
+            contract_class=cast(SierraContractClass, contract_class),
+            account_deployment_data=tx.account_deployment_data,
+        )
+    elif isinstance(tx, DeployAccountTransactionV1):
+        return DeployAccountV1(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            max_fee=tx.max_fee,
+            class_hash=tx.class_hash,
+            contract_address_salt=tx.contract_address_salt,
+            constructor_calldata=tx.constructor_calldata,
+        )
+    elif isinstance(tx, DeployAccountTransactionV3):
+        return DeployAccountV3(
+            version=tx.version,
+            signature=tx.signature,
+            nonce=tx.nonce,
+            resource_bounds=tx.resource_bounds,
+            class_hash=tx.class_hash,
+            contract_address_salt=tx.contract_address_salt,
+            constructor_calldata=tx.constructor_calldata,
+        )
+
+    raise TypeError(f"{type(tx).__name__} is not an account transaction")
+
+
+# =========================================================================== #
+#                                   READ API                                  #
+# =========================================================================== #
+
+
+async def gen_no_input(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    """Used by methods which do not take any input"""
+    while True:
+        yield {}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_call(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    """Generates a call to the fee token's `balanceOf`
+
+    The balance queried is that of a random contract whose storage was
+    modified in a recent block.
+    """
+    client = rpc.client_get(urls[0])
+
+    while True:
+        contract_address, block_number = await random_contract(
+            client, urls, rng
+        )
+        call = Call(
+            to_addr=FEE_TOKEN_ADDRESS,
+            selector=SELECTOR_BALANCE_OF,
+            calldata=[contract_address],
+        )
+        yield {"call": call, "block_number": block_number}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_estimateFee(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        tx, block_number = await random_transaction(
+            client, urls, rng, ACCOUNT_TRANSACTIONS
+        )
+        tx = await to_account_transaction(client, tx)
+        yield {"tx": tx, "block_number": replay_block_number(block_number)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_estimateMessageFee(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    """Generates an L1 -> L2 message from a recent L1 handler transaction"""
+    client = rpc.client_get(urls[0])
+
+    while True:
+        tx, block_number = await random_transaction(
+            client, urls, rng, (L1HandlerTransaction,)
+        )
+        tx = cast(L1HandlerTransaction, tx)
+
+        # The first calldata element of an L1 handler is the L1 sender
+        body = models.body._BodyEstimateMessageFee(
+            from_address=hex(tx.calldata[0]),
+            to_address=tx.contract_address,
+            entry_point_selector=tx.entry_point_selector,
+            payload=tx.calldata[1:],
+        )
+        yield {"body": body, "block_number": replay_block_number(block_number)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getBlockTransactionCount(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    while True:
+        yield {"block_number": await random_block_number(urls, rng)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getBlockWithReceipts(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    while True:
+        yield {"block_number": await random_block_number(urls, rng)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getBlockWithTxHashes(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    while True:
+        yield {"block_number": await random_block_number(urls, rng)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getBlockWithTxs(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    while True:
+        yield {"block_number": await head.latest_common_block_number(urls)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getClass(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    """Generates the class hash of a recently modified contract"""
+    client = rpc.client_get(urls[0])
+
+    while True:
+        contract_address, block_number = await random_contract(
+            client, urls, rng
+        )
+        class_hash = await cache.get_class_hash_at(
+            client, contract_address, block_number
+        )
+        yield {"class_hash": class_hash, "block_number": block_number}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getClassAt(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        contract_address, block_number = await random_contract(
+            client, urls, rng
+        )
+        yield {
+            "contract_address": contract_address,
+            "block_number": block_number,
+        }
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getClassHashAt(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        contract_address, block_number = await random_contract(
+            client, urls, rng
+        )
+        yield {
+            "contract_address": contract_address,
+            "block_number": block_number,
+        }
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getEvents(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    """Generates an event filter matching a random event in a recent block
+
+    Events are filtered by emitting contract and first key, over a single
+    block.
+    """
+    client = rpc.client_get(urls[0])
+
+    async def candidates(block_number: int):
+        block = await cache.get_block_with_receipts(client, block_number)
+        return [
+            event
+            for tx in block.transactions
+            for event in tx.receipt.events
+            if len(event.keys) > 0
+        ]
+
+    while True:
+        event, block_number = await search_blocks(urls, rng, candidates)
+        body = models.body._BodyGetEvents(
+            address=event.from_address,
+            keys=[[event.keys[0]]],
+            from_block_number=block_number,
+            to_block_number=block_number,
+            chunk_size=EVENTS_CHUNK_SIZE,
+        )
+        yield {"body": body}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getNonce(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        contract_address, block_number = await random_contract(
+            client, urls, rng
+        )
+        yield {
+            "contract_address": contract_address,
+            "block_number": block_number,
+        }
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getStateUpdate(
+    urls: list[str], interval: float, rng: random.Random
 ) -> InputGenerator:
     while True:
-        yield {"block_number": await latest_common_block_number(urls)}
+        yield {"block_number": await random_block_number(urls, rng)}
         await asyncio.sleep(interval)
 
 
 async def gen_starknet_getStorageAt(
-    urls: list[str], interval: float
+    urls: list[str], interval: float, rng: random.Random
 ) -> InputGenerator:
     """Generates a ramdom contract storage key
 
@@ -55,21 +464,16 @@ async def gen_starknet_getStorageAt(
     possible for a key to be generated that falls before that range in some
     rare cases where the random block to have been chose had no storage diffs
     """
-    client = FullNodeClient(node_url=urls[0])
+    client = rpc.client_get(urls[0])
 
     while True:
-        block_number = await latest_common_block_number(urls)
-        block_number = random.randrange(
-            max(block_number - 100, 0), block_number
-        )
-        state_update = await client.get_state_update(block_number=block_number)
+        block_number = await random_block_number(urls, rng)
+        state_update = await cache.get_state_update(client, block_number)
 
         while len(state_update.state_diff.storage_diffs) < 2:
             # This is safe since block 0 has storage diffs
             block_number -= 1
-            state_update = await client.get_state_update(
-                block_number=block_number
-            )
+            state_update = await cache.get_state_update(client, block_number)
 
         storage_diff = state_update.state_diff.storage_diffs[1]
         storage_entry = storage_diff.storage_entries[0]
@@ -81,121 +485,90 @@ async def gen_starknet_getStorageAt(
         await asyncio.sleep(interval)
 
 
-async def gen_starknet_estimateFee(
-    urls: list[str], interval: float
+async def gen_starknet_getTransactionByBlockIdAndIndex(
+    urls: list[str], interval: float, rng: random.Random
 ) -> InputGenerator:
-    client = FullNodeClient(node_url=urls[0])
+    client = rpc.client_get(urls[0])
+
+    async def candidates(block_number: int) -> list[int]:
+        block = await cache.get_block(client, block_number)
+        return list(range(len(block.transactions)))
 
     while True:
-        block_number = await latest_common_block_number(urls)
-        block_number = random.randrange(
-            max(block_number - 100, 0), block_number
-        )
-        block = await client.get_block(block_number=block_number)
-        transactions = block.transactions
+        index, block_number = await search_blocks(urls, rng, candidates)
+        yield {"index": index, "block_number": block_number}
+        await asyncio.sleep(interval)
 
-        while len(transactions) == 0 or transactions[0].version == 0:
-            # FIX: this could failed if called too early in the sync
-            block_number -= 1
-            block = await client.get_block(block_number=block_number)
-            transactions = block.transactions
-
-        tx = transactions[0]
-        if isinstance(tx, InvokeTransactionV1):
-            tx = InvokeV1(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                max_fee=tx.max_fee,
-                sender_address=tx.sender_address,
-                calldata=tx.calldata,
-            )
-        elif isinstance(tx, InvokeTransactionV3):
-            tx = InvokeV3(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                resource_bounds=tx.resource_bounds,
-                calldata=tx.calldata,
-                sender_address=tx.sender_address,
-                account_deployment_data=tx.account_deployment_data,
-            )
-        elif isinstance(tx, DeclareTransactionV1):
-            contract_class = await client.get_class_by_hash(tx.class_hash)
-            tx = DeclareV1(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                max_fee=tx.max_fee,
-                contract_class=cast(DeprecatedContractClass, contract_class),
-                sender_address=tx.sender_address,
-            )
-        elif isinstance(tx, DeclareTransactionV2):
-            contract_class = await client.get_class_by_hash(tx.class_hash)
-            tx = DeclareV2(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                max_fee=tx.max_fee,
-                contract_class=cast(SierraContractClass, contract_class),
-                compiled_class_hash=tx.compiled_class_hash,
-                sender_address=tx.sender_address,
-            )
-        elif isinstance(tx, DeclareTransactionV3):
-            contract_class = await client.get_class_by_hash(tx.class_hash)
-            tx = DeclareV3(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                resource_bounds=tx.resource_bounds,
-                sender_address=tx.sender_address,
-                compiled_class_hash=tx.compiled_class_hash,
-                contract_class=cast(SierraContractClass, contract_class),
-                account_deployment_data=tx.account_deployment_data,
-            )
-        elif isinstance(tx, DeployAccountTransactionV1):
-            tx = DeployAccountV1(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                max_fee=tx.max_fee,
-                class_hash=tx.class_hash,
-                contract_address_salt=tx.contract_address_salt,
-                constructor_calldata=tx.constructor_calldata,
-            )
-        elif isinstance(tx, DeployAccountTransactionV3):
-            tx = DeployAccountV3(
-                version=tx.version,
-                signature=tx.signature,
-                nonce=tx.nonce,
-                resource_bounds=tx.resource_bounds,
-                class_hash=tx.class_hash,
-                contract_address_salt=tx.contract_address_salt,
-                constructor_calldata=tx.constructor_calldata,
-            )
-        yield {"tx": tx, "block_number": block_number}
+
+async def gen_starknet_getTransactionByHash(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        tx, _ = await random_transaction(client, urls, rng)
+        yield {"tx_hash": tx.hash}
         await asyncio.sleep(interval)
 
 
-async def gen_starknet_traceBlockTransactions(
-    urls: list[str], interval: float
+async def gen_starknet_getTransactionReceipt(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        tx, _ = await random_transaction(client, urls, rng)
+        yield {"tx_hash": tx.hash}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_getTransactionStatus(
+    urls: list[str], interval: float, rng: random.Random
 ) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
     while True:
-        block_number = await latest_common_block_number(urls)
-        block_number = random.randrange(
-            max(block_number - 100, 0), block_number
-        )
-        yield {"block_number": block_number}
+        tx, _ = await random_transaction(client, urls, rng)
+        yield {"tx_hash": tx.hash}
         await asyncio.sleep(interval)
 
 
-async def gen_starknet_getBlockWithReceipts(
-    urls: list[str], interval: float
+# =========================================================================== #
+#                                  TRACE API                                  #
+# =========================================================================== #
+
+
+async def gen_starknet_simulateTransactions(
+    urls: list[str], interval: float, rng: random.Random
 ) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
     while True:
-        block_number = await latest_common_block_number(urls)
-        block_number = random.randrange(
-            max(block_number - 100, 0), block_number
+        tx, block_number = await random_transaction(
+            client, urls, rng, ACCOUNT_TRANSACTIONS
+        )
+        tx = await to_account_transaction(client, tx)
+        body = models.body._BodySimulateTransactions(
+            transactions=[tx], skip_validate=True, skip_fee_charge=True
         )
-        yield {"block_number": block_number}
+        yield {"body": body, "block_number": replay_block_number(block_number)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_traceBlockTransactions(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    while True:
+        yield {"block_number": await random_block_number(urls, rng)}
+        await asyncio.sleep(interval)
+
+
+async def gen_starknet_traceTransaction(
+    urls: list[str], interval: float, rng: random.Random
+) -> InputGenerator:
+    client = rpc.client_get(urls[0])
+
+    while True:
+        tx, _ = await random_transaction(client, urls, rng)
+        yield {"tx_hash": tx.hash}
         await asyncio.sleep(interval)
@@ -0,0 +1,147 @@
+"""
+# Latency histogram
+
+Samples are accumulated into a log-bucketed histogram, in the spirit of
+HdrHistogram: each bucket covers a range of latencies which grows
+geometrically, so that any value can be recovered with a bounded _relative_
+error. This keeps memory usage constant no matter how many samples are taken
+(a few hundred buckets cover everything from a nanosecond to several hours)
+while still allowing for accurate tail percentiles.
+
+Exact count, minimum, maximum, mean and variance are tracked alongside the
+buckets. Histograms sharing the same accuracy can be merged, which allows
+results from several runs or nodes to be combined after the fact.
+"""
+
+import math
+
+from app import models
+
+# Maximum relative error of percentiles computed from the histogram
+HISTOGRAM_ACCURACY: float = 0.01
+
+
+class Histogram:
+    """Constant memory latency accumulator
+
+    Bucket `i` holds samples in the range `(gamma^(i-1), gamma^i]`, where
+    `gamma = (1 + accuracy) / (1 - accuracy)`. Values are in nanoseconds.
+    """
+
+    def __init__(self, accuracy: float = HISTOGRAM_ACCURACY) -> None:
+        self.accuracy = accuracy
+        self.gamma = (1.0 + accuracy) / (1.0 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.min = 0
+        self.max = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def record(self, value: int):
+        """Adds a single sample to the histogram
+
+        Args:
+            value: sample latency, in nanoseconds
+        """
+        value = max(value, 1)
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+        if self.count == 0:
+            self.min = value
+            self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+        # Welford's online algorithm
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def merge(self, other: "Histogram"):
+        """Adds all the samples of another histogram to this one
+
+        Args:
+            other: histogram to merge, must have the same accuracy
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge histograms of different accuracy")
+        if other.count == 0:
+            return
+
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+        if self.count == 0:
+            self.min = other.min
+            self.max = other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+        # Chan et al. parallel variance
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+
+    def mean(self) -> int:
+        return round(self._mean)
+
+    def stddev(self) -> int:
+        if self.count < 2:
+            return 0
+        return round(math.sqrt(self._m2 / (self.count - 1)))
+
+    def percentile(self, percentile: float) -> int:
+        """Estimates a latency percentile
+
+        Args:
+            percentile: percentile to compute, between 0 and 100
+
+        Returns:
+            Estimated latency, in nanoseconds, within `accuracy` of the true
+            value
+        """
+        if self.count == 0:
+            return 0
+
+        # Nearest rank, 1-based: the smallest sample which at least
+        # `percentile`% of samples are lower than or equal to. Tails are never
+        # underestimated, even with few samples
+        rank = math.ceil(percentile / 100.0 * self.count)
+        rank = min(max(rank, 1), self.count)
+        if rank == 1:
+            return self.min
+        if rank == self.count:
+            return self.max
+
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                value = 2.0 * self.gamma**index / (self.gamma + 1.0)
+                return min(max(round(value), self.min), self.max)
+
+        return self.max
+
+    def to_model(self) -> models.Histogram:
+        return models.Histogram(
+            gamma=self.gamma,
+            buckets=dict(sorted(self.buckets.items())),
+        )
+
+    def to_summary(self) -> models.LatencySummary:
+        return models.LatencySummary(
+            samples=self.count,
+            elapsed_avg=self.mean(),
+            elapsed_p50=self.percentile(50),
+            elapsed_p90=self.percentile(90),
+            elapsed_p99=self.percentile(99),
+            elapsed_max=self.max,
+        )
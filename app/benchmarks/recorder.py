@@ -0,0 +1,167 @@
+import datetime
+import time
+
+from app import models
+
+from .histogram import Histogram
+from .strategies import Record
+
+# Method name used to report results aggregated over a mixed workload
+METHOD_MIX: str = "mix"
+
+
+class Recorder:
+    """Accumulates the results of the benchmark samples sent to a single node
+
+    The node response itself is never kept so that memory usage does not grow
+    with the number of samples.
+
+    Args:
+        sink: if set, called with every sample as it is recorded, for example
+            to persist individual samples
+    """
+
+    def __init__(self, sink: Record | None = None) -> None:
+        self.sink = sink
+        self.histogram = Histogram()
+        self.node: models.NodeName | None = None
+        self.when: datetime.datetime | None = None
+        self._start = 0
+        self._stop = 0
+        # Sums of phase durations over all samples which reported them
+        self._phases = [0, 0, 0, 0]
+        self._phases_count = 0
+
+    def start(self, at: int | None = None):
+        """Marks the start of the benchmark, used to compute throughput"""
+        self._start = time.perf_counter_ns() if at is None else at
+
+    def stop(self, at: int | None = None):
+        """Marks the end of the benchmark, used to compute throughput"""
+        self._stop = time.perf_counter_ns() if at is None else at
+
+    def throughput(self) -> float:
+        """Number of samples completed per second"""
+        duration = self._stop - self._start
+        if duration <= 0:
+            return 0.0
+        return self.histogram.count * 1_000_000_000 / duration
+
+    def record(self, response: models.ResponseModelJSON, latency: int):
+        """Records the result of a single sample
+
+        Args:
+            response: node response to the sample
+            latency: sample latency, in nanoseconds. This can differ from
+                `response.elapsed` depending on the benchmarking strategy
+        """
+        self.histogram.record(latency)
+        self.node = response.node
+
+        if self.sink is not None:
+            self.sink(response, latency)
+
+        phases = response.phases
+        if phases is not None:
+            self._phases[0] += phases.connect
+            self._phases[1] += phases.ttfb
+            self._phases[2] += phases.transfer
+            self._phases[3] += phases.decode
+            self._phases_count += 1
+        if self.when is None or response.when < self.when:
+            self.when = response.when
+
+    def phases_avg(self) -> models.Phases | None:
+        """Average time spent in each call phase, if it was reported"""
+        if self._phases_count == 0:
+            return None
+
+        connect, ttfb, transfer, decode = (
+            total // self._phases_count for total in self._phases
+        )
+        return models.Phases(
+            connect=connect, ttfb=ttfb, transfer=transfer, decode=decode
+        )
+
+    def summary(
+        self, method: str, full: bool = False
+    ) -> models.NodeResponseBench:
+        """Reduces all recorded samples to their summary statistics
+
+        Args:
+            method: rpc method which was benchmarked
+            full: whether to include the latency histogram in the results
+
+        Returns:
+            Benchmarking results for that node
+        """
+        assert self.node is not None and self.when is not None
+
+        histogram = self.histogram
+        return models.NodeResponseBench(
+            node=self.node,
+            method=method,
+            when=self.when,
+            samples=histogram.count,
+            throughput=self.throughput(),
+            elapsed_avg=histogram.mean(),
+            elapsed_stddev=histogram.stddev(),
+            elapsed_min=histogram.min,
+            elapsed_max=histogram.max,
+            elapsed_p50=histogram.percentile(50),
+            elapsed_p90=histogram.percentile(90),
+            elapsed_p99=histogram.percentile(99),
+            elapsed_p999=histogram.percentile(99.9),
+            phases_avg=self.phases_avg(),
+            histogram=histogram.to_model() if full else None,
+        )
+
+
+class RecorderMix:
+    """Accumulates the results of a mixed workload sent to a single node, both
+    per method and across all methods
+
+    Args:
+        sink: if set, called with every sample as it is recorded
+    """
+
+    def __init__(self, sink: Record | None = None) -> None:
+        self.total = Recorder(sink)
+        self.methods: dict[str, Recorder] = {}
+
+    def start(self):
+        self.total.start()
+
+    def stop(self):
+        self.total.stop()
+        for recorder in self.methods.values():
+            recorder.start(self.total._start)
+            recorder.stop(self.total._stop)
+
+    def record(self, response: models.ResponseModelJSON, latency: int):
+        recorder = self.methods.get(response.method)
+        if recorder is None:
+            recorder = Recorder()
+            self.methods[response.method] = recorder
+
+        recorder.record(response, latency)
+        self.total.record(response, latency)
+
+    def summary(self, full: bool = False) -> models.NodeResponseMix:
+        """Reduces all recorded samples to their summary statistics
+
+        Args:
+            full: whether to include latency histograms in the results
+
+        Returns:
+            Benchmarking results for that node, per method and overall
+        """
+        total = self.total.summary(METHOD_MIX, full)
+        return models.NodeResponseMix(
+            node=total.node,
+            total=total,
+            methods=[
+                recorder.summary(method, full)
+                for method, recorder in sorted(self.methods.items())
+            ],
+        )
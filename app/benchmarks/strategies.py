@@ -0,0 +1,122 @@
+"""
+# Benchmarking strategies
+
+A strategy decides _when_ each sample is sent to the node. Samples are
+represented as jobs, which are coroutine factories returning the response of
+the node, so that a job is only started once the strategy decides it is time.
+
+## Burst
+
+All samples are sent at once. This is the simplest strategy but it means
+concurrency is always equal to the number of samples.
+
+## Open loop
+
+Samples are sent at a constant arrival rate, regardless of how long the node
+takes to respond. Each sample is given an _intended_ send time ahead of the
+benchmark and its latency is measured from that time, not from the time it was
+actually sent. This avoids coordinated omission: if the harness or the node
+stalls, samples which should have been sent during the stall are still
+accounted for as having waited.
+
+## Closed loop
+
+A fixed number of workers each send a sample and wait for its response before
+sending the next one. This bounds concurrency independently of the number of
+samples, so that latency can be measured at a known level of load.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Coroutine
+
+from app import models
+
+Job = Callable[[], Coroutine[Any, Any, models.ResponseModelJSON]]
+Record = Callable[[models.ResponseModelJSON, int], None]
+
+TO_NANOS: int = 1_000_000_000
+
+
+async def _wait_all(tasks: list[asyncio.Task]):
+    """Waits for all samples to complete, raising the first error
+
+    Samples still in flight are cancelled if any of them fails or if the
+    benchmark itself is cancelled, rather than left running against the node.
+    """
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_burst(jobs: list[Job], record: Record):
+    """Sends all samples at once
+
+    Args:
+        jobs: samples to send
+        record: called with the response and latency of each sample
+    """
+
+    async def run(job: Job):
+        response = await job()
+        record(response, response.elapsed)
+
+    await _wait_all([asyncio.create_task(run(job)) for job in jobs])
+
+
+async def run_open_loop(jobs: list[Job], record: Record, rate: float):
+    """Sends samples at a constant arrival rate
+
+    Args:
+        jobs: samples to send
+        record: called with the response and latency of each sample. Latency
+            is measured from the intended send time of the sample
+        rate: number of samples to send per second
+    """
+    period = TO_NANOS / rate
+    tasks: list[asyncio.Task] = []
+
+    async def run(job: Job, intended: int):
+        delay = time.perf_counter_ns() - intended
+        response = await job()
+        record(response, response.elapsed + delay)
+
+    # Samples still in flight are cancelled if any of them fails or if the
+    # benchmark itself is cancelled, rather than left running against the node
+    try:
+        start = time.perf_counter_ns()
+        for i, job in enumerate(jobs):
+            intended = start + round(i * period)
+            wait = intended - time.perf_counter_ns()
+            if wait > 0:
+                await asyncio.sleep(wait / TO_NANOS)
+
+            task = asyncio.create_task(run(job, intended))
+            tasks.append(task)
+
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_closed_loop(jobs: list[Job], record: Record, concurrency: int):
+    """Sends samples from a fixed size pool of workers
+
+    Args:
+        jobs: samples to send
+        record: called with the response and latency of each sample
+        concurrency: maximum number of samples in flight at any time
+    """
+    queue = iter(jobs)
+
+    async def worker():
+        for job in queue:
+            response = await job()
+            record(response, response.elapsed)
+
+    await _wait_all([asyncio.create_task(worker()) for _ in range(concurrency)])
@@ -0,0 +1,253 @@
+"""
+# Harness calibration
+
+Sample latencies also include time spent in the harness itself: event loop
+scheduling delay, building response models and garbage collection pauses. On
+short calls such as `starknet_blockNumber` this is the same order of magnitude
+as the latency of the node, so every benchmark is calibrated against the
+harness and reports:
+
+- the latency of no-op samples, sent through the same strategy and recorder as
+  real samples right before the benchmark starts. Node latencies below this
+  cannot be told apart from harness noise
+- event loop scheduling delay, measured every `CALIBRATION_LAG_INTERVAL`
+  seconds while the benchmark runs
+- garbage collections which happened during the benchmark, and how long they
+  paused the harness for
+
+## Isolation
+
+Isolation reduces harness jitter for the duration of a benchmark:
+
+- garbage collection is frozen, so that no collection pauses a sample
+- the event loop is pinned to cpus outside of the cpuset of the benchmarked
+  node containers, so that the harness and nodes do not compete for the same
+  cores. This is only possible on Linux, and if node containers are
+  restricted to a cpuset (`cpuset` in their compose file)
+
+Garbage collection is process-wide, so it stays frozen for as long as any
+isolated benchmark is running.
+
+The event loop cannot be replaced once the server has started. uvicorn already
+runs on `uvloop` whenever it is installed, as it is with `fastapi[standard]`,
+so the loop implementation in use is only reported.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import gc
+import os
+import time
+from typing import Any, AsyncIterator
+
+from docker.models.containers import Container
+
+from app import benchmarks, models
+from app.benchmarks.histogram import Histogram
+from app.benchmarks.recorder import Recorder
+
+# Number of no-op samples sent to calibrate harness overhead
+CALIBRATION_SAMPLES: int = int(
+    os.environ.get("BENCH_CALIBRATION_SAMPLES", "1000")
+)
+# Time between two measures of event loop scheduling delay, in seconds
+CALIBRATION_LAG_INTERVAL: float = float(
+    os.environ.get("BENCH_CALIBRATION_LAG_INTERVAL", "0.01")
+)
+# Method name reported by no-op samples
+CALIBRATION_METHOD: str = "calibration"
+
+# Number of isolated benchmarks currently running
+_ISOLATED: int = 0
+# Cpu affinity of the event loop before isolation, if it was changed
+_AFFINITY: set[int] | None = None
+
+
+def cpuset_parse(cpuset: str) -> set[int]:
+    """Parses a cpuset list, such as `0-3,6`, into the cpus it contains"""
+    cpus: set[int] = set()
+    for part in cpuset.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def node_cpus(containers: list[Container]) -> set[int]:
+    """Cpus the node containers are restricted to
+
+    Returns:
+        The union of the cpusets of all containers, or an empty set if any of
+        them can run on every cpu
+    """
+    cpus: set[int] = set()
+    for container in containers:
+        host_config = container.attrs.get("HostConfig") or {}
+        cpuset = host_config.get("CpusetCpus") or ""
+        if not cpuset:
+            return set()
+        cpus |= cpuset_parse(cpuset)
+    return cpus
+
+
+def _isolate(cpus: set[int]):
+    global _ISOLATED, _AFFINITY
+
+    _ISOLATED += 1
+    if _ISOLATED > 1:
+        return
+
+    # Objects which survived until now are moved out of reach of the collector
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        affinity = os.sched_getaffinity(0)
+        if affinity - cpus:
+            _AFFINITY = affinity
+            os.sched_setaffinity(0, affinity - cpus)
+
+
+def _release():
+    global _ISOLATED, _AFFINITY
+
+    _ISOLATED -= 1
+    if _ISOLATED > 0:
+        return
+
+    if _AFFINITY is not None:
+        os.sched_setaffinity(0, _AFFINITY)
+        _AFFINITY = None
+
+    gc.enable()
+    gc.unfreeze()
+
+
+async def _noop(node: models.NodeName) -> models.ResponseModelJSON:
+    """No-op sample, which yields to the event loop once instead of sending a
+    request, and otherwise does the same work as `rpc.json_rpc`
+    """
+    time_start = datetime.datetime.now()
+    perf_start = time.perf_counter_ns()
+    await asyncio.sleep(0)
+
+    response = models.ResponseModelJSON[Any](
+        node=node,
+        method=CALIBRATION_METHOD,
+        when=time_start,
+        elapsed=0,
+        output={"id": 1, "jsonrpc": "2.0", "result": 0},
+        phases=models.Phases(connect=0, ttfb=0, transfer=0, decode=0),
+    )
+    response.elapsed = time.perf_counter_ns() - perf_start
+    return response
+
+
+async def overhead(node: models.NodeName, samples: int) -> Histogram:
+    """Measures the latency of no-op samples
+
+    Args:
+        node: node no-op samples are reported for
+        samples: number of no-op samples to send
+
+    Returns:
+        Latency of the no-op samples
+    """
+    recorder = Recorder()
+    jobs = [lambda: _noop(node) for _ in range(samples)]
+
+    await benchmarks.run_jobs(
+        jobs, recorder, models.BenchmarkMode.CLOSED_LOOP, 0, 1
+    )
+    return recorder.histogram
+
+
+async def _loop_lag(histogram: Histogram, interval: float):
+    """Measures event loop scheduling delay until cancelled
+
+    The delay is measured as the time it takes for a task which yields to the
+    event loop to be resumed, which is the delay any completed sample has to
+    wait before it is recorded.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        start = time.perf_counter_ns()
+        await asyncio.sleep(0)
+        histogram.record(time.perf_counter_ns() - start)
+
+
+@contextlib.asynccontextmanager
+async def calibrate(
+    node: models.NodeName,
+    containers: list[Container],
+    isolate: bool,
+) -> AsyncIterator[list[models.Calibration]]:
+    """Calibrates the harness for the duration of a benchmark
+
+    Args:
+        node: node no-op samples are reported for
+        containers: containers of the benchmarked nodes
+        isolate: whether to isolate the harness from the nodes
+
+    Yields:
+        A list which is filled with the harness calibration once the block
+        exits
+    """
+    cpus = node_cpus(containers)
+    if isolate:
+        _isolate(cpus)
+
+    calibration: list[models.Calibration] = []
+    collections = 0
+    pause = 0
+    pause_start = 0
+
+    def on_gc(phase: str, _: dict[str, int]):
+        nonlocal collections, pause, pause_start
+        if phase == "start":
+            pause_start = time.perf_counter_ns()
+        else:
+            collections += 1
+            pause += time.perf_counter_ns() - pause_start
+
+    lag = Histogram()
+    task = None
+    try:
+        noop = await overhead(node, CALIBRATION_SAMPLES)
+
+        gc.callbacks.append(on_gc)
+        task = asyncio.create_task(_loop_lag(lag, CALIBRATION_LAG_INTERVAL))
+
+        yield calibration
+    finally:
+        if task is not None:
+            task.cancel()
+            await asyncio.wait([task])
+        if on_gc in gc.callbacks:
+            gc.callbacks.remove(on_gc)
+
+        affinity = None
+        if hasattr(os, "sched_getaffinity"):
+            affinity = sorted(os.sched_getaffinity(0))
+
+        if isolate:
+            _release()
+
+    loop = type(asyncio.get_running_loop())
+    calibration.append(
+        models.Calibration(
+            overhead=noop.to_summary(),
+            overhead_stddev=noop.stddev(),
+            loop_lag=lag.to_summary(),
+            gc_collections=collections,
+            gc_pause=pause,
+            loop=f"{loop.__module__}.{loop.__qualname__}",
+            isolated=isolate,
+            cpus=affinity,
+            node_cpus=sorted(cpus) if cpus else None,
+        )
+    )
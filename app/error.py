@@ -1,6 +1,7 @@
+import json
+
 import fastapi
 import pydantic
-import requests
 from docker.models.containers import Container
 from starknet_py.net.client_errors import ClientError
 
@@ -24,6 +25,76 @@ class ErrorBlockIdMissing(fastapi.HTTPException):
         )
 
 
+class ErrorBatchUnsupported(fastapi.HTTPException):
+    def __init__(self, api_call: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"'{api_call}' api call cannot be benchmarked in batches, only "
+                "calls without a transaction or request body are supported"
+            ),
+        )
+
+
+class ErrorCorpusNotFound(fastapi.HTTPException):
+    def __init__(self, corpus_id: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No input corpus with id '{corpus_id}'",
+        )
+
+
+class ErrorCorpusMismatch(fastapi.HTTPException):
+    def __init__(self, corpus_id: str, expected: str, actual: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Input corpus '{corpus_id}' was generated for '{expected}', "
+                f"it cannot be used to benchmark '{actual}'"
+            ),
+        )
+
+
+class ErrorInputGeneration(fastapi.HTTPException):
+    def __init__(self, reason: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_409_CONFLICT,
+            detail=f"Failed to generate benchmark inputs: {reason}",
+        )
+
+
+class ErrorBaselineNotFound(fastapi.HTTPException):
+    def __init__(self, name: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No baseline named '{name}'",
+        )
+
+
+class ErrorJobNotFound(fastapi.HTTPException):
+    def __init__(self, job_id: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No benchmark job with id '{job_id}'",
+        )
+
+
+class ErrorJobNotDone(fastapi.HTTPException):
+    def __init__(self, job_id: str, status: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_409_CONFLICT,
+            detail=f"Benchmark job '{job_id}' has no results, it is {status}",
+        )
+
+
+class ErrorRunNotFound(fastapi.HTTPException):
+    def __init__(self, run_id: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No saved benchmark run with id '{run_id}'",
+        )
+
+
 class ErrorNodeNotFound(fastapi.HTTPException):
     def __init__(self, node: models.NodeName) -> None:
         super().__init__(
@@ -35,6 +106,39 @@ class ErrorNodeNotFound(fastapi.HTTPException):
         )
 
 
+class ErrorNodeNoContainer(fastapi.HTTPException):
+    def __init__(self, node: models.NodeName) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=(
+                f"{node.capitalize()} node is not registered with a container, "
+                "its resource usage cannot be measured"
+            ),
+        )
+
+
+class ErrorNodeUrlUnknown(fastapi.HTTPException):
+    def __init__(self, url: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No node was resolved to the rpc url {url}",
+        )
+
+
+class ErrorNodeUrlShared(fastapi.HTTPException):
+    def __init__(
+        self, url: str, node: models.NodeName, other: models.NodeName
+    ) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_409_CONFLICT,
+            detail=(
+                f"{node.capitalize()} and {other.capitalize()} nodes both "
+                f"resolve to the rpc url {url}, their samples cannot be told "
+                "apart"
+            ),
+        )
+
+
 class ErrorNodeNotRunning(fastapi.HTTPException):
     def __init__(self, node: models.NodeName) -> None:
         super().__init__(
@@ -62,7 +166,7 @@ class ErrorJsonDecode(fastapi.HTTPException):
         self,
         node: models.NodeName,
         api_call: str,
-        json_error: requests.exceptions.JSONDecodeError,
+        json_error: json.JSONDecodeError,
     ) -> None:
         super().__init__(
             status_code=fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -85,6 +189,40 @@ class ErrorNodeSilent(fastapi.HTTPException):
         )
 
 
+class ErrorHeadUnavailable(fastapi.HTTPException):
+    def __init__(self, url: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=(
+                f"Chain head of the node at {url} is not being tracked, it "
+                "stopped before its first poll completed"
+            ),
+        )
+
+
+class ErrorDockerTimeout(fastapi.HTTPException):
+    def __init__(self, node: models.NodeName | None) -> None:
+        detail = "Docker did not respond in time"
+        if node is not None:
+            detail += f" when querying the {node.capitalize()} node container"
+
+        super().__init__(
+            status_code=fastapi.status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=detail,
+        )
+
+
+class ErrorNodeTimeout(fastapi.HTTPException):
+    def __init__(self, node: models.NodeName, api_call: str) -> None:
+        super().__init__(
+            status_code=fastapi.status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=(
+                f"{node.capitalize()} node did not respond in time to "
+                f"'{api_call}' api call"
+            ),
+        )
+
+
 def container_check_running(node: models.NodeName, container: Container):
     if container.status != "running":
         raise ErrorNodeNotRunning(node)
@@ -0,0 +1,147 @@
+"""
+# Chain head tracking
+
+Input generators need to know the latest block shared by all the nodes being
+benchmarked. Rather than querying each node for every single sample, one
+background task per node polls its block number at a fixed interval and keeps
+the result in memory, where it can be read for free.
+
+Trackers are started lazily the first time a node url is used, and are all
+stopped on app shutdown.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+
+import aiohttp
+from starknet_py.net.client_errors import ClientError
+
+from app import error, rpc
+
+logger = logging.getLogger("myapp.head")
+
+# Time between two chain head polls of the same node, in seconds
+HEAD_POLL_INTERVAL: float = float(
+    os.environ.get("BENCH_HEAD_POLL_INTERVAL", "1.0")
+)
+
+
+class HeadTracker:
+    """Keeps track of the latest block number of a single node
+
+    Args:
+        url: node rpc url
+        interval: time between two polls, in seconds
+    """
+
+    def __init__(self, url: str, interval: float) -> None:
+        self.url = url
+        self.interval = interval
+        self.block_number: int | None = None
+        self.when: datetime.datetime | None = None
+        self.error: Exception | None = None
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """Starts polling, or restarts it if it stopped"""
+        if self._task is None or self._task.done():
+            # Waiters wait for the first poll again if no head is known yet
+            if self.block_number is None:
+                self.error = None
+                self._ready.clear()
+            self._task = asyncio.create_task(self._poll())
+            self._task.add_done_callback(self._stopped)
+
+    def _stopped(self, _: asyncio.Task):
+        # Waiters are never left hanging, even if polling stopped before the
+        # first poll completed
+        if self.block_number is None and self.error is None:
+            self.error = error.ErrorHeadUnavailable(self.url)
+        self._ready.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll(self):
+        while True:
+            try:
+                client = rpc.client_get(self.url)
+                self.block_number = await client.get_block_number()
+                self.when = datetime.datetime.now()
+                self.error = None
+            except (aiohttp.ClientError, ClientError, TimeoutError) as err:
+                # Keep serving the last known head if the node hiccups
+                logger.warning(
+                    "Chain head poll of %s failed", self.url, exc_info=True
+                )
+                self.error = err
+            except Exception as err:
+                # Malformed responses must not stop the tracker either
+                logger.exception("Chain head poll of %s failed", self.url)
+                self.error = err
+
+            self._ready.set()
+            await asyncio.sleep(self.interval)
+
+    async def wait(self) -> int:
+        """Retrieves the latest known block number of the node
+
+        This only waits for the first poll to complete, afterwards the last
+        known value is returned immediately.
+
+        Raises:
+            Exception: if the node could not be reached on the first poll, or
+                polling stopped before it completed
+        """
+        await self._ready.wait()
+
+        if self.block_number is None:
+            raise self.error or error.ErrorHeadUnavailable(self.url)
+
+        return self.block_number
+
+
+_TRACKERS: dict[str, HeadTracker] = {}
+
+
+def tracker_get(url: str) -> HeadTracker:
+    """Retrieves the head tracker of a node, starting it if needed"""
+    tracker = _TRACKERS.get(url)
+
+    if tracker is None:
+        tracker = HeadTracker(url, HEAD_POLL_INTERVAL)
+        _TRACKERS[url] = tracker
+
+    tracker.start()
+    return tracker
+
+
+async def latest_common_block_number(urls: list[str]) -> int:
+    """Latest block number which all nodes have reached
+
+    Args:
+        urls: node rpc urls
+
+    Returns:
+        The lowest of the latest block numbers of each node
+    """
+    trackers = [tracker_get(url) for url in urls]
+    block_numbers = await asyncio.gather(
+        *[tracker.wait() for tracker in trackers]
+    )
+
+    return min(block_numbers)
+
+
+async def trackers_stop():
+    """Stops all head trackers, to be called on app shutdown"""
+    trackers = list(_TRACKERS.values())
+    _TRACKERS.clear()
+
+    await asyncio.gather(*[tracker.stop() for tracker in trackers])
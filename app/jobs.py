@@ -0,0 +1,205 @@
+"""
+# Benchmark jobs
+
+Long benchmarks can take minutes, which is longer than most http clients and
+proxies are willing to wait for a response. Instead, benchmarks can be
+submitted as jobs: a job id is returned right away, and the job can then be
+polled for its status and progress, cancelled, and its results retrieved once
+it is done.
+
+Jobs run in the background, in-process. Benchmarks which target the same
+node are serialized with a per-node lock so that they do not skew each
+other's results, while benchmarks targeting different nodes run concurrently.
+This also applies to benchmarks which are run directly, outside of a job.
+
+Finished jobs are kept in memory until `JOBS_MAX` jobs have been submitted
+after them.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable
+
+import pydantic
+
+from app import error, models
+from app.runs import RUN_ERRORS, Progress
+
+logger = logging.getLogger("myapp.jobs")
+
+# Maximum number of jobs kept in memory, running jobs are never evicted
+JOBS_MAX: int = int(os.environ.get("BENCH_JOBS_MAX", "100"))
+
+_NODE_LOCKS: dict[models.NodeName, asyncio.Lock] = {}
+
+
+@contextlib.asynccontextmanager
+async def nodes_lock(nodes: list[models.NodeName]) -> AsyncIterator[None]:
+    """Waits for exclusive access to a set of nodes
+
+    Locks are always acquired in the same order to avoid deadlocks between
+    benchmarks targeting overlapping sets of nodes.
+
+    Args:
+        nodes: nodes to lock, duplicates are allowed
+    """
+    async with contextlib.AsyncExitStack() as stack:
+        for node in sorted(set(nodes)):
+            lock = _NODE_LOCKS.setdefault(node, asyncio.Lock())
+            await stack.enter_async_context(lock)
+        yield
+
+
+class Job:
+    """A benchmark running in the background
+
+    Args:
+        kind: type of benchmark being run
+        nodes: nodes being benchmarked
+        total: number of samples the benchmark is expected to send, if known
+        run: starts the benchmark, given a callback to report the progress of
+            each sample
+    """
+
+    def __init__(
+        self,
+        kind: models.RunKind,
+        nodes: list[models.NodeName],
+        total: int | None,
+        run: Callable[[Progress], Awaitable[pydantic.BaseModel]],
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.nodes = nodes
+        self.total = total
+        self.completed = 0
+        self.status = models.JobStatus.QUEUED
+        self.submitted = datetime.datetime.now()
+        self.started: datetime.datetime | None = None
+        self.finished: datetime.datetime | None = None
+        self.error: str | None = None
+        self.result: pydantic.BaseModel | None = None
+        self._run = run
+        self.task = asyncio.create_task(self._execute())
+
+    def _progress(
+        self, position: int, response: models.ResponseModelJSON, latency: int
+    ):
+        self.completed += 1
+
+    async def _execute(self):
+        try:
+            async with nodes_lock(self.nodes):
+                self.status = models.JobStatus.RUNNING
+                self.started = datetime.datetime.now()
+                self.result = await self._run(self._progress)
+            self.status = models.JobStatus.DONE
+        except asyncio.CancelledError:
+            self.status = models.JobStatus.CANCELLED
+        except RUN_ERRORS as err:
+            logger.warning("Job %s failed", self.id, exc_info=True)
+            self.status = models.JobStatus.FAILED
+            self.error = str(getattr(err, "detail", None) or repr(err))
+        except Exception as err:
+            # Jobs have no caller to raise to, so the error is reported on the
+            # job instead
+            logger.exception("Job %s failed unexpectedly", self.id)
+            self.status = models.JobStatus.FAILED
+            self.error = repr(err)
+        finally:
+            self.finished = datetime.datetime.now()
+
+    def cancel(self):
+        self.task.cancel()
+
+    def done(self) -> bool:
+        return self.task.done()
+
+    def info(self) -> models.ResponseModelJob:
+        return models.ResponseModelJob(
+            id=self.id,
+            kind=self.kind,
+            nodes=self.nodes,
+            status=self.status,
+            completed=self.completed,
+            total=self.total,
+            submitted=self.submitted,
+            started=self.started,
+            finished=self.finished,
+            error=self.error,
+        )
+
+
+_JOBS: OrderedDict[str, Job] = OrderedDict()
+
+
+def job_submit(
+    kind: models.RunKind,
+    nodes: list[models.NodeName],
+    total: int | None,
+    run: Callable[[Progress], Awaitable[pydantic.BaseModel]],
+) -> Job:
+    """Starts a benchmark in the background
+
+    Args:
+        kind: type of benchmark being run
+        nodes: nodes being benchmarked
+        total: number of samples the benchmark is expected to send, if known
+        run: starts the benchmark, given a callback to report the progress of
+            each sample
+
+    Returns:
+        The newly submitted job
+    """
+    job = Job(kind, nodes, total, run)
+    _JOBS[job.id] = job
+
+    finished = [id for id, other in _JOBS.items() if other.done()]
+    for id in finished[: max(len(_JOBS) - JOBS_MAX, 0)]:
+        del _JOBS[id]
+
+    return job
+
+
+def job_get(job_id: str) -> Job:
+    """Retrieves a job by id
+
+    Raises:
+        ErrorJobNotFound: if no such job exists
+    """
+    job = _JOBS.get(job_id)
+    if job is None:
+        raise error.ErrorJobNotFound(job_id)
+    return job
+
+
+def job_list() -> list[models.ResponseModelJob]:
+    """Lists all jobs kept in memory, most recent first"""
+    return [job.info() for job in reversed(_JOBS.values())]
+
+
+def job_result(job_id: str) -> pydantic.BaseModel:
+    """Retrieves the results of a job
+
+    Raises:
+        ErrorJobNotFound: if no such job exists
+        ErrorJobNotDone: if the job has not completed successfully
+    """
+    job = job_get(job_id)
+    if job.result is None:
+        raise error.ErrorJobNotDone(job_id, job.status.value)
+    return job.result
+
+
+async def jobs_cancel():
+    """Cancels all running jobs, to be called on app shutdown"""
+    jobs = [job for job in _JOBS.values() if not job.done()]
+    for job in jobs:
+        job.cancel()
+
+    await asyncio.gather(*[job.task for job in jobs], return_exceptions=True)
@@ -0,0 +1,776 @@
+"""
+# Mock node
+
+A stand-in Starknet JSON RPC node which answers every method in `RpcCall`
+with synthetic but schema-valid responses. It holds no state: the content of
+its chain is derived from block numbers alone, so that the same request always
+gets the same response. Only latency and injected errors are random, and they
+are drawn from a seeded generator.
+
+The mock node is used to benchmark the harness itself, without a synced node:
+with zero latency, benchmark results measure the overhead floor and throughput
+ceiling of the harness. It is also used to exercise benchmark modes offline.
+
+## Usage
+
+```bash
+python -m app.mock --port 9944 --latency lognormal:2:0.5 --error-rate 0.01
+```
+
+It is then registered as a node in `nodes.toml`:
+
+```toml
+[mock]
+url = "http://127.0.0.1:9944"
+```
+
+## Options
+
+- `--latency`: distribution each response is delayed by, in milliseconds.
+  One of `constant:MS`, `uniform:LOW:HIGH`, `normal:MEAN:STDDEV`,
+  `lognormal:MEDIAN:SIGMA` or `exponential:MEAN`
+- `--payload`: size of list responses, as the number of transactions in each
+  block and of events emitted and storage slots written by each transaction
+- `--error-rate`: fraction of calls answered with an internal error
+- `--blocks`: height of the chain
+- `--seed`: seed of the latency and error generator
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import hashlib
+import json
+import math
+import random
+from typing import Any, Callable
+
+from aiohttp import web
+
+from app.rpc import RpcCall
+
+MOCK_CHAIN_ID: str = "0x534e5f5345504f4c4941"
+MOCK_SPEC_VERSION: str = "0.7.1"
+MOCK_STARKNET_VERSION: str = "0.13.2"
+# Time the first block was produced at, and between two blocks, in seconds
+MOCK_GENESIS: int = 1_700_000_000
+MOCK_BLOCK_TIME: int = 30
+
+# Block and transaction hashes encode their block number and index below a
+# tag, so that they can be decoded back when they are queried
+_TAG_SHIFT: int = 64
+_BLOCK_TAG: int = 0xB10C
+_TX_TAG: int = 0x7A
+_TX_INDEX_BITS: int = 16
+_NUMBER_MASK: int = (1 << 48) - 1
+
+# JSON RPC error codes, as defined by the Starknet specification
+_ERROR_BLOCK_NOT_FOUND: tuple[int, str] = (24, "Block not found")
+_ERROR_INVALID_TXN_INDEX: tuple[int, str] = (27, "Invalid transaction index")
+_ERROR_TXN_HASH_NOT_FOUND: tuple[int, str] = (29, "Transaction hash not found")
+_ERROR_METHOD_NOT_FOUND: tuple[int, str] = (-32601, "Method not found")
+_ERROR_INVALID_PARAMS: tuple[int, str] = (-32602, "Invalid params")
+_ERROR_INTERNAL: tuple[int, str] = (-32603, "Internal error")
+
+
+class MockError(Exception):
+    """A JSON RPC error to be returned to the client"""
+
+    def __init__(self, error: tuple[int, str]) -> None:
+        super().__init__(error[1])
+        self.code, self.message = error
+
+
+# =========================================================================== #
+#                                   LATENCY                                   #
+# =========================================================================== #
+
+
+_LATENCY_SAMPLERS: dict[str, Callable[..., float]] = {
+    "constant": lambda rng, ms: ms,
+    "uniform": lambda rng, low, high: rng.uniform(low, high),
+    "normal": lambda rng, mean, stddev: rng.gauss(mean, stddev),
+    "lognormal": lambda rng, median, sigma: rng.lognormvariate(
+        math.log(median), sigma
+    ),
+    "exponential": lambda rng, mean: rng.expovariate(1.0 / mean),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Latency:
+    """A distribution of response delays
+
+    Args:
+        kind: name of the distribution
+        params: parameters of the distribution, in milliseconds except for the
+            lognormal sigma
+    """
+
+    kind: str
+    params: tuple[float, ...]
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """Parses a distribution from `kind:param:...`
+
+        Raises:
+            ValueError: if the distribution is unknown or its parameters are
+                invalid
+        """
+        kind, *params = spec.split(":")
+        if kind not in _LATENCY_SAMPLERS:
+            raise ValueError(f"unknown latency distribution '{kind}'")
+
+        latency = cls(kind, tuple(float(param) for param in params))
+        latency.sample(random.Random(0))
+        return latency
+
+    def sample(self, rng: random.Random) -> float:
+        """Draws a delay, in seconds"""
+        ms = _LATENCY_SAMPLERS[self.kind](rng, *self.params)
+        return max(ms, 0.0) / 1000.0
+
+
+# =========================================================================== #
+#                                    CHAIN                                    #
+# =========================================================================== #
+
+
+def _felt(*parts: Any) -> int:
+    """Deterministic pseudo-random field element derived from `parts`"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=32).digest()
+    return int.from_bytes(digest) >> 6
+
+
+def _int(value: str) -> int:
+    """Parses a felt, which must be a `0x`-prefixed hex string
+
+    Raises:
+        ValueError: if the felt is not a `0x`-prefixed hex string
+    """
+    if not isinstance(value, str) or not value.startswith("0x"):
+        raise ValueError(f"felt must be a 0x-prefixed hex string: {value!r}")
+    return int(value, 16)
+
+
+def _block_hash(block_number: int) -> int:
+    return _BLOCK_TAG << _TAG_SHIFT | block_number
+
+
+def _tx_hash(block_number: int, index: int) -> int:
+    return _TX_TAG << _TAG_SHIFT | block_number << _TX_INDEX_BITS | index
+
+
+class MockChain:
+    """Synthetic chain content, derived from block numbers
+
+    Args:
+        blocks: height of the chain
+        payload: number of transactions per block, and of events and storage
+            slots written per transaction
+    """
+
+    def __init__(self, blocks: int, payload: int) -> None:
+        self.head = blocks
+        self.payload = payload
+
+    def block_number(self, block_id: Any) -> int:
+        """Resolves a JSON RPC block id to a block number
+
+        Raises:
+            MockError: if the block does not exist
+        """
+        if block_id in ("latest", "pending", None):
+            return self.head
+
+        if "block_number" in block_id:
+            block_number = int(block_id["block_number"])
+        else:
+            block_hash = _int(block_id["block_hash"])
+            if block_hash >> _TAG_SHIFT != _BLOCK_TAG:
+                raise MockError(_ERROR_BLOCK_NOT_FOUND)
+            block_number = block_hash & _NUMBER_MASK
+
+        if not 0 <= block_number <= self.head:
+            raise MockError(_ERROR_BLOCK_NOT_FOUND)
+        return block_number
+
+    def tx_location(self, tx_hash: str) -> tuple[int, int]:
+        """Decodes the block number and index of a transaction
+
+        Raises:
+            MockError: if the transaction does not exist
+        """
+        value = _int(tx_hash)
+        block_number = value >> _TX_INDEX_BITS & _NUMBER_MASK
+        index = value & ((1 << _TX_INDEX_BITS) - 1)
+
+        if (
+            value >> _TAG_SHIFT != _TX_TAG
+            or block_number > self.head
+            or index >= self.payload
+        ):
+            raise MockError(_ERROR_TXN_HASH_NOT_FOUND)
+        return (block_number, index)
+
+    def header(self, block_number: int) -> dict[str, Any]:
+        return {
+            "status": "ACCEPTED_ON_L2",
+            "block_hash": hex(_block_hash(block_number)),
+            "parent_hash": hex(_block_hash(max(block_number - 1, 0))),
+            "block_number": block_number,
+            "new_root": hex(_felt("root", block_number)),
+            "timestamp": MOCK_GENESIS + block_number * MOCK_BLOCK_TIME,
+            "sequencer_address": hex(_felt("sequencer")),
+            "l1_gas_price": {"price_in_fri": "0x1", "price_in_wei": "0x1"},
+            "l1_data_gas_price": {"price_in_fri": "0x1", "price_in_wei": "0x1"},
+            "l1_da_mode": "BLOB",
+            "starknet_version": MOCK_STARKNET_VERSION,
+        }
+
+    def contract(self, block_number: int, index: int) -> int:
+        return _felt("contract", block_number, index)
+
+    def state_diff(self, block_number: int) -> dict[str, Any]:
+        # At least two contracts are modified in each block, which input
+        # generators rely on
+        contracts = [
+            self.contract(block_number, index)
+            for index in range(max(self.payload, 2))
+        ]
+        return {
+            "storage_diffs": [
+                {
+                    "address": hex(address),
+                    "storage_entries": [
+                        {
+                            "key": hex(_felt("key", address, slot)),
+                            "value": hex(_felt("value", block_number, slot)),
+                        }
+                        for slot in range(max(self.payload, 1))
+                    ],
+                }
+                for address in contracts
+            ],
+            "deprecated_declared_classes": [],
+            "declared_classes": [],
+            "deployed_contracts": [],
+            "replaced_classes": [],
+            "nonces": [
+                {"contract_address": hex(address), "nonce": hex(block_number)}
+                for address in contracts
+            ],
+        }
+
+    def tx(self, block_number: int, index: int) -> dict[str, Any]:
+        sender = self.contract(block_number, index)
+        common: dict[str, Any] = {
+            "transaction_hash": hex(_tx_hash(block_number, index)),
+            "signature": [hex(_felt("r", sender)), hex(_felt("s", sender))],
+        }
+        v3: dict[str, Any] = {
+            "version": "0x3",
+            "resource_bounds": {
+                "l1_gas": {"max_amount": "0x2710", "max_price_per_unit": "0x1"},
+                "l2_gas": {"max_amount": "0x0", "max_price_per_unit": "0x0"},
+            },
+            "tip": "0x0",
+            "paymaster_data": [],
+            "nonce_data_availability_mode": "L1",
+            "fee_data_availability_mode": "L1",
+        }
+        calldata = [hex(_felt("calldata", sender, i)) for i in range(4)]
+
+        match (block_number + index) % 4:
+            case 0:
+                return {
+                    **common,
+                    "type": "INVOKE",
+                    "version": "0x1",
+                    "max_fee": "0x2710",
+                    "nonce": hex(block_number),
+                    "sender_address": hex(sender),
+                    "calldata": calldata,
+                }
+            case 1:
+                return {
+                    **common,
+                    **v3,
+                    "type": "INVOKE",
+                    "nonce": hex(block_number),
+                    "sender_address": hex(sender),
+                    "calldata": calldata,
+                    "account_deployment_data": [],
+                }
+            case 2:
+                # The first calldata element of an L1 handler is the L1 sender
+                l1_sender = _felt("l1", sender) >> 90
+                return {
+                    **common,
+                    "type": "L1_HANDLER",
+                    "version": "0x0",
+                    "nonce": hex(block_number),
+                    "contract_address": hex(sender),
+                    "entry_point_selector": hex(_felt("handler")),
+                    "calldata": [hex(l1_sender), *calldata],
+                }
+            case _:
+                return {
+                    **common,
+                    **v3,
+                    "type": "DEPLOY_ACCOUNT",
+                    "nonce": "0x0",
+                    "contract_address_salt": hex(_felt("salt", sender)),
+                    "constructor_calldata": calldata,
+                    "class_hash": hex(self.class_hash(sender)),
+                }
+
+    def receipt(self, block_number: int, index: int) -> dict[str, Any]:
+        tx = self.tx(block_number, index)
+        sender = self.contract(block_number, index)
+        receipt: dict[str, Any] = {
+            "type": tx["type"],
+            "transaction_hash": tx["transaction_hash"],
+            "actual_fee": {
+                "amount": "0x2710",
+                "unit": "FRI" if tx["version"] == "0x3" else "WEI",
+            },
+            "execution_status": "SUCCEEDED",
+            "finality_status": "ACCEPTED_ON_L2",
+            "messages_sent": [],
+            "events": [
+                {
+                    "from_address": hex(sender),
+                    "keys": [hex(_felt("event", event))],
+                    "data": [hex(_felt("data", sender, event))],
+                }
+                for event in range(self.payload)
+            ],
+            "execution_resources": self.execution_resources(),
+        }
+        if tx["type"] == "L1_HANDLER":
+            receipt["message_hash"] = hex(_felt("message", sender))
+        if tx["type"] == "DEPLOY_ACCOUNT":
+            receipt["contract_address"] = hex(sender)
+        return receipt
+
+    def execution_resources(self) -> dict[str, Any]:
+        return {
+            "steps": 1000 * self.payload,
+            "data_availability": {"l1_gas": 0, "l1_data_gas": 128},
+        }
+
+    def fee_estimate(self, unit: str = "WEI") -> dict[str, Any]:
+        return {
+            "gas_consumed": "0x2710",
+            "gas_price": "0x1",
+            "data_gas_consumed": "0x80",
+            "data_gas_price": "0x1",
+            "overall_fee": "0x2790",
+            "unit": unit,
+        }
+
+    def trace(self, tx: dict[str, Any]) -> dict[str, Any]:
+        address = tx.get("sender_address") or tx.get("contract_address", "0x1")
+        invocation = {
+            "contract_address": address,
+            "entry_point_selector": hex(_felt("__execute__")),
+            "calldata": tx.get("calldata", []),
+            "caller_address": "0x0",
+            "class_hash": hex(self.class_hash(_int(address))),
+            "entry_point_type": "EXTERNAL",
+            "call_type": "CALL",
+            "result": [],
+            "calls": [],
+            "events": [],
+            "messages": [],
+            "execution_resources": {"steps": 1000 * self.payload},
+        }
+        trace: dict[str, Any] = {
+            "type": tx["type"],
+            "execution_resources": self.execution_resources(),
+        }
+        match tx["type"]:
+            case "INVOKE":
+                trace["execute_invocation"] = invocation
+            case "DEPLOY_ACCOUNT":
+                trace["constructor_invocation"] = invocation
+            case "L1_HANDLER":
+                trace["function_invocation"] = invocation
+        return trace
+
+    def class_hash(self, address: int) -> int:
+        return _felt("class", address % 8)
+
+    def contract_class(self, class_hash: int) -> dict[str, Any]:
+        return {
+            "sierra_program": [
+                hex(_felt("program", class_hash, i))
+                for i in range(100 * self.payload)
+            ],
+            "contract_class_version": "0.1.0",
+            "entry_points_by_type": {
+                "CONSTRUCTOR": [],
+                "EXTERNAL": [
+                    {"selector": hex(_felt("selector", i)), "function_idx": i}
+                    for i in range(self.payload)
+                ],
+                "L1_HANDLER": [],
+            },
+            "abi": "[]",
+        }
+
+
+# =========================================================================== #
+#                                   METHODS                                   #
+# =========================================================================== #
+
+
+def _param(params: dict[str, Any] | list[Any], name: str, index: int) -> Any:
+    """Retrieves a parameter passed either by name or by position"""
+    if isinstance(params, dict):
+        return params.get(name)
+    return params[index] if index < len(params) else None
+
+
+class MockNode:
+    """Answers JSON RPC requests from a `MockChain`
+
+    Args:
+        chain: chain to serve
+        latency: distribution each response is delayed by
+        error_rate: fraction of calls answered with an internal error
+        seed: seed of the latency and error generator
+    """
+
+    def __init__(
+        self,
+        chain: MockChain,
+        latency: Latency,
+        error_rate: float,
+        seed: int,
+    ) -> None:
+        self.chain = chain
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.methods: dict[str, Callable[[Any], Any]] = {
+            RpcCall.STARKNET_BLOCK_HASH_AND_NUMBER: self.block_hash_and_number,
+            RpcCall.STARKNET_BLOCK_NUMBER: lambda _: chain.head,
+            RpcCall.STARKNET_CALL: self.call,
+            RpcCall.STARKNET_CHAIN_ID: lambda _: MOCK_CHAIN_ID,
+            RpcCall.STARKNET_ESTIMATE_FEE: self.estimate_fee,
+            RpcCall.STARKNET_ESTIMATE_MESSAGE_FEE: self.estimate_message_fee,
+            RpcCall.STARKNET_GET_BLOCK_TRANSACTION_COUNT: self.block_tx_count,
+            RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS: self.block_receipts,
+            RpcCall.STARKNET_GET_BLOCK_WITH_TX_HASHES: self.block_tx_hashes,
+            RpcCall.STARKNET_GET_BLOCK_WITH_TXS: self.block_txs,
+            RpcCall.STARKNET_GET_CLASS: self.get_class,
+            RpcCall.STARKNET_GET_CLASS_AT: self.get_class_at,
+            RpcCall.STARKNET_GET_CLASS_HASH_AT: self.get_class_hash_at,
+            RpcCall.STARKNET_GET_EVENTS: self.get_events,
+            RpcCall.STARKNET_GET_NONCE: self.get_nonce,
+            RpcCall.STARKNET_GET_STATE_UPDATE: self.get_state_update,
+            RpcCall.STARKNET_GET_STORAGE_AT: self.get_storage_at,
+            RpcCall.STARKNET_GET_TRANSACTION_BY_BLOCK_ID_AND_INDEX: (
+                self.get_tx_by_index
+            ),
+            RpcCall.STARKNET_GET_TRANSACTION_BY_HASH: self.get_tx_by_hash,
+            RpcCall.STARKNET_GET_TRANSACTION_RECEIPT: self.get_receipt,
+            RpcCall.STARKNET_GET_TRANSACTION_STATUS: self.get_tx_status,
+            RpcCall.STARKNET_SPEC_VERSION: lambda _: MOCK_SPEC_VERSION,
+            RpcCall.STARKNET_SYNCING: lambda _: False,
+            RpcCall.STARKNET_SIMULATE_TRANSACTIONS: self.simulate,
+            RpcCall.STARKNET_TRACE_BLOCK_TRANSACTIONS: self.trace_block,
+            RpcCall.STARKNET_TRACE_TRANSACTION: self.trace_tx,
+        }
+
+    def application(self) -> web.Application:
+        application = web.Application()
+        application.router.add_post("/", self.handle)
+        application.router.add_post("/rpc/{version}", self.handle)
+        return application
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        await asyncio.sleep(self.latency.sample(self.rng))
+
+        if isinstance(body, list):
+            output: Any = [self.dispatch(call) for call in body]
+        else:
+            output = self.dispatch(body)
+
+        return web.json_response(output, dumps=json.dumps)
+
+    def dispatch(self, call: dict[str, Any]) -> dict[str, Any]:
+        response: dict[str, Any] = {"jsonrpc": "2.0", "id": call.get("id")}
+        try:
+            if self.rng.random() < self.error_rate:
+                raise MockError(_ERROR_INTERNAL)
+
+            method = self.methods.get(call.get("method", ""))
+            if method is None:
+                raise MockError(_ERROR_METHOD_NOT_FOUND)
+
+            try:
+                response["result"] = method(call.get("params", {}))
+            except (
+                KeyError,
+                IndexError,
+                TypeError,
+                ValueError,
+                AttributeError,
+            ):
+                raise MockError(_ERROR_INVALID_PARAMS)
+        except MockError as err:
+            response["error"] = {"code": err.code, "message": err.message}
+        return response
+
+    def block_hash_and_number(self, _: Any) -> dict[str, Any]:
+        return {
+            "block_hash": hex(_block_hash(self.chain.head)),
+            "block_number": self.chain.head,
+        }
+
+    def call(self, params: Any) -> list[str]:
+        request = _param(params, "request", 0)
+        self.chain.block_number(_param(params, "block_id", 1))
+        return [hex(_felt("call", json.dumps(request, sort_keys=True)))]
+
+    def estimate_fee(self, params: Any) -> list[dict[str, Any]]:
+        request = _param(params, "request", 0)
+        self.chain.block_number(_param(params, "block_id", 2))
+        return [
+            self.chain.fee_estimate("FRI" if tx["version"] == "0x3" else "WEI")
+            for tx in request
+        ]
+
+    def estimate_message_fee(self, params: Any) -> dict[str, Any]:
+        self.chain.block_number(_param(params, "block_id", 1))
+        return self.chain.fee_estimate()
+
+    def block_tx_count(self, params: Any) -> int:
+        self.chain.block_number(_param(params, "block_id", 0))
+        return self.chain.payload
+
+    def block_receipts(self, params: Any) -> dict[str, Any]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return {
+            **self.chain.header(block_number),
+            "transactions": [
+                {
+                    "transaction": self.chain.tx(block_number, index),
+                    "receipt": self.chain.receipt(block_number, index),
+                }
+                for index in range(self.chain.payload)
+            ],
+        }
+
+    def block_tx_hashes(self, params: Any) -> dict[str, Any]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return {
+            **self.chain.header(block_number),
+            "transactions": [
+                hex(_tx_hash(block_number, index))
+                for index in range(self.chain.payload)
+            ],
+        }
+
+    def block_txs(self, params: Any) -> dict[str, Any]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return {
+            **self.chain.header(block_number),
+            "transactions": [
+                self.chain.tx(block_number, index)
+                for index in range(self.chain.payload)
+            ],
+        }
+
+    def get_class(self, params: Any) -> dict[str, Any]:
+        self.chain.block_number(_param(params, "block_id", 0))
+        class_hash = _int(_param(params, "class_hash", 1))
+        return self.chain.contract_class(class_hash)
+
+    def get_class_at(self, params: Any) -> dict[str, Any]:
+        return self.chain.contract_class(_int(self.get_class_hash_at(params)))
+
+    def get_class_hash_at(self, params: Any) -> str:
+        self.chain.block_number(_param(params, "block_id", 0))
+        address = _int(_param(params, "contract_address", 1))
+        return hex(self.chain.class_hash(address))
+
+    def get_events(self, params: Any) -> dict[str, Any]:
+        event_filter = _param(params, "filter", 0)
+        from_block = self.chain.block_number(event_filter.get("from_block"))
+        to_block = self.chain.block_number(event_filter.get("to_block"))
+        address = event_filter.get("address")
+        keys = event_filter.get("keys") or []
+        chunk_size = int(event_filter["chunk_size"])
+        skip = int(event_filter.get("continuation_token") or 0)
+
+        def matches(event: dict[str, Any]) -> bool:
+            if address is not None and _int(event["from_address"]) != _int(
+                address
+            ):
+                return False
+            for key, allowed in zip(event["keys"], keys):
+                if allowed and _int(key) not in {_int(k) for k in allowed}:
+                    return False
+            return True
+
+        events = []
+        matched = 0
+        for block_number in range(from_block, to_block + 1):
+            for index in range(self.chain.payload):
+                receipt = self.chain.receipt(block_number, index)
+                for event in receipt["events"]:
+                    if not matches(event):
+                        continue
+                    matched += 1
+                    if matched <= skip:
+                        continue
+                    if len(events) == chunk_size:
+                        return {
+                            "events": events,
+                            "continuation_token": str(skip + chunk_size),
+                        }
+                    events.append(
+                        {
+                            **event,
+                            "transaction_hash": receipt["transaction_hash"],
+                            "block_hash": hex(_block_hash(block_number)),
+                            "block_number": block_number,
+                        }
+                    )
+
+        return {"events": events}
+
+    def get_nonce(self, params: Any) -> str:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return hex(block_number)
+
+    def get_state_update(self, params: Any) -> dict[str, Any]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return {
+            "block_hash": hex(_block_hash(block_number)),
+            "new_root": hex(_felt("root", block_number)),
+            "old_root": hex(_felt("root", max(block_number - 1, 0))),
+            "state_diff": self.chain.state_diff(block_number),
+        }
+
+    def get_storage_at(self, params: Any) -> str:
+        address = _param(params, "contract_address", 0)
+        key = _param(params, "key", 1)
+        block_number = self.chain.block_number(_param(params, "block_id", 2))
+        return hex(_felt("storage", address, key, block_number))
+
+    def get_tx_by_index(self, params: Any) -> dict[str, Any]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        index = int(_param(params, "index", 1))
+        if not 0 <= index < self.chain.payload:
+            raise MockError(_ERROR_INVALID_TXN_INDEX)
+        return self.chain.tx(block_number, index)
+
+    def get_tx_by_hash(self, params: Any) -> dict[str, Any]:
+        tx_hash = _param(params, "transaction_hash", 0)
+        return self.chain.tx(*self.chain.tx_location(tx_hash))
+
+    def get_receipt(self, params: Any) -> dict[str, Any]:
+        tx_hash = _param(params, "transaction_hash", 0)
+        block_number, index = self.chain.tx_location(tx_hash)
+        return {
+            **self.chain.receipt(block_number, index),
+            "block_hash": hex(_block_hash(block_number)),
+            "block_number": block_number,
+        }
+
+    def get_tx_status(self, params: Any) -> dict[str, Any]:
+        self.chain.tx_location(_param(params, "transaction_hash", 0))
+        return {
+            "finality_status": "ACCEPTED_ON_L2",
+            "execution_status": "SUCCEEDED",
+        }
+
+    def simulate(self, params: Any) -> list[dict[str, Any]]:
+        self.chain.block_number(_param(params, "block_id", 0))
+        transactions = _param(params, "transactions", 1)
+        return [
+            {
+                "transaction_trace": self.chain.trace(tx),
+                "fee_estimation": self.chain.fee_estimate(
+                    "FRI" if tx["version"] == "0x3" else "WEI"
+                ),
+            }
+            for tx in transactions
+        ]
+
+    def trace_block(self, params: Any) -> list[dict[str, Any]]:
+        block_number = self.chain.block_number(_param(params, "block_id", 0))
+        return [
+            {
+                "transaction_hash": hex(_tx_hash(block_number, index)),
+                "trace_root": self.chain.trace(
+                    self.chain.tx(block_number, index)
+                ),
+            }
+            for index in range(self.chain.payload)
+        ]
+
+    def trace_tx(self, params: Any) -> dict[str, Any]:
+        tx_hash = _param(params, "transaction_hash", 0)
+        return self.chain.trace(self.chain.tx(*self.chain.tx_location(tx_hash)))
+
+
+# =========================================================================== #
+#                                     CLI                                     #
+# =========================================================================== #
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m app.mock",
+        description="Mock Starknet JSON RPC node",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9944)
+    parser.add_argument(
+        "--latency",
+        type=Latency.parse,
+        default=Latency("constant", (0.0,)),
+        help="response delay distribution, in milliseconds (default: none)",
+    )
+    parser.add_argument(
+        "--payload",
+        type=int,
+        default=4,
+        help="transactions per block, events and storage slots per transaction",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of calls answered with an internal error",
+    )
+    parser.add_argument("--blocks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not 1 <= args.payload < 1 << _TX_INDEX_BITS:
+        parser.error(
+            f"payload must be between 1 and {(1 << _TX_INDEX_BITS) - 1}"
+        )
+    if not 0.0 <= args.error_rate <= 1.0:
+        parser.error("error rate must be between 0 and 1")
+
+    node = MockNode(
+        MockChain(args.blocks, args.payload),
+        args.latency,
+        args.error_rate,
+        args.seed,
+    )
+    web.run_app(node.application(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
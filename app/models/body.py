@@ -25,6 +25,17 @@ Tx = Annotated[TxInvoke | TxDeclare | TxDeploy, fastapi.Body()]
 
 Call = Annotated[Call, fastapi.Body(include_in_schema=False)]
 
+Params = Annotated[
+    dict[str, Any] | list[Any] | None,
+    fastapi.Body(
+        description=(
+            "JSON RPC parameters, either by name or by position. Defaults to "
+            "no parameters"
+        ),
+        examples=[{"block_id": "latest"}],
+    ),
+]
+
 
 class _BodyEstimateMessageFee(pydantic.BaseModel):
     from_address: Annotated[
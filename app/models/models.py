@@ -4,6 +4,8 @@ from typing import Annotated, Any, Generic, TypeVar
 
 import pydantic
 
+from app import registry
+
 REGEX_HEX: str = "^0x[a-fA-F0-9]+$"
 REGEX_BASE_64: str = "^0x[a-zA-Z0-9]+$"
 
@@ -21,10 +23,35 @@ FieldBase64 = Annotated[
 T = TypeVar("T")
 
 
-class NodeName(str, Enum):
-    """The node used to run benchmarks."""
+NodeName = Enum(
+    "NodeName",
+    {name.upper(): name for name in registry.NODES},
+    type=str,
+    module=__name__,
+)
+NodeName.__doc__ = "A node registered for benchmarking, see `app.registry`."
+
+
+class BenchmarkMode(str, Enum):
+    """How samples are sent to the node during a benchmark."""
+
+    BURST = "burst"
+    OPEN_LOOP = "open_loop"
+    CLOSED_LOOP = "closed_loop"
 
-    MADARA = "madara"
+
+class StorageSource(str, Enum):
+    """How node storage usage is measured.
+
+    - walk: size of the node database directory, from a periodic walk of the
+      whole tree which is cached in between
+    - filesystem: space used on the filesystem holding the node database, as
+      reported by the filesystem itself. This is always fresh and costs no
+      I/O, but includes anything else stored on the same filesystem
+    """
+
+    WALK = "walk"
+    FILESYSTEM = "filesystem"
 
 
 class ResponseModelStats(pydantic.BaseModel, Generic[T]):
@@ -43,13 +70,90 @@ class ResponseModelStats(pydantic.BaseModel, Generic[T]):
     value: Annotated[T, pydantic.Field(description="System measurement result")]
 
 
+class ResponseModelStorage(ResponseModelStats[int]):
+    """Holds a node storage measurement, which might have been cached. `value`
+    is the storage usage, in bytes, and `when` the time it was measured at
+    """
+
+    age: Annotated[
+        float,
+        pydantic.Field(description="Time since the measurement, in seconds"),
+    ]
+    source: Annotated[
+        StorageSource,
+        pydantic.Field(description="How the measurement was taken"),
+    ]
+
+
+class Phases(pydantic.BaseModel):
+    """Breakdown of the time spent on a JSON RPC call, in nanoseconds. This is
+    used to tell node latency apart from harness overhead.
+
+    Phases do not necessarily add up to `elapsed`: in the case of raw JSON RPC
+    calls, decoding happens after `elapsed` was measured.
+    """
+
+    connect: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Time spent opening a new connection to the node, zero if a "
+                "pooled connection was reused"
+            )
+        ),
+    ]
+    ttfb: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Time from sending the request to receiving the response "
+                "headers, mostly spent in the node"
+            )
+        ),
+    ]
+    transfer: Annotated[
+        int,
+        pydantic.Field(description="Time spent downloading the response body"),
+    ]
+    decode: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Time spent deserializing the response, and any other client "
+                "side overhead"
+            )
+        ),
+    ]
+
+
+class Histogram(pydantic.BaseModel):
+    """Log-bucketed latency histogram. Bucket `i` counts the samples whose
+    latency falls in the range `(gamma^(i-1), gamma^i]`, in nanoseconds.
+
+    Histograms sharing the same `gamma` can be merged by summing the counts of
+    their buckets.
+    """
+
+    gamma: Annotated[
+        float, pydantic.Field(description="Growth factor between buckets")
+    ]
+    buckets: Annotated[
+        dict[int, int],
+        pydantic.Field(description="Number of samples in each bucket"),
+    ]
+
+
 class NodeResponseBench(pydantic.BaseModel):
-    """Holds benchmarking indetifying data and average response time. This is
-    used to store the results of several tests, averaged over multiple samples
+    """Holds benchmarking indetifying data and latency statistics. This is
+    used to store the results of several tests, aggregated over multiple
+    samples
 
     `time_start` is kept as a way to sort measurements or discriminate test if
     the starting time between tests is too large. This could be the case in the
     event of high load
+
+    Percentiles are estimated from a log-bucketed histogram and are accurate to
+    within 1% of the true value. All latencies are in nanoseconds.
     """
 
     node: NodeName
@@ -60,6 +164,13 @@ class NodeResponseBench(pydantic.BaseModel):
         datetime.datetime,
         pydantic.Field(description="Test start time"),
     ]
+    samples: Annotated[
+        int, pydantic.Field(description="Number of samples taken")
+    ]
+    throughput: Annotated[
+        float,
+        pydantic.Field(description="Samples completed per second"),
+    ]
     elapsed_avg: Annotated[
         int,
         pydantic.Field(
@@ -68,6 +179,207 @@ class NodeResponseBench(pydantic.BaseModel):
             )
         ),
     ]
+    elapsed_stddev: Annotated[
+        int,
+        pydantic.Field(description="Standard deviation of method latency"),
+    ]
+    elapsed_min: Annotated[
+        int, pydantic.Field(description="Minimum method latency")
+    ]
+    elapsed_max: Annotated[
+        int, pydantic.Field(description="Maximum method latency")
+    ]
+    elapsed_p50: Annotated[
+        int, pydantic.Field(description="Median method latency")
+    ]
+    elapsed_p90: Annotated[
+        int, pydantic.Field(description="90th percentile method latency")
+    ]
+    elapsed_p99: Annotated[
+        int, pydantic.Field(description="99th percentile method latency")
+    ]
+    elapsed_p999: Annotated[
+        int, pydantic.Field(description="99.9th percentile method latency")
+    ]
+    phases_avg: Annotated[
+        Phases | None,
+        pydantic.Field(description="Average time spent in each call phase"),
+    ] = None
+    histogram: Annotated[
+        Histogram | None,
+        pydantic.Field(description="Distribution of sample latencies"),
+    ] = None
+
+
+class ResourceSample(pydantic.BaseModel):
+    """A single point in the resource usage time series of a node container.
+
+    I/O counters are cumulative since the container started, so usage over an
+    interval is obtained by subtracting consecutive samples.
+    """
+
+    when: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Measurement issuing time"),
+    ]
+    cpu: Annotated[
+        float,
+        pydantic.Field(
+            description="CPU usage, as a percentage of a single core"
+        ),
+    ]
+    cpu_system: Annotated[
+        float,
+        pydantic.Field(
+            description="CPU usage, as a percentage of the whole system"
+        ),
+    ]
+    memory: Annotated[int, pydantic.Field(description="Memory usage, in bytes")]
+    blkio_read: Annotated[
+        int, pydantic.Field(description="Total bytes read from disk")
+    ]
+    blkio_write: Annotated[
+        int, pydantic.Field(description="Total bytes written to disk")
+    ]
+    net_rx: Annotated[
+        int, pydantic.Field(description="Total bytes received over network")
+    ]
+    net_tx: Annotated[
+        int, pydantic.Field(description="Total bytes sent over network")
+    ]
+
+
+class ResourceSnapshot(ResourceSample):
+    """All resource usage metrics of a node container, derived from a single
+    Docker stats snapshot.
+
+    Operation rates are computed against the previous snapshot of the same
+    node, and are missing on the first snapshot.
+    """
+
+    memory_cache: Annotated[
+        int,
+        pydantic.Field(description="Page cache memory usage, in bytes"),
+    ]
+    memory_rss: Annotated[
+        int,
+        pydantic.Field(description="Anonymous (RSS) memory usage, in bytes"),
+    ]
+    blkio_read_ops: Annotated[
+        int, pydantic.Field(description="Total disk read operations")
+    ]
+    blkio_write_ops: Annotated[
+        int, pydantic.Field(description="Total disk write operations")
+    ]
+    iops_read: Annotated[
+        float | None,
+        pydantic.Field(
+            description="Disk read operations per second since last snapshot"
+        ),
+    ] = None
+    iops_write: Annotated[
+        float | None,
+        pydantic.Field(
+            description="Disk write operations per second since last snapshot"
+        ),
+    ] = None
+
+
+class NodeResources(pydantic.BaseModel):
+    """Holds the resource usage of a node, sampled over a benchmark"""
+
+    node: NodeName
+    samples: Annotated[
+        list[ResourceSample],
+        pydantic.Field(description="Resource usage, in chronological order"),
+    ]
+
+
+class LatencySummary(pydantic.BaseModel):
+    """Latency percentiles over a set of samples, in nanoseconds"""
+
+    samples: Annotated[
+        int, pydantic.Field(description="Number of samples summarized")
+    ]
+    elapsed_avg: Annotated[int, pydantic.Field(description="Average latency")]
+    elapsed_p50: Annotated[int, pydantic.Field(description="Median latency")]
+    elapsed_p90: Annotated[
+        int, pydantic.Field(description="90th percentile latency")
+    ]
+    elapsed_p99: Annotated[
+        int, pydantic.Field(description="99th percentile latency")
+    ]
+    elapsed_max: Annotated[int, pydantic.Field(description="Maximum latency")]
+
+
+class Calibration(pydantic.BaseModel):
+    """Overhead and jitter of the benchmarking harness itself, measured
+    alongside a benchmark. Node latencies within harness overhead cannot be
+    told apart from harness noise, see `app.calibration`.
+    """
+
+    overhead: Annotated[
+        LatencySummary,
+        pydantic.Field(
+            description=(
+                "Latency of no-op samples, sent through the same strategy and "
+                "recorder as real samples right before the benchmark"
+            )
+        ),
+    ]
+    overhead_stddev: Annotated[
+        int,
+        pydantic.Field(
+            description="Standard deviation of no-op sample latency"
+        ),
+    ]
+    loop_lag: Annotated[
+        LatencySummary,
+        pydantic.Field(
+            description=(
+                "Event loop scheduling delay during the benchmark. This delay "
+                "is added to any sample completing at the same time"
+            )
+        ),
+    ]
+    gc_collections: Annotated[
+        int,
+        pydantic.Field(description="Garbage collections during the benchmark"),
+    ]
+    gc_pause: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Total time spent in garbage collection during the "
+                "benchmark, in nanoseconds"
+            )
+        ),
+    ]
+    loop: Annotated[
+        str, pydantic.Field(description="Event loop implementation in use")
+    ]
+    isolated: Annotated[
+        bool,
+        pydantic.Field(description="Whether the benchmark ran in isolation"),
+    ]
+    cpus: Annotated[
+        list[int] | None,
+        pydantic.Field(
+            description=(
+                "Cpus the harness event loop ran on, if cpu affinity is "
+                "supported"
+            )
+        ),
+    ] = None
+    node_cpus: Annotated[
+        list[int] | None,
+        pydantic.Field(
+            description=(
+                "Cpus the node containers are restricted to, if they are "
+                "restricted to a cpuset"
+            )
+        ),
+    ] = None
 
 
 class ResponseModelBench(pydantic.BaseModel):
@@ -85,6 +397,507 @@ class ResponseModelBench(pydantic.BaseModel):
             )
         ),
     ]
+    resources: Annotated[
+        list[NodeResources] | None,
+        pydantic.Field(
+            description=(
+                "Resource usage of each node container during the benchmark"
+            )
+        ),
+    ] = None
+    calibration: Annotated[
+        Calibration | None,
+        pydantic.Field(
+            description="Overhead and jitter of the harness during the run"
+        ),
+    ] = None
+    run: Annotated[
+        str | None,
+        pydantic.Field(
+            description="Id the results were saved under, if they were saved"
+        ),
+    ] = None
+
+
+class NodeResponseMix(pydantic.BaseModel):
+    """Holds the results of a mixed workload benchmark over a single node.
+
+    Results are reported for each method individually as well as for all
+    methods combined, so that interference between methods can be observed by
+    comparing against single method benchmarks.
+    """
+
+    node: NodeName
+    total: Annotated[
+        NodeResponseBench,
+        pydantic.Field(description="Results over all methods combined"),
+    ]
+    methods: Annotated[
+        list[NodeResponseBench],
+        pydantic.Field(description="Results for each individual method"),
+    ]
+
+
+class ResponseModelMix(pydantic.BaseModel):
+    """Holds mixed workload benchmarking results and the inputs used"""
+
+    nodes: Annotated[
+        list[NodeResponseMix],
+        pydantic.Field(description="Benchmarking results for each node"),
+    ]
+    inputs: Annotated[
+        list[dict[str, Any]],
+        pydantic.Field(
+            description=(
+                "Procedurally generated inputs used as part of the benchmark, "
+                "in the order they were sent, along with their method"
+            )
+        ),
+    ]
+    calibration: Annotated[
+        Calibration | None,
+        pydantic.Field(
+            description="Overhead and jitter of the harness during the run"
+        ),
+    ] = None
+    run: Annotated[
+        str | None,
+        pydantic.Field(
+            description="Id the results were saved under, if they were saved"
+        ),
+    ] = None
+
+
+class SweepStep(pydantic.BaseModel):
+    """Holds the benchmarking results of a node at a given concurrency level"""
+
+    concurrency: Annotated[
+        int, pydantic.Field(description="Maximum number of samples in flight")
+    ]
+    results: NodeResponseBench
+
+
+class NodeResponseSweep(pydantic.BaseModel):
+    """Holds the results of a concurrency sweep over a single node.
+
+    The knee is the first concurrency level past which doubling concurrency
+    no longer brings a significant increase in throughput: this is where the
+    node saturates and additional load only translates into higher latency.
+    """
+
+    node: NodeName
+    method: Annotated[
+        str, pydantic.Field(description="JSON RPC method being tested")
+    ]
+    knee: Annotated[
+        int | None,
+        pydantic.Field(
+            description=(
+                "Concurrency level at which the node saturates, if it was "
+                "reached"
+            )
+        ),
+    ]
+    steps: Annotated[
+        list[SweepStep],
+        pydantic.Field(description="Results at each concurrency level"),
+    ]
+
+
+class ResponseModelSweep(pydantic.BaseModel):
+    """Holds concurrency sweep results and the inputs used in the sweep"""
+
+    nodes: Annotated[
+        list[NodeResponseSweep],
+        pydantic.Field(description="Sweep results for each node"),
+    ]
+    inputs: Annotated[
+        list[dict[str, Any]],
+        pydantic.Field(
+            description=(
+                "Procedurally generated inputs used as part of the benchmark"
+            )
+        ),
+    ]
+
+
+class BatchStep(pydantic.BaseModel):
+    """Holds the benchmarking results of a node at a given batch size.
+
+    `results` are measured per batch request and reported under the
+    `batch:<method>` method, while `throughput` and `elapsed_amortized_*` are
+    amortized over the individual calls in each batch. Calls within a batch are
+    not timed individually, so amortized latencies are the latency of each
+    batch divided by its number of calls, not the latency of any actual call.
+    """
+
+    size: Annotated[
+        int, pydantic.Field(description="Number of calls in each batch")
+    ]
+    throughput: Annotated[
+        float,
+        pydantic.Field(description="Individual calls completed per second"),
+    ]
+    elapsed_amortized_avg: Annotated[
+        int,
+        pydantic.Field(
+            description="Average amortized latency of a call, in nanoseconds"
+        ),
+    ]
+    elapsed_amortized_p50: Annotated[
+        int,
+        pydantic.Field(
+            description="Median amortized latency of a call, in nanoseconds"
+        ),
+    ]
+    elapsed_amortized_p99: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "99th percentile amortized latency of a call, in nanoseconds"
+            )
+        ),
+    ]
+    results: NodeResponseBench
+
+
+class NodeResponseBatch(pydantic.BaseModel):
+    """Holds the results of a batch size comparison over a single node.
+
+    The best batch size is the one past which doubling the batch size no
+    longer brings a significant increase in call throughput: larger batches
+    only add latency from there on.
+    """
+
+    node: NodeName
+    method: Annotated[
+        str, pydantic.Field(description="JSON RPC method being tested")
+    ]
+    best: Annotated[
+        int | None,
+        pydantic.Field(
+            description=(
+                "Batch size past which batching stops helping, if it was "
+                "reached"
+            )
+        ),
+    ]
+    steps: Annotated[
+        list[BatchStep],
+        pydantic.Field(description="Results at each batch size"),
+    ]
+
+
+class ResponseModelBatch(pydantic.BaseModel):
+    """Holds batch benchmarking results and the inputs used"""
+
+    nodes: Annotated[
+        list[NodeResponseBatch],
+        pydantic.Field(description="Batch benchmarking results for each node"),
+    ]
+    inputs: Annotated[
+        list[dict[str, Any]],
+        pydantic.Field(
+            description=(
+                "Raw JSON RPC parameters of each call, generated procedurally"
+            )
+        ),
+    ]
+
+
+class RunKind(str, Enum):
+    """Type of benchmark a saved run comes from."""
+
+    BENCH = "bench"
+    MIX = "mix"
+
+
+class ResponseModelRunInfo(pydantic.BaseModel):
+    """Describes a benchmark run saved to the result store"""
+
+    id: Annotated[str, pydantic.Field(description="Unique run identifier")]
+    kind: RunKind
+    when: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Time the run was saved at"),
+    ]
+    params: Annotated[
+        dict[str, Any],
+        pydantic.Field(description="Parameters the benchmark was run with"),
+    ]
+
+
+class RunSummary(pydantic.BaseModel):
+    """Holds the results of a single node and method within a saved run"""
+
+    image: Annotated[
+        str | None,
+        pydantic.Field(description="Id of the node docker image"),
+    ]
+    results: NodeResponseBench
+
+
+class ResponseModelRun(pydantic.BaseModel):
+    """Holds a saved benchmark run and the summary of its results, without
+    its individual samples
+    """
+
+    run: ResponseModelRunInfo
+    summaries: Annotated[
+        list[RunSummary],
+        pydantic.Field(description="Results for each node and method"),
+    ]
+
+
+class ResponseModelBaseline(pydantic.BaseModel):
+    """A saved run which other runs are compared against"""
+
+    name: Annotated[str, pydantic.Field(description="Baseline name")]
+    run: Annotated[
+        str, pydantic.Field(description="Id of the run used as baseline")
+    ]
+    when: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Time the baseline was set at"),
+    ]
+
+
+class Verdict(str, Enum):
+    """Outcome of the comparison of two benchmark runs."""
+
+    PASS = "pass"
+    REGRESS = "regress"
+    IMPROVE = "improve"
+
+
+class ConfidenceInterval(pydantic.BaseModel):
+    """Bootstrap confidence interval on a latency delta, in nanoseconds"""
+
+    low: int
+    high: int
+
+
+class MethodComparison(pydantic.BaseModel):
+    """Holds the comparison of the samples of a single method on a single node
+    between a base run and a new run. Deltas are `new - base`, so positive
+    deltas mean the new run is slower.
+    """
+
+    node: Annotated[
+        str, pydantic.Field(description="Node the samples were sent to")
+    ]
+    method: Annotated[
+        str, pydantic.Field(description="JSON RPC method being compared")
+    ]
+    samples_base: Annotated[
+        int, pydantic.Field(description="Number of samples in the base run")
+    ]
+    samples_new: Annotated[
+        int, pydantic.Field(description="Number of samples in the new run")
+    ]
+    p_value: Annotated[
+        float,
+        pydantic.Field(
+            description=(
+                "Two-sided Mann-Whitney U test p-value: the probability of "
+                "seeing latency distributions at least this different if both "
+                "runs came from the same node"
+            )
+        ),
+    ]
+    median_base: int
+    median_new: int
+    median_delta: int
+    median_ci: ConfidenceInterval
+    p99_base: int
+    p99_new: int
+    p99_delta: int
+    p99_ci: ConfidenceInterval
+    verdict: Verdict
+
+
+class ResponseModelComparison(pydantic.BaseModel):
+    """Holds the comparison of two saved benchmark runs, node by node and
+    method by method
+    """
+
+    base: Annotated[str, pydantic.Field(description="Id of the base run")]
+    new: Annotated[str, pydantic.Field(description="Id of the new run")]
+    confidence: Annotated[
+        float,
+        pydantic.Field(description="Confidence level of the comparison"),
+    ]
+    verdict: Annotated[
+        Verdict,
+        pydantic.Field(
+            description=(
+                "'regress' if any method regressed on any node, 'improve' if "
+                "any method improved and none regressed, 'pass' otherwise"
+            )
+        ),
+    ]
+    methods: Annotated[
+        list[MethodComparison],
+        pydantic.Field(
+            description="Comparison of each node and method in both runs"
+        ),
+    ]
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a benchmark job.
+
+    Jobs are queued until every node they target is free, as only one
+    benchmark can run against a node at a time.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class ResponseModelJob(pydantic.BaseModel):
+    """Describes a benchmark job and its progress"""
+
+    id: Annotated[str, pydantic.Field(description="Unique job identifier")]
+    kind: RunKind
+    nodes: Annotated[
+        list[NodeName], pydantic.Field(description="Nodes being benchmarked")
+    ]
+    status: JobStatus
+    completed: Annotated[
+        int, pydantic.Field(description="Number of samples completed so far")
+    ]
+    total: Annotated[
+        int | None,
+        pydantic.Field(
+            description="Total number of samples to send, if known in advance"
+        ),
+    ]
+    submitted: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Time the job was submitted at"),
+    ]
+    started: Annotated[
+        datetime.datetime | None,
+        pydantic.Field(description="Time the job started running at"),
+    ]
+    finished: Annotated[
+        datetime.datetime | None,
+        pydantic.Field(description="Time the job finished at"),
+    ]
+    error: Annotated[
+        str | None,
+        pydantic.Field(description="Why the job failed, if it did"),
+    ]
+
+
+class StreamSample(pydantic.BaseModel):
+    """A single benchmark sample, streamed as soon as it completes"""
+
+    position: Annotated[
+        int,
+        pydantic.Field(description="Position of the node in the benchmark"),
+    ]
+    node: NodeName
+    method: Annotated[
+        str, pydantic.Field(description="JSON RPC method being tested")
+    ]
+    when: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Call issuing time"),
+    ]
+    latency: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Sample latency, in nanoseconds. This is measured from the "
+                "time the sample was meant to be sent in 'open_loop' mode"
+            )
+        ),
+    ]
+    phases: Annotated[
+        Phases | None,
+        pydantic.Field(description="Breakdown of the call execution time"),
+    ] = None
+
+
+class StreamSummary(pydantic.BaseModel):
+    """Rolling latency statistics of a single node, streamed periodically.
+
+    Percentiles account for every sample, including those which were dropped
+    from the stream because the client could not keep up.
+    """
+
+    position: Annotated[
+        int,
+        pydantic.Field(description="Position of the node in the benchmark"),
+    ]
+    node: NodeName
+    dropped: Annotated[
+        int,
+        pydantic.Field(
+            description=(
+                "Number of samples which were not streamed so far because the "
+                "client was reading too slowly"
+            )
+        ),
+    ]
+    window: Annotated[
+        LatencySummary,
+        pydantic.Field(description="Samples completed since the last summary"),
+    ]
+    total: Annotated[
+        LatencySummary,
+        pydantic.Field(description="Samples completed since the start"),
+    ]
+
+
+class ResponseModelCorpus(pydantic.BaseModel):
+    """Describes a set of benchmark inputs which was saved to disk for replay"""
+
+    id: Annotated[str, pydantic.Field(description="Unique corpus identifier")]
+    method: Annotated[
+        str, pydantic.Field(description="JSON RPC method the inputs are for")
+    ]
+    seed: Annotated[
+        int, pydantic.Field(description="Seed used to generate the inputs")
+    ]
+    samples: Annotated[
+        int, pydantic.Field(description="Number of inputs in the corpus")
+    ]
+    when: Annotated[
+        datetime.datetime,
+        pydantic.Field(description="Corpus generation time"),
+    ]
+
+
+class ResponseModelCache(pydantic.BaseModel):
+    """Holds usage statistics of the input generator cache"""
+
+    capacity: Annotated[
+        int, pydantic.Field(description="Maximum size of the cache, in bytes")
+    ]
+    size: Annotated[
+        int,
+        pydantic.Field(description="Estimated size of the cache, in bytes"),
+    ]
+    entries: Annotated[
+        int, pydantic.Field(description="Number of entries in the cache")
+    ]
+    hits: Annotated[
+        int, pydantic.Field(description="Number of lookups served from cache")
+    ]
+    misses: Annotated[
+        int,
+        pydantic.Field(description="Number of lookups which queried the node"),
+    ]
+    evictions: Annotated[
+        int,
+        pydantic.Field(description="Number of entries evicted to free space"),
+    ]
 
 
 class ResponseModelJSON(pydantic.BaseModel, Generic[T]):
@@ -104,3 +917,7 @@ class ResponseModelJSON(pydantic.BaseModel, Generic[T]):
         int, pydantic.Field(description="Call response delay, in nanoseconds")
     ]
     output: Annotated[T, pydantic.Field(description="JSON RPC node response")]
+    phases: Annotated[
+        Phases | None,
+        pydantic.Field(description="Breakdown of the call execution time"),
+    ] = None
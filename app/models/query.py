@@ -72,11 +72,22 @@ ClassHash = Annotated[
     fastapi.Query(pattern=REGEX_HEX, description="Address of a class on-chain"),
 ]
 
+Storage = Annotated[
+    StorageSource,
+    fastapi.Query(
+        description=(
+            "How storage usage is measured. 'walk' returns the size of the "
+            "node database from a cached periodic walk, 'filesystem' returns "
+            "fresh usage of the filesystem holding the database"
+        )
+    ),
+]
+
 TestSamples = Annotated[
     int,
     fastapi.Query(
         ge=1,
-        le=100,
+        le=100_000,
         description=(
             "Number of sample to take, more samples means a higher "
             "benchmarking precision at the cost of speed"
@@ -92,3 +103,151 @@ TestInterval = Annotated[
         description=("Interval between subsequent tests, in milliseconds"),
     ),
 ]
+
+TestHistogram = Annotated[
+    bool,
+    fastapi.Query(
+        description=(
+            "If true, the full latency histogram of each node will be "
+            "returned alongside summary statistics"
+        )
+    ),
+]
+
+TestMode = Annotated[
+    BenchmarkMode,
+    fastapi.Query(
+        description=(
+            "How samples are sent to the node. 'burst' sends all samples at "
+            "once, 'open_loop' sends samples at a constant `rate`, measuring "
+            "latency from the time each sample should have been sent, "
+            "'closed_loop' keeps at most `concurrency` samples in flight"
+        )
+    ),
+]
+
+TestRate = Annotated[
+    float,
+    fastapi.Query(
+        gt=0,
+        le=100_000,
+        description=(
+            "Number of samples to send per second, only used in 'open_loop' "
+            "mode"
+        ),
+    ),
+]
+
+TestConcurrency = Annotated[
+    int,
+    fastapi.Query(
+        ge=1,
+        le=1024,
+        description=(
+            "Maximum number of samples in flight at any time, only used in "
+            "'closed_loop' mode"
+        ),
+    ),
+]
+
+TestConcurrencyMax = Annotated[
+    int,
+    fastapi.Query(
+        ge=1,
+        le=1024,
+        description=(
+            "Highest concurrency level to sweep up to. Concurrency is doubled "
+            "at each step, starting from 1"
+        ),
+    ),
+]
+
+TestBatchMax = Annotated[
+    int,
+    fastapi.Query(
+        ge=1,
+        le=1024,
+        description=(
+            "Largest number of calls to pack into a single batch request. "
+            "Batch size is doubled at each step, starting from 1"
+        ),
+    ),
+]
+
+TestSeed = Annotated[
+    int | None,
+    fastapi.Query(
+        description=(
+            "Seed used to generate inputs. The same seed will always yield "
+            "the same inputs for a given chain state"
+        ),
+    ),
+]
+
+TestSave = Annotated[
+    bool,
+    fastapi.Query(
+        description=(
+            "Whether to save the results and individual samples to the result "
+            "store, so they can be queried and compared later"
+        )
+    ),
+]
+
+RunId = Annotated[
+    str,
+    fastapi.Path(
+        pattern="^[a-f0-9]{32}$", description="Id of a saved benchmark run"
+    ),
+]
+
+JobId = Annotated[
+    str,
+    fastapi.Path(pattern="^[a-f0-9]{32}$", description="Id of a benchmark job"),
+]
+
+RunIdQuery = Annotated[
+    str,
+    fastapi.Query(
+        pattern="^[a-f0-9]{32}$", description="Id of a saved benchmark run"
+    ),
+]
+
+BaselineName = Annotated[
+    str,
+    fastapi.Path(
+        pattern="^[a-zA-Z0-9_.-]{1,64}$",
+        description="Name of a baseline, such as a node version",
+    ),
+]
+
+CorpusId = Annotated[
+    str,
+    fastapi.Query(
+        pattern="^[a-f0-9]{32}$",
+        description="Identifier of a previously generated input corpus",
+    ),
+]
+
+TestNodes = Annotated[
+    list[NodeName] | None,
+    fastapi.Query(
+        description=(
+            "Nodes to benchmark side by side, defaults to every registered "
+            "node. A node can be listed several times to measure the spread "
+            "between identical runs"
+        )
+    ),
+]
+
+TestIsolate = Annotated[
+    bool,
+    fastapi.Query(
+        description=(
+            "Whether to isolate the harness from the nodes while the "
+            "benchmark runs, by freezing garbage collection and pinning the "
+            "harness to cpus outside of the node containers cpuset. This "
+            "reduces harness jitter on sub-millisecond calls"
+        )
+    ),
+]
@@ -0,0 +1,164 @@
+"""
+# Node registry
+
+Nodes which can be benchmarked are declared in a TOML file, `REGISTRY_PATH`,
+with one table per node:
+
+```toml
+[madara]
+container = "madara_runner"
+rpc_port = 9944
+data = "/data"
+compose = "madara/compose.yaml"
+```
+
+The name of each table is the name the node is referred to by throughout the
+api, and `models.NodeName` is built from it. The node rpc url is resolved from
+the host port docker maps `rpc_port` to, unless `url` is set explicitly.
+
+Nodes which do not run in a container, such as the mock node in `app.mock`,
+only need an `url`:
+
+```toml
+[mock]
+url = "http://127.0.0.1:9944"
+```
+
+If the registry file does not exist, only madara is registered.
+
+This module is loaded before `app.models` and must not depend on it.
+"""
+
+import os
+import pathlib
+import tomllib
+from typing import Annotated
+
+import pydantic
+
+REGISTRY_PATH: pathlib.Path = pathlib.Path(
+    os.environ.get("BENCH_REGISTRY_PATH", "nodes.toml")
+)
+REGISTRY_NAME_PATTERN: str = r"^[a-z][a-z0-9_]*$"
+
+
+class NodeConfig(pydantic.BaseModel):
+    """How to reach and measure a registered node"""
+
+    model_config = pydantic.ConfigDict(extra="forbid")
+
+    container: Annotated[
+        str | None,
+        pydantic.Field(
+            description=(
+                "Name of the node docker container. Nodes which do not run in "
+                "a container, such as `app.mock`, must set `url` instead, and "
+                "their resource usage is not measured"
+            )
+        ),
+    ] = None
+    rpc_port: Annotated[
+        int | None,
+        pydantic.Field(
+            gt=0,
+            lt=65536,
+            description=(
+                "Port the node serves JSON RPC on, inside its container. "
+                "Required unless `url` is set"
+            ),
+        ),
+    ] = None
+    data: Annotated[
+        str,
+        pydantic.Field(
+            description=(
+                "Path of the node database, inside its container. This is "
+                "used to measure storage usage"
+            )
+        ),
+    ] = "/data"
+    compose: Annotated[
+        str | None,
+        pydantic.Field(
+            description="Docker compose file the node container is defined in"
+        ),
+    ] = None
+    url: Annotated[
+        str | None,
+        pydantic.Field(
+            description=(
+                "Rpc url of the node, if it should not be resolved from the "
+                "ports published by its container"
+            )
+        ),
+    ] = None
+
+    @pydantic.model_validator(mode="after")
+    def check_reachable(self) -> "NodeConfig":
+        if self.url is None and (self.container is None or not self.rpc_port):
+            raise ValueError("either an url or a container and port is needed")
+        return self
+
+
+REGISTRY_DEFAULT: dict[str, NodeConfig] = {
+    "madara": NodeConfig(
+        container="madara_runner",
+        rpc_port=9944,
+        data="/data",
+        compose="madara/compose.yaml",
+    )
+}
+
+_REGISTRY_ADAPTER = pydantic.TypeAdapter(
+    dict[
+        Annotated[
+            str, pydantic.StringConstraints(pattern=REGISTRY_NAME_PATTERN)
+        ],
+        NodeConfig,
+    ]
+)
+
+
+def registry_load(path: pathlib.Path) -> dict[str, NodeConfig]:
+    """Loads the node registry from disk
+
+    Args:
+        path: path to the registry TOML file
+
+    Returns:
+        The config of each registered node, by name, or the default registry
+        if the file does not exist
+
+    Raises:
+        ValueError: if the registry is invalid, empty or if two nodes are
+            registered with the same url
+    """
+    if not path.exists():
+        return dict(REGISTRY_DEFAULT)
+
+    with path.open("rb") as file:
+        nodes = _REGISTRY_ADAPTER.validate_python(tomllib.load(file))
+
+    if not nodes:
+        raise ValueError(f"no nodes registered in {path}")
+
+    # Samples are attributed to a node from the url they were sent to
+    urls: dict[str, str] = {}
+    for name, config in nodes.items():
+        if config.url is None:
+            continue
+        if config.url in urls:
+            raise ValueError(
+                f"nodes {urls[config.url]} and {name} share url {config.url}"
+            )
+        urls[config.url] = name
+
+    return nodes
+
+
+NODES: dict[str, NodeConfig] = registry_load(REGISTRY_PATH)
+
+
+def node_config(node: str) -> NodeConfig:
+    """Retrieves the config of a registered node"""
+    return NODES[node]
@@ -1,15 +1,22 @@
+import asyncio
+import contextvars
+import dataclasses
 import datetime
+import json
+import os
 import time
 import typing
 from enum import Enum
 from typing import Any, Coroutine, TypeVar
 
-import requests
+import aiohttp
 from docker.models.containers import Container
+from starknet_py.net.client_errors import ClientError
 from starknet_py.net.client_models import (
     BlockHashAndNumber,
     BlockStateUpdate,
     BlockTransactionTrace,
+    Call,
     DeprecatedContractClass,
     EstimatedFee,
     EventsChunk,
@@ -28,14 +35,30 @@ from starknet_py.net.client_models import (
     TransactionReceipt,
     TransactionStatusResponse,
 )
-from starknet_py.net.full_node_client import FullNodeClient
+from starknet_py.net.client_utils import _to_rpc_felt
+from starknet_py.net.full_node_client import (
+    FullNodeClient,
+    _to_storage_key,
+    get_block_identifier,
+)
 from starknet_py.net.models.transaction import AccountTransaction
 
-from app import error, models
+from app import error, models, registry
 
-MADARA_RPC_PORT: str = "9944/tcp"
 DOCKER_HOST_PORT: str = "HostPort"
 
+# Maximum number of simultaneous keep-alive connections held open to each node
+RPC_POOL_SIZE: int = int(os.environ.get("BENCH_RPC_POOL_SIZE", "100"))
+# Time an idle pooled connection is kept open before being closed, in seconds
+RPC_KEEPALIVE: float = float(os.environ.get("BENCH_RPC_KEEPALIVE", "60"))
+# Maximum time a single rpc call is allowed to take, in seconds
+RPC_TIMEOUT: float = float(os.environ.get("BENCH_RPC_TIMEOUT", "300"))
+
+# Method reported for batch requests mixing several JSON RPC methods. Batch
+# requests for a single method are reported as `batch:<method>`, so that they
+# are never mistaken for individual calls to that method
+RPC_BATCH_MIXED: str = "batch"
+
 T = TypeVar("T")
 
 
@@ -73,45 +96,425 @@ class RpcCall(str, Enum):
     STARKNET_TRACE_TRANSACTION = "starknet_traceTransaction"
 
 
-def json_rpc(
-    url: str, method: str, params: dict[str, Any] | list[Any] = {}
+# =========================================================================== #
+#                                 CLIENT POOL                                 #
+# =========================================================================== #
+
+# Pooled http sessions and starknet clients, keyed by node url. These are
+# created lazily on first use and closed on app shutdown, so that connection
+# setup is not included in the measured latency of each call.
+_SESSIONS: dict[str, aiohttp.ClientSession] = {}
+_CLIENTS: dict[str, FullNodeClient] = {}
+
+
+def session_get(url: str) -> aiohttp.ClientSession:
+    """Retrieves the pooled http session associated to a node url
+
+    Args:
+        url: node rpc url
+
+    Returns:
+        A keep-alive session holding up to `RPC_POOL_SIZE` connections
+    """
+    session = _SESSIONS.get(url)
+
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=RPC_POOL_SIZE, keepalive_timeout=RPC_KEEPALIVE
+        )
+        timeout = aiohttp.ClientTimeout(total=RPC_TIMEOUT)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[_trace_config()],
+        )
+        _SESSIONS[url] = session
+        _CLIENTS.pop(url, None)
+
+    return session
+
+
+def client_get(url: str) -> FullNodeClient:
+    """Retrieves the pooled starknet client associated to a node url
+
+    Args:
+        url: node rpc url
+
+    Returns:
+        A starknet client sharing the pooled session of that url
+    """
+    session = session_get(url)
+    client = _CLIENTS.get(url)
+
+    if client is None:
+        client = FullNodeClient(node_url=url, session=session)
+        _CLIENTS[url] = client
+
+    return client
+
+
+async def sessions_close():
+    """Closes all pooled sessions, to be called on app shutdown"""
+    sessions = list(_SESSIONS.values())
+    _SESSIONS.clear()
+    _CLIENTS.clear()
+
+    await asyncio.gather(*[session.close() for session in sessions])
+
+
+# =========================================================================== #
+#                                   PHASES                                    #
+# =========================================================================== #
+
+# Each sample is broken down into the following phases, based on aiohttp
+# tracing events:
+#
+# - connect: opening a new connection to the node, zero if a pooled
+#   connection was reused
+# - ttfb: sending the request until the response headers are received, which
+#   is mostly server time
+# - transfer: downloading the response body
+# - decode: everything else, mostly JSON and starknet-py deserialization
+#
+# Tracing callbacks run in the task which is awaiting the request, so the
+# timer of the sample in progress is retrieved through a context variable.
+
+
+@dataclasses.dataclass
+class _PhaseTimer:
+    connect: int = 0
+    ttfb: int = 0
+    transfer: int = 0
+    mark: int = 0
+
+    def lap(self) -> int:
+        now = time.perf_counter_ns()
+        delta = now - self.mark
+        self.mark = now
+        return delta
+
+    def phases(self, elapsed: int) -> models.Phases:
+        """Phase durations, with anything not measured counted as decoding
+
+        Args:
+            elapsed: total duration of the sample, in nanoseconds
+        """
+        network = self.connect + self.ttfb + self.transfer
+        return models.Phases(
+            connect=self.connect,
+            ttfb=self.ttfb,
+            transfer=self.transfer,
+            decode=max(elapsed - network, 0),
+        )
+
+
+_PHASE_TIMER: contextvars.ContextVar[_PhaseTimer | None] = (
+    contextvars.ContextVar("phase_timer", default=None)
+)
+
+
+async def _on_request_start(*_):
+    timer = _PHASE_TIMER.get()
+    if timer is not None:
+        timer.lap()
+
+
+async def _on_connection_create_end(*_):
+    timer = _PHASE_TIMER.get()
+    if timer is not None:
+        timer.connect += timer.lap()
+
+
+async def _on_request_end(*_):
+    timer = _PHASE_TIMER.get()
+    if timer is not None:
+        timer.ttfb += timer.lap()
+
+
+async def _on_response_chunk_received(*_):
+    timer = _PHASE_TIMER.get()
+    if timer is not None:
+        timer.transfer += timer.lap()
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_response_chunk_received.append(_on_response_chunk_received)
+    return trace_config
+
+
+# =========================================================================== #
+#                                  JSON RPC                                   #
+# =========================================================================== #
+
+
+async def json_rpc(
+    url: str,
+    method: RpcCall | str,
+    params: dict[str, Any] | list[Any] | None = None,
 ) -> models.ResponseModelJSON[Any]:
+    """Sends a raw JSON RPC call to a node over its pooled session
+
+    This bypasses starknet-py entirely and can be used with any `RpcCall`,
+    including those which starknet-py fails to deserialize. Only the request
+    and the download of the response body are included in `elapsed`, JSON
+    decoding is only reported as part of the sample phases.
+
+    Args:
+        url: node rpc url
+        method: JSON RPC method to call
+        params: JSON RPC method parameters, none by default
+
+    Returns:
+        The raw JSON RPC response, including the `jsonrpc` and `id` fields
+
+    Raises:
+        ClientError: if the node replied with a JSON RPC error, so that error
+            replies are never recorded as valid samples
+    """
+    if params is None:
+        params = []
+
+    session = session_get(url)
     headers = {"content-type": "application/json"}
     data = {"id": 1, "jsonrpc": "2.0", "method": method, "params": params}
 
+    timer = _PhaseTimer()
+    token = _PHASE_TIMER.set(timer)
+
     time_start = datetime.datetime.now()
     perf_start = time.perf_counter_ns()
-    response = requests.post(url=url, json=data, headers=headers)
+    try:
+        async with session.post(url=url, json=data, headers=headers) as res:
+            body = await res.read()
+    finally:
+        _PHASE_TIMER.reset(token)
     perf_stop = time.perf_counter_ns()
     perf_delta = perf_stop - perf_start
 
-    output = response.json()
+    output = json.loads(body)
+    phases = timer.phases(time.perf_counter_ns() - perf_start)
+    json_rpc_check(output)
 
     return models.ResponseModelJSON(
-        node=models.NodeName.MADARA,
+        node=rpc_node(url),
         method=method,
         when=time_start,
         elapsed=perf_delta,
         output=output,
+        phases=phases,
     )
 
 
+def rpc_batch_method(method: RpcCall | str) -> str:
+    """Method batch requests for a single JSON RPC method are reported as"""
+    if isinstance(method, RpcCall):
+        method = method.value
+    return f"{RPC_BATCH_MIXED}:{method}"
+
+
+async def json_rpc_batch(
+    url: str,
+    calls: list[tuple[RpcCall | str, dict[str, Any] | list[Any]]],
+) -> models.ResponseModelJSON[list[Any]]:
+    """Sends several raw JSON RPC calls to a node in a single batch request
+
+    Calls can be to the same method or to different methods. As with
+    `json_rpc`, only the request and the download of the response body are
+    timed, and `elapsed` covers the batch as a whole. The response is reported
+    under its own batch method, see `RPC_BATCH_MIXED`.
+
+    Args:
+        url: node rpc url
+        calls: JSON RPC methods to call, along with their parameters
+
+    Returns:
+        The raw JSON RPC responses, in the same order as `calls`
+
+    Raises:
+        ClientError: if the node replied to the batch, or to any call in it,
+            with a JSON RPC error
+    """
+    session = session_get(url)
+    headers = {"content-type": "application/json"}
+    data = [
+        {"id": id, "jsonrpc": "2.0", "method": method, "params": params}
+        for id, (method, params) in enumerate(calls)
+    ]
+
+    methods = {method for method, _ in calls}
+    method = RPC_BATCH_MIXED
+    if len(methods) == 1:
+        method = rpc_batch_method(methods.pop())
+
+    timer = _PhaseTimer()
+    token = _PHASE_TIMER.set(timer)
+
+    time_start = datetime.datetime.now()
+    perf_start = time.perf_counter_ns()
+    try:
+        async with session.post(url=url, json=data, headers=headers) as res:
+            body = await res.read()
+    finally:
+        _PHASE_TIMER.reset(token)
+    perf_stop = time.perf_counter_ns()
+    perf_delta = perf_stop - perf_start
+
+    output = json.loads(body)
+    phases = timer.phases(time.perf_counter_ns() - perf_start)
+
+    # Batch responses are allowed to come back in any order
+    if isinstance(output, list):
+        output.sort(key=lambda response: response.get("id", -1))
+        for response in output:
+            json_rpc_check(response)
+    else:
+        json_rpc_check(output)
+
+    return models.ResponseModelJSON(
+        node=rpc_node(url),
+        method=method,
+        when=time_start,
+        elapsed=perf_delta,
+        output=output,
+        phases=phases,
+    )
+
+
+def json_rpc_check(output: Any):
+    """Raises the error held by a JSON RPC reply, if it holds one
+
+    Raises:
+        ClientError: if the reply is a JSON RPC error
+    """
+    if not isinstance(output, dict) or "error" not in output:
+        return
+
+    err = output["error"]
+    if not isinstance(err, dict):
+        raise ClientError(message=str(err))
+
+    data = err.get("data")
+    raise ClientError(
+        message=str(err.get("message", "")),
+        code=err.get("code"),
+        data=None if data is None else json.dumps(data),
+    )
+
+
+def json_rpc_params(rpc_call: RpcCall, input: dict[str, Any]) -> dict[str, Any]:
+    """Converts the keyword arguments of an rpc call runner into raw JSON RPC
+    parameters, as would be sent by starknet-py
+
+    Only rpc calls whose inputs map directly to JSON RPC parameters are
+    supported, calls taking transactions or other complex bodies are not.
+
+    Args:
+        rpc_call: rpc call the inputs are for
+        input: runner keyword arguments, including default values
+
+    Returns:
+        JSON RPC parameters, by name
+
+    Raises:
+        ErrorBatchUnsupported: if the rpc call is not supported
+    """
+
+    def block_id() -> dict[str, Any]:
+        return get_block_identifier(
+            input["block_hash"],
+            to_block_number_or_tag(input["block_number"], input["block_tag"]),
+        )
+
+    match rpc_call:
+        case (
+            RpcCall.STARKNET_BLOCK_HASH_AND_NUMBER
+            | RpcCall.STARKNET_BLOCK_NUMBER
+            | RpcCall.STARKNET_CHAIN_ID
+            | RpcCall.STARKNET_SPEC_VERSION
+            | RpcCall.STARKNET_SYNCING
+        ):
+            return {}
+        case (
+            RpcCall.STARKNET_GET_BLOCK_TRANSACTION_COUNT
+            | RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS
+            | RpcCall.STARKNET_GET_BLOCK_WITH_TX_HASHES
+            | RpcCall.STARKNET_GET_BLOCK_WITH_TXS
+            | RpcCall.STARKNET_GET_STATE_UPDATE
+            | RpcCall.STARKNET_TRACE_BLOCK_TRANSACTIONS
+        ):
+            return block_id()
+        case RpcCall.STARKNET_CALL:
+            call: Call = input["call"]
+            request = {
+                "contract_address": _to_rpc_felt(call.to_addr),
+                "entry_point_selector": _to_rpc_felt(call.selector),
+                "calldata": [_to_rpc_felt(data) for data in call.calldata],
+            }
+            return {"request": request, **block_id()}
+        case RpcCall.STARKNET_GET_CLASS:
+            return {
+                "class_hash": _to_rpc_felt(input["class_hash"]),
+                **block_id(),
+            }
+        case (
+            RpcCall.STARKNET_GET_CLASS_AT
+            | RpcCall.STARKNET_GET_CLASS_HASH_AT
+            | RpcCall.STARKNET_GET_NONCE
+        ):
+            contract_address = _to_rpc_felt(input["contract_address"])
+            return {"contract_address": contract_address, **block_id()}
+        case RpcCall.STARKNET_GET_STORAGE_AT:
+            key = input["key"]
+            if isinstance(key, str):
+                key = int(key, 0)
+            return {
+                "contract_address": _to_rpc_felt(input["contract_address"]),
+                "key": _to_storage_key(key),
+                **block_id(),
+            }
+        case RpcCall.STARKNET_GET_TRANSACTION_BY_BLOCK_ID_AND_INDEX:
+            return {"index": input["index"], **block_id()}
+        case (
+            RpcCall.STARKNET_GET_TRANSACTION_BY_HASH
+            | RpcCall.STARKNET_GET_TRANSACTION_RECEIPT
+            | RpcCall.STARKNET_GET_TRANSACTION_STATUS
+            | RpcCall.STARKNET_TRACE_TRANSACTION
+        ):
+            return {"transaction_hash": _to_rpc_felt(input["tx_hash"])}
+        case _:
+            raise error.ErrorBatchUnsupported(rpc_call.value)
+
+
 async def json_rpc_starknet_py(
+    url: str,
     method: str,
     caller: Coroutine[Any, Any, T],
 ) -> models.ResponseModelJSON:
+    timer = _PhaseTimer()
+    token = _PHASE_TIMER.set(timer)
+
     time_start = datetime.datetime.now()
     perf_start = time.perf_counter_ns()
-    output = await caller
+    try:
+        output = await caller
+    finally:
+        _PHASE_TIMER.reset(token)
     perf_stop = time.perf_counter_ns()
     perf_delta = perf_stop - perf_start
 
+    phases = timer.phases(perf_delta)
+
     return models.ResponseModelJSON(
-        node=models.NodeName.MADARA,
+        node=rpc_node(url),
         method=method,
         when=time_start,
         elapsed=perf_delta,
         output=output,
+        phases=phases,
     )
 
 
@@ -125,15 +528,70 @@ def to_block_number_or_tag(
         return block_number
 
 
-def rpc_url(node: models.NodeName, container: Container):
+# Node rpc urls resolved from container port mappings, by container id. These
+# are invalidated by the docker events watcher in `stats` whenever a container
+# is restarted, as its ports might have been remapped.
+_URLS: dict[str, str] = {}
+# Node each resolved rpc url belongs to, used to tell which node a response
+# came from
+_URL_NODES: dict[str, models.NodeName] = {}
+
+
+def rpc_url(node: models.NodeName, container: Container | None):
+    config = registry.node_config(node)
+    if container is None:
+        # Nodes without a container are always registered with an url
+        assert config.url is not None
+        _url_bind(config.url, node)
+        return config.url
+
     error.container_check_running(node, container)
 
-    ports = container.ports
+    url = _URLS.get(container.id)
+    if url is not None:
+        return url
 
-    match node:
-        case models.NodeName.MADARA:
-            port = ports[MADARA_RPC_PORT][0][DOCKER_HOST_PORT]
-            return f"http://0.0.0.0:{port}"
+    if config.url is not None:
+        url = config.url
+    else:
+        ports = container.ports
+        port = ports[f"{config.rpc_port}/tcp"][0][DOCKER_HOST_PORT]
+        url = f"http://0.0.0.0:{port}"
+
+    _url_bind(url, node)
+    _URLS[container.id] = url
+    return url
+
+
+def _url_bind(url: str, node: models.NodeName):
+    other = _URL_NODES.get(url)
+    if other is not None and other != node:
+        # A host port can be mapped to another node once a container is gone,
+        # the url is only shared if the other node still resolves to it
+        live = registry.node_config(other).url == url or url in _URLS.values()
+        if live:
+            raise error.ErrorNodeUrlShared(url, node, other)
+    _URL_NODES[url] = node
+
+
+def rpc_node(url: str) -> models.NodeName:
+    """Retrieves the node an rpc url was resolved for by `rpc_url`
+
+    Raises:
+        ErrorNodeUrlUnknown: if no node was resolved to this url
+    """
+    node = _URL_NODES.get(url)
+    if node is None:
+        raise error.ErrorNodeUrlUnknown(url)
+    return node
+
+
+def rpc_url_invalidate(container_id: str | None = None):
+    """Forgets the resolved rpc url of a container, or of all containers"""
+    if container_id is None:
+        _URLS.clear()
+    else:
+        _URLS.pop(container_id, None)
 
 
 # =========================================================================== #
@@ -144,18 +602,18 @@ def rpc_url(node: models.NodeName, container: Container):
 async def rpc_starknet_blockHashAndNumber(
     url: str,
 ) -> models.ResponseModelJSON[BlockHashAndNumber]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     block_hash_and_number = client.get_block_hash_and_number()
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_BLOCK_HASH_AND_NUMBER, block_hash_and_number
+        url, RpcCall.STARKNET_BLOCK_HASH_AND_NUMBER, block_hash_and_number
     )
 
 
 async def rpc_starknet_blockNumber(url: str) -> models.ResponseModelJSON[int]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     block_number = client.get_block_number()
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_BLOCK_NUMBER, block_number
+        url, RpcCall.STARKNET_BLOCK_NUMBER, block_number
     )
 
 
@@ -166,17 +624,17 @@ async def rpc_starknet_call(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[list[int]]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     call = client.call_contract(
         call, block_hash, to_block_number_or_tag(block_number, block_tag)
     )
-    return await json_rpc_starknet_py(RpcCall.STARKNET_CALL, call)
+    return await json_rpc_starknet_py(url, RpcCall.STARKNET_CALL, call)
 
 
 async def rpc_starknet_chainId(url: str) -> models.ResponseModelJSON[str]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     chain_id = client.get_chain_id()
-    return await json_rpc_starknet_py(RpcCall.STARKNET_CHAIN_ID, chain_id)
+    return await json_rpc_starknet_py(url, RpcCall.STARKNET_CHAIN_ID, chain_id)
 
 
 async def rpc_starknet_estimateFee(
@@ -186,7 +644,7 @@ async def rpc_starknet_estimateFee(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[EstimatedFee | list[EstimatedFee]]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     estimate_fee = client.estimate_fee(
         typing.cast(AccountTransaction, tx),
         # TODO: make this an option
@@ -196,7 +654,7 @@ async def rpc_starknet_estimateFee(
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_ESTIMATE_FEE, estimate_fee
+        url, RpcCall.STARKNET_ESTIMATE_FEE, estimate_fee
     )
 
 
@@ -207,7 +665,7 @@ async def rpc_starknet_estimateMessageFee(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[EstimatedFee]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     estimage_message_fee = client.estimate_message_fee(
         body.from_address,
         body.to_address,
@@ -218,7 +676,7 @@ async def rpc_starknet_estimateMessageFee(
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_ESTIMATE_MESSAGE_FEE, estimage_message_fee
+        url, RpcCall.STARKNET_ESTIMATE_MESSAGE_FEE, estimage_message_fee
     )
 
 
@@ -228,13 +686,13 @@ async def rpc_starknet_getBlockTransactionCount(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[int]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     get_block_tx_count = client.get_block_transaction_count(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_BLOCK_TRANSACTION_COUNT, get_block_tx_count
+        url, RpcCall.STARKNET_GET_BLOCK_TRANSACTION_COUNT, get_block_tx_count
     )
 
 
@@ -246,13 +704,13 @@ async def rpc_starknet_getBlockWithReceipts(
 ) -> models.ResponseModelJSON[
     PendingStarknetBlockWithReceipts | StarknetBlockWithReceipts
 ]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     block_with_receipts = client.get_block_with_receipts(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS, block_with_receipts
+        url, RpcCall.STARKNET_GET_BLOCK_WITH_RECEIPTS, block_with_receipts
     )
 
 
@@ -264,13 +722,13 @@ async def rpc_starknet_getBlockWithTxHashes(
 ) -> models.ResponseModelJSON[
     PendingStarknetBlockWithTxHashes | StarknetBlockWithTxHashes
 ]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     block_with_tx_hashes = client.get_block_with_tx_hashes(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_BLOCK_WITH_TX_HASHES, block_with_tx_hashes
+        url, RpcCall.STARKNET_GET_BLOCK_WITH_TX_HASHES, block_with_tx_hashes
     )
 
 
@@ -280,13 +738,13 @@ async def rpc_starknet_getBlockWithTxs(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[PendingStarknetBlock | StarknetBlock]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     block_with_txs = client.get_block_with_txs(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_BLOCK_WITH_TXS, block_with_txs
+        url, RpcCall.STARKNET_GET_BLOCK_WITH_TXS, block_with_txs
     )
 
 
@@ -297,12 +755,14 @@ async def rpc_starnet_getClass(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[SierraContractClass | DeprecatedContractClass]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     class_by_hash = client.get_class_by_hash(
         class_hash, block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_GET_CLASS, class_by_hash)
+    return await json_rpc_starknet_py(
+        url, RpcCall.STARKNET_GET_CLASS, class_by_hash
+    )
 
 
 async def rpc_starknet_getClassAt(
@@ -312,14 +772,16 @@ async def rpc_starknet_getClassAt(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[SierraContractClass | DeprecatedContractClass]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     class_at = client.get_class_at(
         contract_address,
         block_hash,
         to_block_number_or_tag(block_number, block_tag),
     )
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_GET_CLASS_AT, class_at)
+    return await json_rpc_starknet_py(
+        url, RpcCall.STARKNET_GET_CLASS_AT, class_at
+    )
 
 
 async def rpc_starknet_getClassHashAt(
@@ -329,7 +791,7 @@ async def rpc_starknet_getClassHashAt(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[int]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     class_hash = client.get_class_hash_at(
         contract_address,
         block_hash,
@@ -337,14 +799,14 @@ async def rpc_starknet_getClassHashAt(
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_CLASS_HASH_AT, class_hash
+        url, RpcCall.STARKNET_GET_CLASS_HASH_AT, class_hash
     )
 
 
 async def rcp_starknet_getEvents(
     url: str, body: models.body.GetEvents
 ) -> models.ResponseModelJSON[EventsChunk]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     get_events = client.get_events(
         address=body.address,
         keys=body.keys,
@@ -357,7 +819,9 @@ async def rcp_starknet_getEvents(
         chunk_size=body.chunk_size,
     )
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_GET_EVENTS, get_events)
+    return await json_rpc_starknet_py(
+        url, RpcCall.STARKNET_GET_EVENTS, get_events
+    )
 
 
 async def rpc_starknet_getNonce(
@@ -367,14 +831,14 @@ async def rpc_starknet_getNonce(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[int]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     nonce = client.get_contract_nonce(
         contract_address,
         block_hash,
         to_block_number_or_tag(block_number, block_tag),
     )
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_GET_NONCE, nonce)
+    return await json_rpc_starknet_py(url, RpcCall.STARKNET_GET_NONCE, nonce)
 
 
 async def rpc_starknet_getStateUpdate(
@@ -383,13 +847,13 @@ async def rpc_starknet_getStateUpdate(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[PendingBlockStateUpdate | BlockStateUpdate]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     state_update = client.get_state_update(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_STATE_UPDATE, state_update
+        url, RpcCall.STARKNET_GET_STATE_UPDATE, state_update
     )
 
 
@@ -404,7 +868,7 @@ async def rpc_starknet_getStorageAt(
     if isinstance(key, str):
         key = int(key, 0)
 
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     storage = client.get_storage_at(
         contract_address,
         key,
@@ -412,7 +876,9 @@ async def rpc_starknet_getStorageAt(
         to_block_number_or_tag(block_number, block_tag),
     )
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_GET_STORAGE_AT, storage)
+    return await json_rpc_starknet_py(
+        url, RpcCall.STARKNET_GET_STORAGE_AT, storage
+    )
 
 
 async def rpc_starknet_getTransactionByBlockIdAndIndex(
@@ -422,65 +888,65 @@ async def rpc_starknet_getTransactionByBlockIdAndIndex(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[Transaction]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     tx = client.get_transaction_by_block_id(
         index, block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_TRANSACTION_BY_BLOCK_ID_AND_INDEX, tx
+        url, RpcCall.STARKNET_GET_TRANSACTION_BY_BLOCK_ID_AND_INDEX, tx
     )
 
 
 async def rpc_starknet_getTransactionByHash(
     url: str, tx_hash: models.query.TxHash
 ) -> models.ResponseModelJSON[Transaction]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     tx = client.get_transaction(tx_hash)
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_TRANSACTION_BY_HASH, tx
+        url, RpcCall.STARKNET_GET_TRANSACTION_BY_HASH, tx
     )
 
 
 async def rpc_starknet_getTransactionReceipt(
     url: str, tx_hash: models.query.TxHash
 ) -> models.ResponseModelJSON[TransactionReceipt]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     tx_receipt = client.get_transaction_receipt(tx_hash)
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_TRANSACTION_RECEIPT, tx_receipt
+        url, RpcCall.STARKNET_GET_TRANSACTION_RECEIPT, tx_receipt
     )
 
 
 async def rpc_starknet_getTransactionStatus(
     url: str, tx_hash: models.query.TxHash
 ) -> models.ResponseModelJSON[TransactionStatusResponse]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     tx_status = client.get_transaction_status(tx_hash)
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_GET_TRANSACTION_STATUS, tx_status
+        url, RpcCall.STARKNET_GET_TRANSACTION_STATUS, tx_status
     )
 
 
 async def rpc_starknet_specVersion(url: str) -> models.ResponseModelJSON[str]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     spec_version = client.spec_version()
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_SPEC_VERSION, spec_version
+        url, RpcCall.STARKNET_SPEC_VERSION, spec_version
     )
 
 
 async def rpc_starknet_syncing(
     url: str,
 ) -> models.ResponseModelJSON[bool | SyncStatus]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     syncing = client.get_syncing_status()
 
-    return await json_rpc_starknet_py(RpcCall.STARKNET_SYNCING, syncing)
+    return await json_rpc_starknet_py(url, RpcCall.STARKNET_SYNCING, syncing)
 
 
 # =========================================================================== #
@@ -495,7 +961,7 @@ async def rpc_starknet_simulateTransactions(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = None,
 ) -> models.ResponseModelJSON[list[SimulatedTransaction]]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     simulation = client.simulate_transactions(
         typing.cast(list[AccountTransaction], body.transactions),
         body.skip_validate,
@@ -505,7 +971,7 @@ async def rpc_starknet_simulateTransactions(
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_SIMULATE_TRANSACTIONS, simulation
+        url, RpcCall.STARKNET_SIMULATE_TRANSACTIONS, simulation
     )
 
 
@@ -515,13 +981,13 @@ async def rpc_starknet_traceBlockTransactions(
     block_number: models.query.BlockNumber = None,
     block_tag: models.query.BlockTag = "latest",
 ) -> models.ResponseModelJSON[list[BlockTransactionTrace]]:
-    client = FullNodeClient(node_url=url)
+    client = client_get(url)
     trace_block_transactions = client.trace_block_transactions(
         block_hash, to_block_number_or_tag(block_number, block_tag)
     )
 
     return await json_rpc_starknet_py(
-        RpcCall.STARKNET_TRACE_BLOCK_TRANSACTIONS, trace_block_transactions
+        url, RpcCall.STARKNET_TRACE_BLOCK_TRANSACTIONS, trace_block_transactions
     )
 
 
@@ -529,8 +995,8 @@ async def rpc_starknet_traceTransaction(
     url: str, tx_hash: models.query.TxHash
 ) -> models.ResponseModelJSON[Any]:
     # TODO: fix starknet-py `trace_transaction`
-    return json_rpc(
+    return await json_rpc(
         url,
         RpcCall.STARKNET_TRACE_TRANSACTION,
-        {"transaction_hash": tx_hash},
+        {"transaction_hash": _to_rpc_felt(tx_hash)},
     )
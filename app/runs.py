@@ -0,0 +1,214 @@
+"""
+# Benchmark runs
+
+Ties benchmarks to everything around them: resolving node containers and
+urls, sampling container resources while the benchmark runs and saving results
+to the result store. This is shared by the endpoints which run benchmarks
+directly and by the job scheduler.
+"""
+
+import asyncio
+from typing import Any, Callable
+
+import aiohttp
+import fastapi
+from docker.models.containers import Container
+from starknet_py.net.client_errors import ClientError
+
+from app import benchmarks, calibration, models, rpc, stats, store
+from app.benchmarks.strategies import Record
+
+# Called with the position of the node in the benchmark, the node response and
+# the sample latency, every time a sample completes
+Progress = Callable[[int, models.ResponseModelJSON, int], None]
+
+# Errors a benchmark is expected to fail with: invalid requests, errors
+# reported by the node, and nodes which cannot be reached or time out
+RUN_ERRORS: tuple[type[Exception], ...] = (
+    fastapi.HTTPException,
+    ClientError,
+    aiohttp.ClientError,
+    TimeoutError,
+)
+
+
+async def node_url(node: models.NodeName) -> str:
+    """Resolves the rpc url of a node, from its container if it has one"""
+    container = await stats.container_find(node)
+    return rpc.rpc_url(node, container)
+
+
+def _image(container: Container | None) -> str | None:
+    if container is None:
+        return None
+    return container.attrs.get("Image")
+
+
+def _sinks(
+    buffers: list[store.SampleBuffer], save: bool, progress: Progress | None
+) -> list[Record] | None:
+    """Builds the sample sinks of each node, if anything needs samples"""
+    if not save and progress is None:
+        return None
+
+    def sink(position: int, buffer: store.SampleBuffer) -> Record:
+        def record(response: models.ResponseModelJSON, latency: int):
+            if save:
+                buffer.record(response, latency)
+            if progress is not None:
+                progress(position, response, latency)
+
+        return record
+
+    return [sink(position, buffer) for position, buffer in enumerate(buffers)]
+
+
+async def bench_rpc(
+    nodes: list[models.NodeName],
+    rpc_call: rpc.RpcCall,
+    samples: int,
+    interval: int,
+    histogram: bool,
+    mode: models.BenchmarkMode,
+    rate: float,
+    concurrency: int,
+    corpus: str | None,
+    save: bool,
+    isolate: bool = False,
+    progress: Progress | None = None,
+) -> models.ResponseModelBench:
+    """Benchmarks a JSON RPC method over several nodes at once
+
+    Callers are responsible for locking the nodes with `jobs.nodes_lock`.
+
+    Args:
+        nodes: nodes to benchmark
+        isolate: whether to isolate the harness from the nodes, see
+            `calibration.calibrate`
+        progress: if set, called with every sample as it completes
+
+    See `benchmarks.benchmark` for other arguments.
+    """
+    containers = [(node, await stats.container_find(node)) for node in nodes]
+    urls = [rpc.rpc_url(node, container) for (node, container) in containers]
+
+    buffers = [
+        store.SampleBuffer(_image(container)) for (_, container) in containers
+    ]
+
+    # Nodes which do not run in a container cannot be sampled
+    sampled = [
+        (node, container)
+        for (node, container) in containers
+        if container is not None
+    ]
+
+    sampled_containers = [container for (_, container) in sampled]
+
+    async with (
+        calibration.calibrate(
+            nodes[0], sampled_containers, isolate
+        ) as calibrations,
+        stats.sample_resources(sampled) as resources,
+    ):
+        results = await benchmarks.benchmark(
+            urls,
+            rpc_call,
+            samples,
+            interval,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            corpus,
+            _sinks(buffers, save, progress),
+        )
+
+    results.resources = resources
+    results.calibration = calibrations[0]
+
+    if save:
+        params: dict[str, Any] = {
+            "rpc_call": rpc_call,
+            "samples": samples,
+            "interval": interval,
+            "mode": mode,
+            "rate": rate,
+            "concurrency": concurrency,
+            "corpus": corpus,
+        }
+        results.run = await asyncio.to_thread(
+            store.run_save,
+            models.RunKind.BENCH,
+            params,
+            [[node] for node in results.nodes],
+            buffers,
+        )
+
+    return results
+
+
+async def bench_mix(
+    node: models.NodeName,
+    weights: dict[rpc.RpcCall, float],
+    samples: int,
+    histogram: bool,
+    mode: models.BenchmarkMode,
+    rate: float,
+    concurrency: int,
+    seed: int | None,
+    save: bool,
+    isolate: bool = False,
+    progress: Progress | None = None,
+) -> models.ResponseModelMix:
+    """Benchmarks a node under a weighted mix of JSON RPC methods
+
+    Callers are responsible for locking the node with `jobs.nodes_lock`.
+
+    Args:
+        node: node to benchmark
+        isolate: whether to isolate the harness from the node, see
+            `calibration.calibrate`
+        progress: if set, called with every sample as it completes
+
+    See `benchmarks.mix` for other arguments.
+    """
+    container = await stats.container_find(node)
+    url = rpc.rpc_url(node, container)
+
+    buffers = [store.SampleBuffer(_image(container))]
+    containers = [container] if container is not None else []
+
+    async with calibration.calibrate(node, containers, isolate) as calibrations:
+        results = await benchmarks.mix(
+            [url],
+            weights,
+            samples,
+            histogram,
+            mode,
+            rate,
+            concurrency,
+            seed,
+            _sinks(buffers, save, progress),
+        )
+
+    results.calibration = calibrations[0]
+
+    if save:
+        params: dict[str, Any] = {
+            "weights": weights,
+            "samples": samples,
+            "mode": mode,
+            "rate": rate,
+            "concurrency": concurrency,
+            "seed": seed,
+        }
+        results.run = await asyncio.to_thread(
+            store.run_save,
+            models.RunKind.MIX,
+            params,
+            [[node.total, *node.methods] for node in results.nodes],
+            buffers,
+        )
+
+    return results
@@ -1,83 +1,244 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import dataclasses
 import datetime
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, TypeVar
 
 import docker
 from docker.models.containers import Container
 
-from app import error, models
+from app import error, models, registry, rpc
 
+logger = logging.getLogger("myapp.stats")
 
-def container_get(
+T = TypeVar("T")
+
+
+# =========================================================================== #
+#                                DOCKER CLIENT                                #
+# =========================================================================== #
+
+# Container events after which a cached container handle, or the rpc url
+# resolved from its port mappings, can no longer be trusted
+DOCKER_INVALIDATING_EVENTS: frozenset[str] = frozenset(
+    [
+        "create",
+        "destroy",
+        "die",
+        "kill",
+        "pause",
+        "rename",
+        "restart",
+        "start",
+        "stop",
+        "unpause",
+        "update",
+    ]
+)
+
+# Maximum number of blocking docker calls running at once
+DOCKER_POOL_SIZE: int = int(os.environ.get("BENCH_DOCKER_POOL_SIZE", "8"))
+# Maximum time a single docker call is allowed to take, in seconds
+DOCKER_TIMEOUT: float = float(os.environ.get("BENCH_DOCKER_TIMEOUT", "10"))
+
+_EXECUTOR: concurrent.futures.ThreadPoolExecutor | None = None
+_DOCKER: docker.DockerClient | None = None
+_WATCHER: "DockerWatcher | None" = None
+_CONTAINERS: dict[models.NodeName, Container] = {}
+
+
+class DockerWatcher:
+    """Invalidates cached containers and rpc urls on docker container events
+
+    Docker events are a blocking stream, so they are consumed from a dedicated
+    thread. Should the stream break, all caches are cleared and the watcher
+    is restarted the next time a container is requested.
+
+    Args:
+        client: docker client to watch events from
+    """
+
+    def __init__(self, client: docker.DockerClient) -> None:
+        self.client = client
+        self.running = True
+        self._events = client.events(decode=True, filters={"type": "container"})
+        self._thread = threading.Thread(
+            target=self._watch, name="docker-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._events.close()
+
+    def _watch(self):
+        try:
+            for event in self._events:
+                if event.get("Action") in DOCKER_INVALIDATING_EVENTS:
+                    container_invalidate(event["Actor"]["ID"])
+        except Exception:
+            if self.running:
+                logger.exception("Docker events watcher failed")
+        finally:
+            self.running = False
+            _CONTAINERS.clear()
+            rpc.rpc_url_invalidate()
+
+
+async def docker_run(
+    node: models.NodeName | None,
+    func: Callable[[], T],
+    timeout: float = DOCKER_TIMEOUT,
+) -> T:
+    """Runs a blocking docker call on the docker thread pool
+
+    The docker SDK is synchronous, and calls such as one-off container stats
+    can block for several seconds: running them on the event loop would stall
+    every benchmark and rpc call in flight.
+
+    Note that a call which times out keeps its thread busy until it returns,
+    as threads cannot be interrupted.
+
+    Args:
+        node: node the call relates to, if any
+        func: blocking call to run
+        timeout: maximum time the call is allowed to take, in seconds
+
+    Raises:
+        ErrorDockerTimeout: if the call did not complete in time
+    """
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        _EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+            max_workers=DOCKER_POOL_SIZE, thread_name_prefix="docker"
+        )
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_EXECUTOR, func), timeout
+        )
+    except TimeoutError:
+        raise error.ErrorDockerTimeout(node)
+
+
+def docker_client() -> docker.DockerClient:
+    """Retrieves the shared docker client, watching container events"""
+    global _DOCKER, _WATCHER
+
+    if _DOCKER is None:
+        _DOCKER = docker.client.from_env()
+    if _WATCHER is None or not _WATCHER.running:
+        _WATCHER = DockerWatcher(_DOCKER)
+
+    return _DOCKER
+
+
+def docker_close():
+    """Stops watching docker events and closes the shared docker client"""
+    global _EXECUTOR, _DOCKER, _WATCHER
+
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        _EXECUTOR = None
+    if _WATCHER is not None:
+        _WATCHER.stop()
+        _WATCHER = None
+    if _DOCKER is not None:
+        _DOCKER.close()
+        _DOCKER = None
+
+    _CONTAINERS.clear()
+    rpc.rpc_url_invalidate()
+
+
+async def container_get(
     node: models.NodeName,
 ) -> Container:
-    client = docker.client.from_env()
-    return client.containers.get(node + "_runner")
+    """Retrieves the container a node is running in
+
+    Raises:
+        ErrorNodeNoContainer: if the node was registered without a container
+    """
+    container_name = registry.node_config(node).container
+    if container_name is None:
+        raise error.ErrorNodeNoContainer(node)
+
+    container = _CONTAINERS.get(node)
+    if container is not None and _WATCHER is not None and _WATCHER.running:
+        return container
+
+    def get() -> Container:
+        client = docker_client()
+        container = client.containers.get(container_name)
+        _CONTAINERS[node] = container
+        return container
+
+    return await docker_run(node, get)
+
+
+async def container_find(node: models.NodeName) -> Container | None:
+    """Same as `container_get`, but None for nodes without a container"""
+    if registry.node_config(node).container is None:
+        return None
+    return await container_get(node)
+
+
+def container_invalidate(container_id: str):
+    """Forgets everything cached about a container"""
+    for node, container in list(_CONTAINERS.items()):
+        if container.id == container_id:
+            _CONTAINERS.pop(node, None)
+
+    _RESOURCES_LAST.pop(container_id, None)
+    rpc.rpc_url_invalidate(container_id)
+
+
+# =========================================================================== #
+#                                    STATS                                    #
+# =========================================================================== #
 
 
 # As explained in https://github.com/moby/moby/issues/26711
-def stats_cpu_normalized(
+async def stats_cpu_normalized(
     node: models.NodeName, container: Container
 ) -> models.ResponseModelStats[float]:
     error.container_check_running(node, container)
 
     time_start = datetime.datetime.now()
-    stats = container.stats(stream=False)
-
-    cpu_delta: int = (
-        stats["cpu_stats"]["cpu_usage"]["total_usage"]
-        - stats["precpu_stats"]["cpu_usage"]["total_usage"]
-    )
-    cpu_count: int = stats["cpu_stats"]["online_cpus"]
-    system_delta: int = (
-        stats["cpu_stats"]["system_cpu_usage"]
-        - stats["precpu_stats"]["system_cpu_usage"]
-    )
-
-    cpu_usage = (
-        (float(cpu_delta) / float(system_delta)) * float(cpu_count) * 100.0
-        if system_delta > 0
-        else 0.0
-    )
+    stats = await docker_run(node, lambda: container.stats(stream=False))
 
     return models.ResponseModelStats(
-        node=node, when=time_start, value=cpu_usage
+        node=node, when=time_start, value=_cpu_normalized(stats)
     )
 
 
-def stats_cpu_system(
+async def stats_cpu_system(
     node: models.NodeName, container: Container
 ) -> models.ResponseModelStats[float]:
     error.container_check_running(node, container)
 
     time_start = datetime.datetime.now()
-    stats = container.stats(stream=False)
-
-    cpu_delta: int = (
-        stats["cpu_stats"]["cpu_usage"]["total_usage"]
-        - stats["precpu_stats"]["cpu_usage"]["total_usage"]
-    )
-    system_delta: int = (
-        stats["cpu_stats"]["system_cpu_usage"]
-        - stats["precpu_stats"]["system_cpu_usage"]
-    )
-
-    cpu_usage = (
-        (float(cpu_delta) / float(system_delta)) * 100.0
-        if system_delta > 0
-        else 0.0
-    )
+    stats = await docker_run(node, lambda: container.stats(stream=False))
 
     return models.ResponseModelStats(
-        node=node, when=time_start, value=cpu_usage
+        node=node, when=time_start, value=_cpu_system(stats)
     )
 
 
-def stats_memory(
+async def stats_memory(
     node: models.NodeName, container: Container
 ) -> models.ResponseModelStats[int]:
     error.container_check_running(node, container)
 
     time_start = datetime.datetime.now()
-    stats = container.stats(stream=False)
+    stats = await docker_run(node, lambda: container.stats(stream=False))
 
     memory_usage = stats["memory_stats"]["usage"]
     return models.ResponseModelStats(
@@ -85,18 +246,361 @@ def stats_memory(
     )
 
 
-def stats_storage(
+# Time and disk operation counters of the last resource snapshot of each
+# container, by container id
+_RESOURCES_LAST: dict[str, tuple[float, int, int]] = {}
+
+
+async def stats_resources(
     node: models.NodeName, container: Container
-) -> models.ResponseModelStats[int]:
+) -> models.ResponseModelStats[models.ResourceSnapshot]:
     error.container_check_running(node, container)
 
     time_start = datetime.datetime.now()
-    result = container.exec_run(["du", "-sb", "/data"])
+    stats = await docker_run(node, lambda: container.stats(stream=False))
+    now = time.monotonic()
+
+    memory_cache, memory_rss = _memory_split(stats)
+    read_ops, write_ops = _blkio(stats, "io_serviced_recursive")
+
+    iops_read = iops_write = None
+    last = _RESOURCES_LAST.get(container.id)
+    if last is not None:
+        last_time, last_read_ops, last_write_ops = last
+        elapsed = now - last_time
+        # Counters are reset when the container restarts
+        if elapsed > 0 and read_ops >= last_read_ops:
+            iops_read = (read_ops - last_read_ops) / elapsed
+        if elapsed > 0 and write_ops >= last_write_ops:
+            iops_write = (write_ops - last_write_ops) / elapsed
+    _RESOURCES_LAST[container.id] = (now, read_ops, write_ops)
+
+    sample = _resource_sample(stats)
+    snapshot = models.ResourceSnapshot(
+        **sample.model_dump(),
+        memory_cache=memory_cache,
+        memory_rss=memory_rss,
+        blkio_read_ops=read_ops,
+        blkio_write_ops=write_ops,
+        iops_read=iops_read,
+        iops_write=iops_write,
+    )
+
+    return models.ResponseModelStats(node=node, when=time_start, value=snapshot)
+
+
+async def stats_storage(
+    node: models.NodeName,
+    container: Container,
+    source: models.StorageSource = models.StorageSource.WALK,
+) -> models.ResponseModelStorage:
+    error.container_check_running(node, container)
+
+    match source:
+        case models.StorageSource.WALK:
+            return await _storage_walk(node, container)
+        case models.StorageSource.FILESYSTEM:
+            return await _storage_filesystem(node, container)
+
+
+# =========================================================================== #
+#                                   STORAGE                                   #
+# =========================================================================== #
+
+# Walking the node database with `du` reads the metadata of every single file,
+# which takes several seconds on a large database and loads the very disk the
+# node is using. Walks are therefore cached, and a new walk is only started in
+# the background once the last one is older than `STORAGE_MAX_AGE`. Only the
+# very first measurement of a node waits for its walk to complete.
+
+# Age past which a cached storage walk is refreshed, in seconds
+STORAGE_MAX_AGE: float = float(os.environ.get("BENCH_STORAGE_MAX_AGE", "60"))
+# Maximum time a storage walk is allowed to take, in seconds
+STORAGE_TIMEOUT: float = float(os.environ.get("BENCH_STORAGE_TIMEOUT", "300"))
+
+
+@dataclasses.dataclass
+class _StorageWalk:
+    size: int | None = None
+    when: datetime.datetime | None = None
+    measured: float = 0.0
+    error: Exception | None = None
+    task: asyncio.Task | None = None
+
+
+_STORAGE_WALKS: dict[models.NodeName, _StorageWalk] = {}
+
+
+async def _storage_walk(
+    node: models.NodeName, container: Container
+) -> models.ResponseModelStorage:
+    walk = _STORAGE_WALKS.setdefault(node, _StorageWalk())
+
+    stale = time.monotonic() - walk.measured > STORAGE_MAX_AGE
+    if (walk.size is None or stale) and walk.task is None:
+        walk.task = asyncio.create_task(
+            _storage_walk_refresh(node, container, walk)
+        )
+
+    if walk.size is None:
+        assert walk.task is not None
+        await asyncio.shield(walk.task)
+
+        if walk.size is None:
+            assert walk.error is not None
+            raise walk.error
+
+    assert walk.when is not None
+    return models.ResponseModelStorage(
+        node=node,
+        when=walk.when,
+        value=walk.size,
+        age=time.monotonic() - walk.measured,
+        source=models.StorageSource.WALK,
+    )
+
+
+async def _storage_walk_refresh(
+    node: models.NodeName, container: Container, walk: _StorageWalk
+):
+    try:
+        when = datetime.datetime.now()
+        data = registry.node_config(node).data
+        result = await docker_run(
+            node,
+            lambda: container.exec_run(["du", "-sb", data]),
+            STORAGE_TIMEOUT,
+        )
+
+        stdin: str = result.output.decode("utf8")
+        walk.size = int(stdin.split()[0])
+        walk.when = when
+        walk.measured = time.monotonic()
+        walk.error = None
+    except Exception as err:
+        # Keep serving the last known size if there is one
+        logger.exception("Storage walk of %s failed", node)
+        walk.error = err
+    finally:
+        walk.task = None
+
+
+async def _storage_filesystem(
+    node: models.NodeName, container: Container
+) -> models.ResponseModelStorage:
+    # Total blocks, free blocks and block size, this works with both GNU
+    # coreutils and busybox
+    data = registry.node_config(node).data
+    command = ["stat", "-f", "-c", "%b %f %S", data]
+
+    when = datetime.datetime.now()
+    result = await docker_run(node, lambda: container.exec_run(command))
 
     stdin: str = result.output.decode("utf8")
-    test = stdin.removesuffix("\t/data\n")
-    storage_usage = int(test)
+    blocks, free, block_size = (int(field) for field in stdin.split())
 
-    return models.ResponseModelStats(
-        node=node, when=time_start, value=storage_usage
+    return models.ResponseModelStorage(
+        node=node,
+        when=when,
+        value=(blocks - free) * block_size,
+        age=0.0,
+        source=models.StorageSource.FILESYSTEM,
+    )
+
+
+def _cpu_normalized(stats: dict[str, Any]) -> float:
+    cpu_delta: int = (
+        stats["cpu_stats"]["cpu_usage"]["total_usage"]
+        - stats["precpu_stats"]["cpu_usage"]["total_usage"]
+    )
+    cpu_count: int = stats["cpu_stats"]["online_cpus"]
+    system_delta: int = stats["cpu_stats"]["system_cpu_usage"] - stats[
+        "precpu_stats"
+    ].get("system_cpu_usage", 0)
+
+    return (
+        (float(cpu_delta) / float(system_delta)) * float(cpu_count) * 100.0
+        if system_delta > 0
+        else 0.0
+    )
+
+
+def _cpu_system(stats: dict[str, Any]) -> float:
+    cpu_delta: int = (
+        stats["cpu_stats"]["cpu_usage"]["total_usage"]
+        - stats["precpu_stats"]["cpu_usage"]["total_usage"]
+    )
+    system_delta: int = stats["cpu_stats"]["system_cpu_usage"] - stats[
+        "precpu_stats"
+    ].get("system_cpu_usage", 0)
+
+    return (
+        (float(cpu_delta) / float(system_delta)) * 100.0
+        if system_delta > 0
+        else 0.0
+    )
+
+
+def _blkio(
+    stats: dict[str, Any], key: str = "io_service_bytes_recursive"
+) -> tuple[int, int]:
+    # Missing entirely on some storage drivers and cgroup versions
+    entries = stats["blkio_stats"].get(key) or []
+
+    read = sum(e["value"] for e in entries if e["op"].lower() == "read")
+    write = sum(e["value"] for e in entries if e["op"].lower() == "write")
+    return (read, write)
+
+
+def _memory_split(stats: dict[str, Any]) -> tuple[int, int]:
+    # Named differently under cgroup v1 and v2
+    memory = stats["memory_stats"].get("stats", {})
+
+    cache = memory.get("cache", memory.get("file", 0))
+    rss = memory.get("rss", memory.get("anon", 0))
+    return (cache, rss)
+
+
+def _network(stats: dict[str, Any]) -> tuple[int, int]:
+    # Missing when the container uses host networking
+    interfaces = stats.get("networks", {}).values()
+
+    rx = sum(interface["rx_bytes"] for interface in interfaces)
+    tx = sum(interface["tx_bytes"] for interface in interfaces)
+    return (rx, tx)
+
+
+# =========================================================================== #
+#                               RESOURCE SAMPLER                              #
+# =========================================================================== #
+
+# Time between two resource samples, in seconds. Docker streams container
+# stats once per second, so this is effectively rounded up to a whole second.
+SAMPLER_INTERVAL: float = float(os.environ.get("BENCH_SAMPLER_INTERVAL", "1.0"))
+
+
+class ResourceSampler:
+    """Records the resource usage of a container in the background
+
+    Docker's streaming stats API is consumed from a dedicated thread, as the
+    Docker SDK is blocking. Unlike one-off stats calls, which need to wait for
+    two measurements to compute cpu usage, a stream yields a new point every
+    second.
+
+    Args:
+        node: node running in the container
+        container: container to sample
+        interval: minimum time between two samples, in seconds
+    """
+
+    def __init__(
+        self, node: models.NodeName, container: Container, interval: float
+    ) -> None:
+        self.node = node
+        self.container = container
+        self.interval = interval
+        self.samples: list[models.ResourceSample] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, name=f"sampler-{container.name}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    async def stop(self) -> models.NodeResources:
+        """Stops sampling, waiting for the next point from the stream at most
+
+        The stream is only checked for a stop request when it yields a point,
+        so a container which stopped reporting stats is given up on after
+        `DOCKER_TIMEOUT` seconds, and its sampling thread is left to exit on
+        its own.
+
+        Returns:
+            All the samples recorded since the sampler was started
+        """
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join, DOCKER_TIMEOUT)
+        if self._thread.is_alive():
+            logger.warning(
+                "Resource sampling of %s did not stop within %ss",
+                self.container.name,
+                DOCKER_TIMEOUT,
+            )
+
+        samples = list(self.samples)
+        return models.NodeResources(node=self.node, samples=samples)
+
+    def _sample(self):
+        last = 0.0
+
+        try:
+            stream = self.container.stats(stream=True, decode=True)
+            with contextlib.closing(stream):
+                for stats in stream:
+                    if self._stop.is_set():
+                        break
+
+                    now = time.monotonic()
+                    if now - last < self.interval:
+                        continue
+                    last = now
+
+                    self.samples.append(_resource_sample(stats))
+        except Exception:
+            # The container going away must not fail the benchmark itself
+            logger.exception(
+                "Resource sampling of %s failed", self.container.name
+            )
+
+
+def _resource_sample(stats: dict[str, Any]) -> models.ResourceSample:
+    blkio_read, blkio_write = _blkio(stats)
+    net_rx, net_tx = _network(stats)
+
+    return models.ResourceSample(
+        when=datetime.datetime.now(),
+        cpu=_cpu_normalized(stats),
+        cpu_system=_cpu_system(stats),
+        memory=stats["memory_stats"].get("usage", 0),
+        blkio_read=blkio_read,
+        blkio_write=blkio_write,
+        net_rx=net_rx,
+        net_tx=net_tx,
     )
+
+
+@contextlib.asynccontextmanager
+async def sample_resources(
+    containers: list[tuple[models.NodeName, Container]],
+) -> AsyncIterator[list[models.NodeResources]]:
+    """Samples the resource usage of containers for the duration of a block
+
+    Containers which appear several times are only sampled once.
+
+    Args:
+        containers: node containers to sample
+
+    Yields:
+        A list which is filled with the resource usage of each container once
+        the block exits
+    """
+    samplers: dict[str, ResourceSampler] = {}
+    for node, container in containers:
+        if container.id not in samplers:
+            samplers[container.id] = ResourceSampler(
+                node, container, SAMPLER_INTERVAL
+            )
+
+    for sampler in samplers.values():
+        sampler.start()
+
+    resources: list[models.NodeResources] = []
+    try:
+        yield resources
+    finally:
+        resources.extend(
+            await asyncio.gather(
+                *[sampler.stop() for sampler in samplers.values()]
+            )
+        )
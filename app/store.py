@@ -0,0 +1,333 @@
+"""
+# Result store
+
+Benchmark results are saved to an embedded SQLite database so that they can
+be queried and compared long after they were returned over http. Each run is
+saved as:
+
+- a `runs` row, describing the benchmark and the parameters it was run with
+- a `summaries` row per node and method, holding the aggregated results
+- a `samples` row per individual sample, holding its node and latency
+
+Runs can also be tagged as named baselines, which new runs are compared
+against to detect regressions.
+
+Summaries are indexed by method, node, image and time and hold everything
+needed to list and display runs, so raw samples are only ever loaded when
+they are explicitly requested, for example to compare two runs.
+
+Samples are buffered in memory as compact tuples while the benchmark runs and
+are written in a single transaction once it completes, off the event loop.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import pathlib
+import sqlite3
+import uuid
+from typing import Any
+
+from app import error, models
+
+STORE_PATH: pathlib.Path = pathlib.Path(
+    os.environ.get("BENCH_STORE_PATH", "results.db")
+)
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    "when" TEXT NOT NULL,
+    params TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_when ON runs ("when");
+
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    image TEXT,
+    method TEXT NOT NULL,
+    "when" TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_run ON summaries (run_id, position);
+CREATE INDEX IF NOT EXISTS summaries_method ON summaries (method, "when");
+CREATE INDEX IF NOT EXISTS summaries_node ON summaries (node, "when");
+CREATE INDEX IF NOT EXISTS summaries_image ON summaries (image, "when");
+
+CREATE TABLE IF NOT EXISTS samples (
+    run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    method TEXT NOT NULL,
+    "when" TEXT NOT NULL,
+    elapsed INTEGER NOT NULL,
+    latency INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (run_id, position, method);
+CREATE INDEX IF NOT EXISTS samples_node ON samples (run_id, node, method);
+
+CREATE TABLE IF NOT EXISTS baselines (
+    name TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    "when" TEXT NOT NULL
+);
+"""
+
+
+class SampleBuffer:
+    """Collects the samples sent to a single node until they are saved
+
+    Only the node, method, issuing time and latencies of each sample are kept,
+    the node response itself is dropped.
+
+    Args:
+        image: id of the docker image the node is running
+    """
+
+    def __init__(self, image: str | None = None) -> None:
+        self.image = image
+        self.rows: list[tuple[str, str, str, int, int]] = []
+
+    def record(self, response: models.ResponseModelJSON, latency: int):
+        self.rows.append(
+            (
+                response.node,
+                response.method,
+                response.when.isoformat(),
+                response.elapsed,
+                latency,
+            )
+        )
+
+
+def _connect() -> sqlite3.Connection:
+    STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    connection = sqlite3.connect(STORE_PATH)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def run_save(
+    kind: models.RunKind,
+    params: dict[str, Any],
+    summaries: list[list[models.NodeResponseBench]],
+    buffers: list[SampleBuffer],
+) -> str:
+    """Saves the results of a benchmark run
+
+    This is blocking and should be called from a thread.
+
+    Args:
+        kind: type of benchmark which was run
+        params: parameters the benchmark was run with
+        summaries: results of each node, for each method
+        buffers: samples sent to each node, in the same order as `summaries`
+
+    Returns:
+        Id of the newly saved run
+    """
+    run_id = uuid.uuid4().hex
+    when = datetime.datetime.now().isoformat()
+
+    with contextlib.closing(_connect()) as connection, connection:
+        connection.execute(
+            'INSERT INTO runs (id, kind, "when", params) VALUES (?, ?, ?, ?)',
+            (run_id, kind, when, json.dumps(params, default=str)),
+        )
+        connection.executemany(
+            "INSERT INTO summaries "
+            '(run_id, position, node, image, method, "when", results) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run_id,
+                    position,
+                    results.node,
+                    buffer.image,
+                    results.method,
+                    results.when.isoformat(),
+                    results.model_dump_json(),
+                )
+                for position, (node_summaries, buffer) in enumerate(
+                    zip(summaries, buffers)
+                )
+                for results in node_summaries
+            ],
+        )
+        connection.executemany(
+            "INSERT INTO samples "
+            '(run_id, position, node, method, "when", elapsed, latency) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, position, *row)
+                for position, buffer in enumerate(buffers)
+                for row in buffer.rows
+            ],
+        )
+
+    return run_id
+
+
+def run_list(
+    method: str | None = None,
+    node: str | None = None,
+    image: str | None = None,
+    since: datetime.datetime | None = None,
+    limit: int = 100,
+) -> list[models.ResponseModelRunInfo]:
+    """Lists saved runs, most recent first
+
+    Args:
+        method: only list runs which benchmarked this method
+        node: only list runs which benchmarked this node
+        image: only list runs which benchmarked this docker image
+        since: only list runs saved after this time
+        limit: maximum number of runs to list
+
+    Returns:
+        The matching runs, without their results
+    """
+    filters = []
+    args: list[Any] = []
+    for column, value in [("method", method), ("node", node), ("image", image)]:
+        if value is not None:
+            filters.append(f"summaries.{column} = ?")
+            args.append(value)
+    if since is not None:
+        filters.append('runs."when" >= ?')
+        args.append(since.isoformat())
+
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    query = (
+        'SELECT DISTINCT runs.id, runs.kind, runs."when", runs.params '
+        "FROM runs JOIN summaries ON summaries.run_id = runs.id "
+        f'{where} ORDER BY runs."when" DESC LIMIT ?'
+    )
+
+    with contextlib.closing(_connect()) as connection:
+        rows = connection.execute(query, [*args, limit]).fetchall()
+
+    return [_run_info(row) for row in rows]
+
+
+def run_get(run_id: str) -> models.ResponseModelRun:
+    """Retrieves a saved run along with its summaries, but not its samples
+
+    Raises:
+        ErrorRunNotFound: if no such run exists
+    """
+    with contextlib.closing(_connect()) as connection:
+        row = connection.execute(
+            'SELECT id, kind, "when", params FROM runs WHERE id = ?', (run_id,)
+        ).fetchone()
+        if row is None:
+            raise error.ErrorRunNotFound(run_id)
+
+        summaries = connection.execute(
+            "SELECT image, results FROM summaries WHERE run_id = ? "
+            "ORDER BY position, rowid",
+            (run_id,),
+        ).fetchall()
+
+    return models.ResponseModelRun(
+        run=_run_info(row),
+        summaries=[
+            models.RunSummary(
+                image=image,
+                results=models.NodeResponseBench.model_validate_json(results),
+            )
+            for image, results in summaries
+        ],
+    )
+
+
+def run_samples(run_id: str) -> dict[tuple[str, str], list[int]]:
+    """Loads the latency of every sample in a saved run
+
+    Samples sent to the same node several times within the run are pooled
+    together.
+
+    Returns:
+        Sample latencies, in nanoseconds, by node and method
+
+    Raises:
+        ErrorRunNotFound: if no such run exists
+    """
+    with contextlib.closing(_connect()) as connection:
+        row = connection.execute(
+            "SELECT 1 FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise error.ErrorRunNotFound(run_id)
+
+        rows = connection.execute(
+            "SELECT node, method, latency FROM samples WHERE run_id = ?",
+            (run_id,),
+        )
+
+        samples: dict[tuple[str, str], list[int]] = {}
+        for node, method, latency in rows:
+            samples.setdefault((node, method), []).append(latency)
+
+    return samples
+
+
+def baseline_set(name: str, run_id: str) -> models.ResponseModelBaseline:
+    """Tags a saved run as a named baseline, replacing any previous run
+
+    Raises:
+        ErrorRunNotFound: if no such run exists
+    """
+    when = datetime.datetime.now()
+
+    with contextlib.closing(_connect()) as connection, connection:
+        row = connection.execute(
+            "SELECT 1 FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            raise error.ErrorRunNotFound(run_id)
+
+        connection.execute(
+            'INSERT OR REPLACE INTO baselines (name, run_id, "when") '
+            "VALUES (?, ?, ?)",
+            (name, run_id, when.isoformat()),
+        )
+
+    return models.ResponseModelBaseline(name=name, run=run_id, when=when)
+
+
+def baseline_get(name: str) -> models.ResponseModelBaseline:
+    """Retrieves a named baseline
+
+    Raises:
+        ErrorBaselineNotFound: if no such baseline exists
+    """
+    with contextlib.closing(_connect()) as connection:
+        row = connection.execute(
+            'SELECT run_id, "when" FROM baselines WHERE name = ?', (name,)
+        ).fetchone()
+
+    if row is None:
+        raise error.ErrorBaselineNotFound(name)
+
+    run_id, when = row
+    return models.ResponseModelBaseline(
+        name=name, run=run_id, when=datetime.datetime.fromisoformat(when)
+    )
+
+
+def _run_info(row: tuple[str, str, str, str]) -> models.ResponseModelRunInfo:
+    id, kind, when, params = row
+    return models.ResponseModelRunInfo(
+        id=id,
+        kind=models.RunKind(kind),
+        when=datetime.datetime.fromisoformat(when),
+        params=json.loads(params),
+    )
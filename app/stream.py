@@ -0,0 +1,168 @@
+"""
+# Sample streaming
+
+Long benchmarks only return their results once every sample has completed.
+Instead, samples can be streamed to the client as server-sent events while the
+benchmark runs:
+
+- a `sample` event for every sample, holding its latency and phase timings
+- a `summary` event for every node every `STREAM_SUMMARY_INTERVAL` seconds,
+  holding rolling latency percentiles
+- a single `result` event once the benchmark completes, holding the same
+  results as the non-streaming endpoint, or an `error` event if it failed
+
+Samples are handed over to the client through a bounded queue. If the client
+reads too slowly and the queue fills up, new samples are dropped from the
+stream rather than buffered without limit. Dropped samples still count towards
+summaries, which report how many samples were dropped so far.
+
+Closing the connection cancels the benchmark, which allows aborting a run
+early if a node is obviously degraded.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable
+
+import fastapi
+import pydantic
+
+from app import error, models
+from app.benchmarks.histogram import Histogram
+from app.runs import RUN_ERRORS, Progress
+
+logger = logging.getLogger("myapp.stream")
+
+# Maximum number of samples waiting to be sent to the client
+STREAM_QUEUE_SIZE: int = int(os.environ.get("BENCH_STREAM_QUEUE_SIZE", "1024"))
+# Time between two summaries of the same node, in seconds
+STREAM_SUMMARY_INTERVAL: float = float(
+    os.environ.get("BENCH_STREAM_SUMMARY_INTERVAL", "1.0")
+)
+
+
+def _event(event: str, data: pydantic.BaseModel) -> str:
+    return f"event: {event}\ndata: {data.model_dump_json()}\n\n"
+
+
+class _NodeStream:
+    """Rolling statistics of a single node"""
+
+    def __init__(self, node: models.NodeName) -> None:
+        self.node = node
+        self.window = Histogram()
+        self.total = Histogram()
+        self.dropped = 0
+
+    def summary(self, position: int) -> models.StreamSummary:
+        summary = models.StreamSummary(
+            position=position,
+            node=self.node,
+            dropped=self.dropped,
+            window=self.window.to_summary(),
+            total=self.total.to_summary(),
+        )
+        self.window = Histogram()
+        return summary
+
+
+class SampleStream:
+    """Streams the samples of a benchmark as server-sent events
+
+    Args:
+        size: maximum number of samples waiting to be sent to the client
+    """
+
+    def __init__(self, size: int = STREAM_QUEUE_SIZE) -> None:
+        self.queue: asyncio.Queue[models.StreamSample] = asyncio.Queue(size)
+        self.nodes: dict[int, _NodeStream] = {}
+
+    def progress(
+        self, position: int, response: models.ResponseModelJSON, latency: int
+    ):
+        """Benchmark progress callback, see `runs.Progress`"""
+        node = self.nodes.get(position)
+        if node is None:
+            node = self.nodes[position] = _NodeStream(response.node)
+
+        node.window.record(latency)
+        node.total.record(latency)
+
+        sample = models.StreamSample(
+            position=position,
+            node=response.node,
+            method=response.method,
+            when=response.when,
+            latency=latency,
+            phases=response.phases,
+        )
+        try:
+            self.queue.put_nowait(sample)
+        except asyncio.QueueFull:
+            node.dropped += 1
+
+    def summaries(self) -> list[str]:
+        return [
+            _event("summary", node.summary(position))
+            for position, node in sorted(self.nodes.items())
+        ]
+
+    async def events(
+        self, run: Callable[[Progress], Awaitable[pydantic.BaseModel]]
+    ) -> AsyncIterator[str]:
+        """Runs a benchmark, yielding server-sent events as it progresses
+
+        The benchmark is cancelled if the generator is closed before it
+        completes, which happens when the client disconnects.
+
+        Args:
+            run: starts the benchmark, given a callback to report the progress
+                of each sample
+        """
+        task = asyncio.create_task(run(self.progress))
+        get: asyncio.Future[models.StreamSample] | None = None
+        summary_last = time.monotonic()
+
+        try:
+            while not task.done() or not self.queue.empty():
+                timeout = STREAM_SUMMARY_INTERVAL - (
+                    time.monotonic() - summary_last
+                )
+                get = asyncio.ensure_future(self.queue.get())
+                await asyncio.wait(
+                    [get, task],
+                    timeout=max(timeout, 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if get.done():
+                    yield _event("sample", get.result())
+                else:
+                    get.cancel()
+
+                if time.monotonic() - summary_last >= STREAM_SUMMARY_INTERVAL:
+                    for event in self.summaries():
+                        yield event
+                    summary_last = time.monotonic()
+
+            for event in self.summaries():
+                yield event
+
+            try:
+                result = _event("result", task.result())
+            except fastapi.HTTPException as err:
+                detail = str(err.detail)
+                result = _event("error", error.ErrorMessage(detail=detail))
+            except RUN_ERRORS as err:
+                logger.warning("Streamed benchmark failed", exc_info=True)
+                detail = repr(err)
+                result = _event("error", error.ErrorMessage(detail=detail))
+            yield result
+        finally:
+            if get is not None:
+                get.cancel()
+            if not task.done():
+                task.cancel()
+                await asyncio.wait([task])